@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 
 export function useProjectFilesApi(projectId: string, limit = 20) {
   const [files, setFiles] = useState<any[]>([]);
@@ -7,6 +7,8 @@ export function useProjectFilesApi(projectId: string, limit = 20) {
   const [offset, setOffset] = useState(0);
   const [search, setSearch] = useState("");
   const [status, setStatus] = useState("");
+  const filesRef = useRef<any[]>([]);
+  filesRef.current = files;
 
   const loadFiles = async (newOffset = offset, newSearch = search, newStatus = status) => {
     setLoading(true);
@@ -25,6 +27,29 @@ export function useProjectFilesApi(projectId: string, limit = 20) {
     // eslint-disable-next-line
   }, [projectId, search, status]);
 
+  // Live status updates pushed by the backend instead of polling
+  useEffect(() => {
+    if (!projectId) return;
+    const events = new EventSource(
+      `http://localhost:8000/api/events?projectId=${encodeURIComponent(projectId)}`
+    );
+    events.addEventListener("file_status", (e) => {
+      const event = JSON.parse((e as MessageEvent).data);
+      if (!filesRef.current.some((f) => f.fileId === event.fileId)) {
+        // A new upload: reload so it shows up in the current page
+        loadFiles(offset, search, status);
+        return;
+      }
+      setFiles((current) =>
+        current.map((f) =>
+          f.fileId === event.fileId ? { ...f, status: event.status } : f
+        )
+      );
+    });
+    return () => events.close();
+    // eslint-disable-next-line
+  }, [projectId, offset, search, status]);
+
   return {
     files,
     total,
@@ -0,0 +1,243 @@
+"""
+HNSW index benchmark for the RAG service.
+Builds ChromaDB collections for a set of HNSW parameter combinations and reports
+recall@k against exact search, query latency, build time and memory growth.
+
+Usage:
+    python -m backend.benchmarks.hnsw_benchmark --num-vectors 20000
+    python -m backend.benchmarks.hnsw_benchmark --corpus embeddings.npy \\
+        --params M=16,construction_ef=100,search_ef=10 --params M=32,search_ef=64
+    python -m backend.benchmarks.hnsw_benchmark --from-chroma ./chroma_db_test
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.config import Config
+
+DEFAULT_PARAM_SETS = [
+    {"M": 8, "construction_ef": 64, "search_ef": 10},
+    {"M": 16, "construction_ef": 100, "search_ef": 10},
+    {"M": 16, "construction_ef": 100, "search_ef": 64},
+    {"M": 32, "construction_ef": 200, "search_ef": 128},
+]
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def synthetic_corpus(
+    num_vectors: int, dim: int, num_clusters: int = 64, seed: int = 42
+) -> np.ndarray:
+    """Clustered unit vectors, closer to real embedding distributions than pure noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dim))
+    assignments = rng.integers(0, num_clusters, size=num_vectors)
+    vectors = centers[assignments] + 0.5 * rng.standard_normal((num_vectors, dim))
+    return normalize(vectors)
+
+
+def load_chroma_corpus(persist_directory: str, collection_name: str) -> np.ndarray:
+    """Load stored embeddings from a persisted ChromaDB collection."""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=persist_directory)
+    collection = client.get_collection(collection_name)
+    records = collection.get(include=["embeddings"])
+    return normalize(np.asarray(records["embeddings"], dtype=np.float32))
+
+
+def make_queries(corpus: np.ndarray, num_queries: int, seed: int = 7) -> np.ndarray:
+    """Perturbed samples of the corpus, so every query has meaningful neighbours."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(corpus), size=num_queries)
+    noise = 0.1 * rng.standard_normal((num_queries, corpus.shape[1]))
+    return normalize(corpus[picks] + noise)
+
+
+def exact_neighbors(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth top-k by brute-force cosine similarity."""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, kth=min(k, corpus.shape[0] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def parse_param_set(spec: str) -> Dict[str, Any]:
+    """Parse "M=16,construction_ef=100,search_ef=10" into an HNSW parameter dict."""
+    params: Dict[str, Any] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        key, value = item.split("=", 1)
+        params[key.strip()] = value.strip() if key.strip() == "space" else int(value)
+    return params
+
+
+def benchmark_param_set(
+    client,
+    params: Dict[str, Any],
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    collection_name: str,
+) -> Dict[str, Any]:
+    """Build one collection with the given parameters and measure it."""
+    hnsw = Config.get_hnsw_config(collection_name)
+    hnsw.update(params)
+    metadata = {f"hnsw:{key}": value for key, value in hnsw.items()}
+
+    gc.collect()
+    rss_before = current_rss_bytes()
+    collection = client.create_collection(
+        name=f"bench_{uuid.uuid4().hex[:12]}", metadata=metadata
+    )
+    try:
+        ids = [str(i) for i in range(len(corpus))]
+        max_batch = getattr(client, "get_max_batch_size", lambda: 5000)()
+
+        start = time.perf_counter()
+        for offset in range(0, len(corpus), max_batch):
+            collection.add(
+                ids=ids[offset : offset + max_batch],
+                embeddings=corpus[offset : offset + max_batch].tolist(),
+            )
+        # The first query flushes any buffered vectors into the HNSW graph
+        collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+        build_time = time.perf_counter() - start
+        rss_after = current_rss_bytes()
+
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = collection.query(
+                query_embeddings=[query.tolist()], n_results=k, include=[]
+            )
+            latencies.append(time.perf_counter() - start)
+            found = {int(i) for i in result["ids"][0]}
+            hits += len(found.intersection(int(i) for i in expected))
+
+        latencies_ms = np.array(latencies) * 1000
+        return {
+            "params": hnsw,
+            f"recall@{k}": hits / (len(queries) * k),
+            "query_p50_ms": float(np.percentile(latencies_ms, 50)),
+            "query_p99_ms": float(np.percentile(latencies_ms, 99)),
+            "build_time_s": build_time,
+            "memory_mb": (rss_after - rss_before) / (1024 * 1024),
+        }
+    finally:
+        client.delete_collection(collection.name)
+
+
+def run_benchmark(
+    corpus: np.ndarray,
+    param_sets: List[Dict[str, Any]],
+    num_queries: int = 200,
+    k: int = 10,
+    collection_name: str = "documents",
+    queries: Optional[np.ndarray] = None,
+) -> List[Dict[str, Any]]:
+    """Benchmark every parameter set against the same corpus and queries."""
+    import chromadb
+    from chromadb.config import Settings
+
+    if queries is None:
+        queries = make_queries(corpus, num_queries)
+    k = min(k, len(corpus))
+    truth = exact_neighbors(corpus, queries, k)
+    client = chromadb.Client(settings=Settings(anonymized_telemetry=False))
+    return [
+        benchmark_param_set(client, params, corpus, queries, truth, k, collection_name)
+        for params in param_sets
+    ]
+
+
+def print_report(results: List[Dict[str, Any]], k: int) -> None:
+    header = f"{'params':<55} {'recall@' + str(k):>10} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8} {'mem MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        params = ",".join(f"{key}={value}" for key, value in r["params"].items())
+        print(
+            f"{params:<55} {r[f'recall@{k}']:>10.4f} {r['query_p50_ms']:>8.2f} "
+            f"{r['query_p99_ms']:>8.2f} {r['build_time_s']:>8.2f} {r['memory_mb']:>8.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark HNSW index parameters")
+    parser.add_argument("--num-vectors", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--corpus", help="Recorded corpus as an .npy array of embeddings")
+    parser.add_argument("--queries", help="Recorded queries as an .npy array")
+    parser.add_argument("--from-chroma", help="Persisted ChromaDB directory to read embeddings from")
+    parser.add_argument("--collection", default=Config.CHROMA_COLLECTION_NAME)
+    parser.add_argument(
+        "--params",
+        action="append",
+        help="Parameter set, e.g. M=16,construction_ef=100,search_ef=10 (repeatable)",
+    )
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        corpus = normalize(np.load(args.corpus))
+    elif args.from_chroma:
+        corpus = load_chroma_corpus(args.from_chroma, args.collection)
+    else:
+        corpus = synthetic_corpus(args.num_vectors, args.dim)
+    queries = normalize(np.load(args.queries)) if args.queries else None
+
+    param_sets = (
+        [parse_param_set(spec) for spec in args.params]
+        if args.params
+        else DEFAULT_PARAM_SETS
+    )
+    results = run_benchmark(
+        corpus,
+        param_sets,
+        num_queries=args.num_queries,
+        k=args.k,
+        collection_name=args.collection,
+        queries=queries,
+    )
+    print(f"Corpus: {corpus.shape[0]} vectors x {corpus.shape[1]} dims")
+    print_report(results, min(args.k, len(corpus)))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+Load test for the RAG service API.
+Starts the FastAPI app in a child process (or targets a running server with
+--url) and replays a mix of /api/batch-upload and /api/ask requests from a fixed
+number of concurrent clients. Reports throughput, p50/p95/p99 latency and error
+rate per endpoint, and the server's event loop lag from /metrics.
+
+--stub swaps the tokenizer, models, LLM and PDF conversion for the stand-ins in
+backend/benchmarks/stubs.py so the run needs no downloads or API keys;
+--llm-latency, --encode-latency and --rerank-latency simulate model cost. The
+local server keeps its metadata and vectors in a temporary directory.
+
+Usage:
+    python -m backend.benchmarks.load_test --stub --concurrency 16 --duration 30
+    python -m backend.benchmarks.load_test --stub --llm-latency 0.8 --upload-ratio 0.3 --json load.json
+    python -m backend.benchmarks.load_test --url http://localhost:8000 --project-id p1 --upload-ratio 0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(ROOT)
+from backend.benchmarks.microbenchmarks import WORDS, synthetic_document
+
+LOOP_LAG_METRIC = "rag_event_loop_lag_seconds"
+METRIC_LINE = re.compile(r'^(\w+?)(?:_bucket\{le="([^"]+)"\}|_sum|_count) (\S+)$')
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the app in this process, with stubs installed first."""
+    import uvicorn
+
+    from backend.benchmarks import stubs
+
+    if args.stub or args.stub_models:
+        stubs.install_stub_models(args.dim, args.encode_latency, args.rerank_latency)
+        stubs.install_stub_tokenizers()
+    if args.stub or args.stub_llm:
+        stubs.install_stub_llm(args.llm_latency)
+    if args.stub or args.stub_conversion:
+        stubs.install_stub_conversion()
+    from backend.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def start_server(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    """Start serve() in a child process and wait until /api/ready answers 200."""
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="rag_load_")
+    env = dict(
+        os.environ,
+        METADATA_DB=os.path.join(data_dir, "metadata.db"),
+        CHROMA_PERSIST_DIRECTORY=os.path.join(data_dir, "chroma"),
+        COMPACTION_INTERVAL_SECONDS="0",
+    )
+    command = [sys.executable, "-m", "backend.benchmarks.load_test", "--serve",
+               "--port", str(args.port), "--dim", str(args.dim),
+               "--llm-latency", str(args.llm_latency),
+               "--encode-latency", str(args.encode_latency),
+               "--rerank-latency", str(args.rerank_latency)]
+    for flag in ("stub", "stub_models", "stub_llm", "stub_conversion"):
+        if getattr(args, flag):
+            command.append("--" + flag.replace("_", "-"))
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{args.port}"
+    print(f"Started server (pid {process.pid}) at {url}, data in {data_dir}")
+
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            status = asyncio.run(_get_status(url + "/api/ready"))
+        except aiohttp.ClientError:
+            status = None
+        if status == 200:
+            return process, url
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Server not ready after {args.startup_timeout}s")
+
+
+async def _get_status(url: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            return response.status
+
+
+async def scrape_loop_lag(session: aiohttp.ClientSession, url: str) -> Optional[Dict[str, Any]]:
+    """Current event loop lag histogram from /metrics, None if unavailable."""
+    try:
+        async with session.get(url + "/metrics") as response:
+            text = await response.text()
+    except aiohttp.ClientError:
+        return None
+    histogram: Dict[str, Any] = {"buckets": {}, "sum": 0.0, "count": 0}
+    for line in text.splitlines():
+        if not line.startswith(LOOP_LAG_METRIC):
+            continue
+        match = METRIC_LINE.match(line)
+        if not match:
+            continue
+        bound, value = match.group(2), float(match.group(3))
+        if bound is not None:
+            histogram["buckets"][float(bound)] = value
+        elif line.startswith(LOOP_LAG_METRIC + "_sum"):
+            histogram["sum"] = value
+        else:
+            histogram["count"] = int(value)
+    return histogram if histogram["buckets"] else None
+
+
+def histogram_quantile(q: float, buckets: List[Tuple[float, float]]) -> Optional[float]:
+    """Prometheus-style quantile estimate from cumulative (upper bound, count) pairs."""
+    total = buckets[-1][1] if buckets else 0
+    if not total:
+        return None
+    rank = q * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def loop_lag_summary(before: Optional[Dict], after: Optional[Dict]) -> Optional[Dict[str, Any]]:
+    """Lag observed during the run, from the difference of two scrapes."""
+    if not after:
+        return None
+    before = before or {"buckets": {}, "sum": 0.0, "count": 0}
+    count = after["count"] - before["count"]
+    if count <= 0:
+        return None
+    buckets = sorted(
+        (bound, value - before["buckets"].get(bound, 0)) for bound, value in after["buckets"].items()
+    )
+    summary = {"samples": count, "mean_ms": (after["sum"] - before["sum"]) / count * 1000}
+    for name, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        value = histogram_quantile(q, buckets)
+        summary[name] = value * 1000 if value is not None else None
+    return summary
+
+
+async def monitor_client_lag(samples: List[float], interval: float = 0.1) -> None:
+    """Lag of the load generator's own loop; if high, the client is the bottleneck."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(loop.time() - start - interval, 0.0))
+
+
+class LoadGenerator:
+    """Closed-loop clients sending a weighted mix of uploads and questions."""
+
+    def __init__(self, args: argparse.Namespace, url: str):
+        self.args = args
+        self.url = url
+        self.project_id = args.project_id or f"loadtest-{uuid.uuid4().hex[:8]}"
+        self.documents = [synthetic_document(args.doc_chars, seed=i) for i in range(8)]
+        self.samples: List[Dict[str, Any]] = []
+
+    def _question(self, rng: random.Random) -> str:
+        return "What does the document say about " + " ".join(rng.sample(WORDS, 3)) + "?"
+
+    async def upload(self, session: aiohttp.ClientSession, rng: random.Random) -> Tuple[int, Optional[str]]:
+        form = aiohttp.FormData()
+        form.add_field("projectId", self.project_id)
+        form.add_field("strategy", self.args.strategy)
+        for _ in range(self.args.files_per_upload):
+            form.add_field(
+                "files",
+                rng.choice(self.documents).encode("utf-8"),
+                filename=f"load_{uuid.uuid4().hex[:12]}.txt",
+                content_type="text/plain",
+            )
+        async with session.post(self.url + "/api/batch-upload", data=form) as response:
+            body = await response.json(content_type=None)
+        if response.status != 200:
+            return response.status, str(body)[:200]
+        if body.get("errors"):
+            return response.status, body["errors"][0].get("error", "upload failed")[:200]
+        return response.status, None
+
+    async def ask(self, session: aiohttp.ClientSession, rng: random.Random) -> Tuple[int, Optional[str]]:
+        payload = {"projectId": self.project_id, "question": self._question(rng)}
+        async with session.post(self.url + "/api/ask", json=payload) as response:
+            body = await response.json(content_type=None)
+        if response.status != 200:
+            return response.status, str(body)[:200]
+        return response.status, None
+
+    async def _request(self, kind: str, session: aiohttp.ClientSession, rng: random.Random) -> None:
+        send = self.upload if kind == "upload" else self.ask
+        start = time.perf_counter()
+        try:
+            status, error = await send(session, rng)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, error = 0, f"{type(e).__name__}: {e}"
+        self.samples.append(
+            {
+                "kind": kind,
+                "start": start,
+                "latency": time.perf_counter() - start,
+                "status": status,
+                "error": error,
+            }
+        )
+
+    async def _client(self, worker: int, session: aiohttp.ClientSession, deadline: float) -> None:
+        rng = random.Random(self.args.seed + worker)
+        while time.perf_counter() < deadline:
+            if self.args.requests and len(self.samples) >= self.args.requests:
+                return
+            kind = "upload" if rng.random() < self.args.upload_ratio else "ask"
+            await self._request(kind, session, rng)
+
+    async def run(self) -> Dict[str, Any]:
+        timeout = aiohttp.ClientTimeout(total=self.args.timeout)
+        connector = aiohttp.TCPConnector(limit=self.args.concurrency + 2)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            rng = random.Random(self.args.seed)
+            for _ in range(self.args.seed_uploads):
+                status, error = await self.upload(session, rng)
+                if error:
+                    raise RuntimeError(f"Seed upload failed ({status}): {error}")
+            print(f"Seeded project {self.project_id} with {self.args.seed_uploads} uploads")
+
+            lag_before = await scrape_loop_lag(session, self.url)
+            client_lag: List[float] = []
+            monitor = asyncio.create_task(monitor_client_lag(client_lag))
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    self._client(i, session, start + self.args.duration)
+                    for i in range(self.args.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - start
+            monitor.cancel()
+            lag_after = await scrape_loop_lag(session, self.url)
+
+        return {
+            "elapsed_seconds": elapsed,
+            "endpoints": {
+                kind: summarize(
+                    [s for s in self.samples if kind == "all" or s["kind"] == kind], elapsed
+                )
+                for kind in ("ask", "upload", "all")
+            },
+            "server_event_loop_lag": loop_lag_summary(lag_before, lag_after),
+            "client_event_loop_lag_p99_ms": (
+                float(np.percentile(client_lag, 99)) * 1000 if client_lag else None
+            ),
+        }
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles and errors for one endpoint."""
+    if not samples:
+        return {"requests": 0}
+    latencies = np.array([s["latency"] for s in samples]) * 1000
+    failed = [s for s in samples if s["error"]]
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "errors": len(failed),
+        "error_rate": len(failed) / len(samples),
+        "status_codes": dict(Counter(str(s["status"]) for s in samples)),
+        "error_examples": sorted({s["error"] for s in failed})[:5],
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{'endpoint':<8} {'requests':>8} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>8}")
+    for kind, stats in report["endpoints"].items():
+        if not stats["requests"]:
+            continue
+        print(
+            f"{kind:<8} {stats['requests']:>8} {stats['throughput_rps']:>8.1f} "
+            f"{stats['p50_ms']:>7.0f}ms {stats['p95_ms']:>7.0f}ms {stats['p99_ms']:>7.0f}ms "
+            f"{stats['error_rate']:>7.1%}"
+        )
+        for example in stats["error_examples"]:
+            print(f"         error: {example}")
+    lag = report["server_event_loop_lag"]
+    if lag:
+        print(
+            f"\nServer event loop lag: mean {lag['mean_ms']:.1f}ms, p50 {lag['p50_ms']:.1f}ms, "
+            f"p95 {lag['p95_ms']:.1f}ms, p99 {lag['p99_ms']:.1f}ms ({lag['samples']} samples)"
+        )
+    else:
+        print("\nServer event loop lag: unavailable (EVENT_LOOP_LAG_INTERVAL=0?)")
+    client_lag = report["client_event_loop_lag_p99_ms"]
+    if client_lag is not None and client_lag > 50:
+        print(f"Warning: load generator loop lag p99 {client_lag:.0f}ms; results are client-bound")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load test /api/batch-upload and /api/ask")
+    target = parser.add_argument_group("server")
+    target.add_argument("--url", help="Test a running server instead of starting one")
+    target.add_argument("--port", type=int, default=8799, help="Port for the local server")
+    target.add_argument("--data-dir", help="Local server data directory (default: a temp dir)")
+    target.add_argument("--startup-timeout", type=float, default=120)
+    target.add_argument("--stub", action="store_true", help="All of the --stub-* options")
+    target.add_argument("--stub-models", action="store_true",
+                        help="Stub tokenizer, embedding and reranking models")
+    target.add_argument("--stub-llm", action="store_true", help="Stub the OpenAI client")
+    target.add_argument("--stub-conversion", action="store_true",
+                        help="Ingest uploads as plain text instead of converting to PDF")
+    target.add_argument("--dim", type=int, default=384, help="Stub embedding dimension")
+    target.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM seconds per answer")
+    target.add_argument("--encode-latency", type=float, default=0.0,
+                        help="Stub encoder seconds per text")
+    target.add_argument("--rerank-latency", type=float, default=0.0,
+                        help="Stub cross-encoder seconds per pair")
+    target.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+
+    load = parser.add_argument_group("load")
+    load.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    load.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    load.add_argument("--requests", type=int, default=0, help="Stop after this many requests")
+    load.add_argument("--upload-ratio", type=float, default=0.2,
+                      help="Share of requests that are uploads; the rest are questions")
+    load.add_argument("--files-per-upload", type=int, default=1)
+    load.add_argument("--doc-chars", type=int, default=20_000, help="Size of each uploaded document")
+    load.add_argument("--strategy", default="fixed_size", help="Chunking strategy for uploads")
+    load.add_argument("--seed-uploads", type=int, default=3,
+                      help="Uploads made before the run so questions retrieve something")
+    load.add_argument("--project-id", help="Project to use (default: a new one)")
+    load.add_argument("--timeout", type=float, default=120, help="Per-request timeout")
+    load.add_argument("--seed", type=int, default=42)
+    load.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args)
+        return
+
+    process = None
+    url = args.url.rstrip("/") if args.url else None
+    if url is None:
+        process, url = start_server(args)
+    try:
+        report = asyncio.run(LoadGenerator(args, url).run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print_report(report)
+    if args.json:
+        report["meta"] = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "url": url if args.url else "local",
+            "python": platform.python_version(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("json", "serve")},
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Offline microbenchmarks for chunking, embedding, retrieval and reranking.
+Runs every HybridChunker strategy, ChunkingService.prepare_chunks_for_embedding,
+encode at several batch sizes, vector queries against an in-memory ChromaDB
+collection and cross-encoder reranking on a synthetic corpus. With
+--models stub (the default) no model or tokenizer downloads are needed.
+
+Every result carries median_seconds, so two JSON result files can be compared;
+--compare exits with status 1 when a benchmark got slower than --tolerance.
+
+Usage:
+    python -m backend.benchmarks.microbenchmarks --json results.json
+    python -m backend.benchmarks.microbenchmarks --doc-chars 1000000 --num-vectors 50000
+    python -m backend.benchmarks.microbenchmarks --models real --json real.json
+    python -m backend.benchmarks.microbenchmarks --compare baseline.json --json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.config import Config
+from backend.hybrid_chunking import ChunkingStrategy, HybridChunker
+from backend.services.chunking_service import ChunkingService
+
+WORDS = (
+    "retrieval augmented generation chunk embedding vector index query rerank "
+    "context answer document paragraph sentence token model latency batch cache "
+    "project file upload metadata storage search result score relevance section"
+).split()
+
+
+def synthetic_document(num_chars: int, seed: int = 42) -> str:
+    """Prose with headings and paragraphs, so every strategy finds boundaries."""
+    rng = random.Random(seed)
+    parts: List[str] = []
+    size = 0
+    section = 0
+    while size < num_chars:
+        if section % 8 == 0:
+            parts.append(f"# Section {section // 8 + 1}")
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        parts.append(" ".join(sentences))
+        size += len(parts[-1]) + 2
+        section += 1
+    return "\n\n".join(parts)[:num_chars]
+
+
+def run_timed(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Call fn repeat times; keep the last result and every duration."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return {"result": result, "durations": durations}
+
+
+def summarize(name: str, durations: List[float], items: int, unit: str, **extra) -> Dict[str, Any]:
+    median = statistics.median(durations)
+    return {
+        "name": name,
+        "median_seconds": median,
+        "min_seconds": min(durations),
+        "runs": len(durations),
+        "items": items,
+        "unit": unit,
+        "items_per_second": items / median if median else None,
+        **extra,
+    }
+
+
+def percentile_summary(name: str, latencies: List[float], unit: str, **extra) -> Dict[str, Any]:
+    result = summarize(name, latencies, 1, unit, **extra)
+    result["p95_seconds"] = float(np.percentile(latencies, 95))
+    result["p99_seconds"] = float(np.percentile(latencies, 99))
+    return result
+
+
+def bench_chunking(chunker: HybridChunker, text: str, repeat: int) -> List[Dict[str, Any]]:
+    cases = {
+        "fixed_size": lambda: chunker.fixed_size_chunk(text),
+        "semantic": lambda: chunker.semantic_chunk(text),
+        "structural": lambda: chunker.structural_chunking(text),
+        "fixed_tokens": lambda: chunker.fixed_token_chunk(text),
+        "sliding_window": lambda: chunker.sliding_window_chunking(text),
+        "semantic_similarity": lambda: chunker.semantic_similarity_chunking(text),
+        "hybrid": lambda: chunker.hybrid_chunk(text, [ChunkingStrategy.HYBRID])[
+            ChunkingStrategy.HYBRID
+        ],
+        "hybrid_all_strategies": lambda: sum(
+            len(chunks) for chunks in chunker.hybrid_chunk(text).values()
+        ),
+    }
+    results = []
+    for case, fn in cases.items():
+        timed = run_timed(fn, repeat)
+        output = timed["result"]
+        chunks = output if isinstance(output, int) else len(output)
+        results.append(
+            summarize(f"chunking.{case}", timed["durations"], len(text), "chars", chunks=chunks)
+        )
+    return results
+
+
+def bench_prepare(service: ChunkingService, text: str, repeat: int) -> Dict[str, Any]:
+    chunks = service.chunk_text(
+        text,
+        ChunkingStrategy.FIXED_SIZE,
+        file_metadata={"file_id": "f1", "project_id": "p1", "file_name": "bench.txt"},
+    )
+    timed = run_timed(lambda: service.prepare_chunks_for_embedding(chunks), repeat)
+    return summarize("prepare_chunks_for_embedding", timed["durations"], len(chunks), "chunks")
+
+
+def bench_encode(encoder, texts: List[str], batch_sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for batch_size in batch_sizes:
+        def encode_all():
+            for start in range(0, len(texts), batch_size):
+                encoder.encode(texts[start : start + batch_size])
+
+        timed = run_timed(encode_all, repeat)
+        results.append(
+            summarize(
+                f"encode.batch_{batch_size}",
+                timed["durations"],
+                len(texts),
+                "texts",
+                batch_size=batch_size,
+            )
+        )
+    return results
+
+
+def bench_query(encoder, texts: List[str], num_vectors: int, num_queries: int,
+                n_results: int) -> List[Dict[str, Any]]:
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    collection = client.create_collection(
+        name, metadata=Config.get_collection_metadata(Config.CHROMA_COLLECTION_NAME)
+    )
+    corpus = [texts[i % len(texts)] + f" #{i}" for i in range(num_vectors)]
+    embeddings = encoder.encode(corpus)
+    start = time.perf_counter()
+    for offset in range(0, num_vectors, 5000):
+        end = min(offset + 5000, num_vectors)
+        collection.add(
+            ids=[str(i) for i in range(offset, end)],
+            embeddings=embeddings[offset:end].tolist(),
+            documents=corpus[offset:end],
+            metadatas=[{"project_id": f"p{i % 10}"} for i in range(offset, end)],
+        )
+    build_seconds = time.perf_counter() - start
+
+    queries = encoder.encode([f"question about {t[:60]}" for t in texts[:num_queries]])
+    results = []
+    for case, where in (("vector_query", None), ("vector_query.project_filter", {"project_id": "p3"})):
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            collection.query(
+                query_embeddings=[query.tolist()],
+                n_results=n_results,
+                where=where,
+                include=["documents", "metadatas"],
+            )
+            latencies.append(time.perf_counter() - start)
+        results.append(
+            percentile_summary(
+                case, latencies, "queries", vectors=num_vectors, n_results=n_results
+            )
+        )
+    results.append(summarize("vector_add", [build_seconds], num_vectors, "vectors"))
+    client.delete_collection(name)
+    return results
+
+
+def bench_rerank(cross_encoder, texts: List[str], num_queries: int, candidates: int) -> Dict[str, Any]:
+    latencies = []
+    for i in range(num_queries):
+        question = f"question about {texts[i % len(texts)][:60]}"
+        passages = [texts[(i + j) % len(texts)] for j in range(candidates)]
+        start = time.perf_counter()
+        cross_encoder.predict([[question, passage] for passage in passages])
+        latencies.append(time.perf_counter() - start)
+    return percentile_summary("rerank", latencies, "calls", candidates=candidates)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """Names of benchmarks whose median got slower than baseline by more than tolerance."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for result in results:
+        old = baseline.get(result["name"])
+        if not old or not old["median_seconds"]:
+            continue
+        change = result["median_seconds"] / old["median_seconds"] - 1
+        flag = " REGRESSION" if change > tolerance else ""
+        print(
+            f"{result['name']:<36} {old['median_seconds'] * 1000:>9.2f}ms "
+            f"{result['median_seconds'] * 1000:>9.2f}ms {change:>+7.1%}{flag}"
+        )
+        if flag:
+            regressions.append(result["name"])
+    return regressions
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<36} {'median':>11} {'throughput':>22}")
+    for r in results:
+        rate = f"{r['items_per_second']:,.0f} {r['unit']}/s" if r["items_per_second"] else ""
+        print(f"{r['name']:<36} {r['median_seconds'] * 1000:>9.2f}ms {rate:>22}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline RAG microbenchmarks")
+    parser.add_argument("--models", choices=["stub", "real"], default="stub",
+                        help="stub: no downloads; real: configured tokenizer and models")
+    parser.add_argument("--dim", type=int, default=384, help="Stub embedding dimension")
+    parser.add_argument("--doc-chars", type=int, default=200_000, help="Synthetic document size")
+    parser.add_argument("--num-vectors", type=int, default=10_000)
+    parser.add_argument("--encode-texts", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--n-results", type=int, default=20)
+    parser.add_argument("--rerank-candidates", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before --compare reports a regression")
+    args = parser.parse_args(argv)
+
+    if args.models == "stub":
+        from backend.benchmarks.stubs import (
+            StubBiEncoder,
+            StubCrossEncoder,
+            install_stub_models,
+            stub_tokenizer,
+        )
+
+        install_stub_models(args.dim)
+        encoder, cross_encoder = StubBiEncoder(args.dim), StubCrossEncoder()
+    else:
+        from backend.services.models import get_bi_encoder, get_cross_encoder
+
+        encoder, cross_encoder = get_bi_encoder(), get_cross_encoder()
+
+    service = ChunkingService(Config.DEFAULT_CHUNK_SIZE, Config.DEFAULT_OVERLAP)
+    chunker = HybridChunker(Config.DEFAULT_CHUNK_SIZE, Config.DEFAULT_OVERLAP, encoder=encoder)
+    if args.models == "stub":
+        chunker._tokenizer = service.chunker._tokenizer = stub_tokenizer()
+    service.chunker._encoder = encoder
+
+    text = synthetic_document(args.doc_chars)
+    chunk_texts = [c.text for c in chunker.fixed_size_chunk(text, 500, 50)]
+    while len(chunk_texts) < args.encode_texts:
+        chunk_texts += chunk_texts
+    chunk_texts = chunk_texts[: args.encode_texts]
+
+    results = bench_chunking(chunker, text, args.repeat)
+    results.append(bench_prepare(service, text, args.repeat))
+    results += bench_encode(encoder, chunk_texts, args.batch_sizes, args.repeat)
+    results += bench_query(encoder, chunk_texts, args.num_vectors, args.queries, args.n_results)
+    results.append(bench_rerank(cross_encoder, chunk_texts, args.queries, args.rerank_candidates))
+    chunker.close()
+
+    print_report(results)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "models": args.models,
+            "params": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Scaling benchmark for HybridChunker.sliding_window_chunking.
+Chunks synthetic documents of increasing token counts and reports time per
+token, which stays flat when chunking is linear in document length.
+
+Usage:
+    python -m backend.benchmarks.sliding_window_benchmark
+    python -m backend.benchmarks.sliding_window_benchmark --sizes 250000 1000000 4000000
+    python -m backend.benchmarks.sliding_window_benchmark --verify
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from backend.hybrid_chunking import HybridChunker
+
+WORDS = (
+    "retrieval augmented generation chunk embedding vector index query rerank "
+    "context answer document paragraph sentence token überprüfung café 検索 €"
+).split()
+
+
+def synthetic_text(num_tokens: int, tokenizer, seed: int = 42) -> str:
+    """Random prose trimmed to roughly num_tokens tokens."""
+    rng = random.Random(seed)
+    # Words average a little over one token each; overshoot then trim
+    words = [rng.choice(WORDS) for _ in range(num_tokens)]
+    text = " ".join(words)
+    tokens = tokenizer.encode(text)
+    return tokenizer.decode(tokens[:num_tokens])
+
+
+def verify(chunker: HybridChunker, num_tokens: int = 5000) -> None:
+    """Check offsets against decoding every prefix from the start of the document."""
+    text = synthetic_text(num_tokens, chunker.tokenizer)
+    tokens = chunker.tokenizer.encode(text)
+    for chunk in chunker.sliding_window_chunking(text):
+        i = chunk.metadata.chunk_index * 128
+        window = tokens[i : i + 256]
+        assert chunk.metadata.start_pos == len(chunker.tokenizer.decode(tokens[:i]))
+        assert chunk.metadata.end_pos == len(
+            chunker.tokenizer.decode(tokens[: i + len(window)])
+        )
+        assert chunk.text == chunker.tokenizer.decode(window)
+    print(f"Verified offsets for {len(tokens)} tokens")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sliding-window chunking scaling benchmark")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[125_000, 250_000, 500_000, 1_000_000, 2_000_000],
+        help="Document sizes in tokens",
+    )
+    parser.add_argument("--window-size", type=int, default=256)
+    parser.add_argument("--stride", type=int, default=128)
+    parser.add_argument("--verify", action="store_true", help="Check against prefix decoding first")
+    args = parser.parse_args(argv)
+
+    chunker = HybridChunker()
+    if args.verify:
+        verify(chunker)
+
+    print(f"{'tokens':>10} {'chunks':>8} {'seconds':>9} {'us/token':>9}")
+    for size in args.sizes:
+        text = synthetic_text(size, chunker.tokenizer)
+        start = time.perf_counter()
+        chunks = chunker.sliding_window_chunking(text, args.window_size, args.stride)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>10} {len(chunks):>8} {elapsed:>9.3f} {elapsed / size * 1e6:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
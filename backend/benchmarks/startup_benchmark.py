@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark for the RAG service backend.
+Measures the import time of each backend module (and its heavy dependencies) in
+fresh interpreters, checks that importing the app opens no network connections,
+and times each startup preload and warm-up step.
+
+Usage:
+    python -m backend.benchmarks.startup_benchmark
+    python -m backend.benchmarks.startup_benchmark --repeat 5 --skip-warmup
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(ROOT)
+
+MODULES = [
+    "backend.config",
+    "backend.hybrid_chunking",
+    "backend.services.chunking_service",
+    "backend.services.embedding_pipeline",
+    "backend.main",
+    # Heavy third-party dependencies, for reference
+    "tiktoken",
+    "nltk",
+    "chromadb",
+    "sentence_transformers",
+    "openai",
+]
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+NETWORK_SNIPPET = """
+import socket, sys
+sys.path.insert(0, {root!r})
+attempts = []
+def blocked(self, address, *args, **kwargs):
+    attempts.append(str(address))
+    raise OSError("network access during import")
+socket.socket.connect = blocked
+import backend.main
+print(len(attempts))
+"""
+
+
+def time_import(module: str, repeat: int) -> Optional[float]:
+    """Median seconds to import a module in a fresh interpreter, None if it fails."""
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(root=ROOT, module=module)],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+        )
+        if result.returncode != 0:
+            return None
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def count_import_connections() -> Optional[int]:
+    """Number of socket connections attempted while importing backend.main."""
+    result = subprocess.run(
+        [sys.executable, "-c", NETWORK_SNIPPET.format(root=ROOT)],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    if result.returncode != 0:
+        return None
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def time_warmup() -> Dict[str, Optional[float]]:
+    """Seconds for each startup preload step, None for steps that fail."""
+    from backend.main import PRELOAD_STEPS, WARMUP_STEPS
+
+    timings: Dict[str, Optional[float]] = {}
+    for name, load in PRELOAD_STEPS + WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            load()
+            timings[name] = time.perf_counter() - start
+        except Exception as e:
+            print(f"  {name} failed: {e}")
+            timings[name] = None
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backend cold-start benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-warmup", action="store_true")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict] = {"imports": {}, "warmup": {}}
+    print(f"{'module':<40} {'import s':>9}")
+    for module in MODULES:
+        seconds = time_import(module, args.repeat)
+        results["imports"][module] = seconds
+        shown = f"{seconds:>9.3f}" if seconds is not None else f"{'failed':>9}"
+        print(f"{module:<40} {shown}")
+
+    connections = count_import_connections()
+    results["import_network_connections"] = connections
+    print(f"\nNetwork connections while importing backend.main: {connections}")
+
+    if not args.skip_warmup:
+        print(f"\n{'warm-up step':<40} {'seconds':>9}")
+        results["warmup"] = time_warmup()
+        for name, seconds in results["warmup"].items():
+            shown = f"{seconds:>9.3f}" if seconds is not None else f"{'failed':>9}"
+            print(f"{name:<40} {shown}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Stub models for offline benchmarks and load tests.
+Stand-ins with the same call signatures as the tokenizer, SentenceTransformer,
+CrossEncoder and OpenAI client used by the service, so benchmarks run without
+downloads or API keys. They measure the service's own overhead, plus an
+optional simulated per-item model cost.
+"""
+
+import re
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Sequence
+
+import numpy as np
+import tiktoken
+
+# GPT-2 style pre-tokenization; byte-level vocabulary so no ranks file is needed
+STUB_PAT_STR = r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+
+
+def stub_tokenizer() -> tiktoken.Encoding:
+    """A byte-level tiktoken encoding (about 4x the token count of cl100k_base)."""
+    return tiktoken.Encoding(
+        name="stub_bytes",
+        pat_str=STUB_PAT_STR,
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+
+
+class StubBiEncoder:
+    """Deterministic pseudo-random unit embeddings keyed on the text."""
+
+    def __init__(self, dim: int = 384, seconds_per_text: float = 0.0):
+        self.dim = dim
+        self.seconds_per_text = seconds_per_text
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+            embeddings[i] = rng.standard_normal(self.dim, dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings[0] if single else embeddings
+
+
+class StubCrossEncoder:
+    """Scores (query, passage) pairs by word overlap."""
+
+    def __init__(self, seconds_per_pair: float = 0.0):
+        self.seconds_per_pair = seconds_per_pair
+
+    def predict(self, sentences: Sequence[Sequence[str]], **kwargs) -> np.ndarray:
+        if self.seconds_per_pair:
+            time.sleep(self.seconds_per_pair * len(sentences))
+        scores = []
+        for query, passage in sentences:
+            query_words = set(re.findall(r"\w+", query.lower()))
+            passage_words = set(re.findall(r"\w+", passage.lower()))
+            scores.append(len(query_words & passage_words) / (len(query_words) or 1))
+        return np.asarray(scores, dtype=np.float32)
+
+
+class StubOpenAI:
+    """Answers chat completions with the first context line after a fixed delay."""
+
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages, **kwargs):
+        if self.seconds:
+            time.sleep(self.seconds)
+        prompt = messages[-1]["content"]
+        context = prompt.split("Context:\n", 1)[-1]
+        answer = context.split("\n", 1)[0][:200] or "I don't know."
+        message = SimpleNamespace(role="assistant", content=answer)
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(message=message)])
+
+
+def install_stub_models(dim: int = 384, seconds_per_text: float = 0.0,
+                        seconds_per_pair: float = 0.0) -> None:
+    """Make get_bi_encoder()/get_cross_encoder() return stubs in this process."""
+    from backend.services.models import set_model
+
+    set_model("bi_encoder", StubBiEncoder(dim, seconds_per_text))
+    set_model("cross_encoder", StubCrossEncoder(seconds_per_pair))
+
+
+def install_stub_llm(seconds: float = 0.0) -> None:
+    """Make get_llm_client() return StubOpenAI in this process."""
+    from backend.services.models import set_model
+
+    set_model("llm", StubOpenAI(seconds))
+
+
+def install_stub_tokenizers() -> None:
+    """Give the API's and the ingestion pipeline's chunkers the stub tokenizer."""
+    import backend.main
+    from backend.services.chunking_service import chunking_service
+
+    backend.main.chunker._tokenizer = stub_tokenizer()
+    chunking_service.chunker._tokenizer = stub_tokenizer()
+
+
+def install_stub_conversion() -> None:
+    """Ingest uploaded files as plain UTF-8 text, skipping PDF conversion and extraction."""
+    from backend.services import embedding_pipeline
+
+    def read_text(self, path: str) -> str:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+    embedding_pipeline.convert_to_pdf = lambda path: path
+    embedding_pipeline.EmbeddingPipeline._extract_text_from_pdf = read_text
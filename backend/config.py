@@ -4,19 +4,88 @@ Centralizes all service parameters, model configurations, and chunking settings.
 """
 
 import os
+import json
 from typing import Dict, Any
 
 class Config:
     """Centralized configuration for the RAG service."""
     
     # ChromaDB Configuration
-    CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+    CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db_test")
     CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "documents")
     
+    # Vector store owner process for multi-worker serving (unset = in-process)
+    VECTOR_STORE_ADDRESS = os.getenv("VECTOR_STORE_ADDRESS", "")
+    VECTOR_STORE_AUTHKEY = os.getenv("VECTOR_STORE_AUTHKEY", "")
+    
+    # Vector deletes run in batches; bigger projects are deleted in the background
+    VECTOR_DELETE_BATCH_SIZE = int(os.getenv("VECTOR_DELETE_BATCH_SIZE", "500"))
+    VECTOR_DELETE_BACKGROUND_THRESHOLD = int(
+        os.getenv("VECTOR_DELETE_BACKGROUND_THRESHOLD", "5000")
+    )
+    
+    # HNSW Index Configuration (defaults applied to every collection)
+    HNSW_SPACE = os.getenv("HNSW_SPACE", "cosine")
+    HNSW_M = int(os.getenv("HNSW_M", "16"))
+    HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))
+    HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF", "10"))
+    
+    # Per-collection overrides, e.g. {"documents": {"M": 32, "search_ef": 64}}
+    HNSW_COLLECTION_PARAMS: Dict[str, Dict[str, Any]] = json.loads(
+        os.getenv("HNSW_COLLECTION_PARAMS", "{}")
+    )
+    
+    # Chunks per encode/add call during ingestion (progress is reported per batch)
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    
+    # Request tracing: "memory" (recent traces at /api/traces), "file" or "none"
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "memory").lower()
+    TRACE_MEMORY_SIZE = int(os.getenv("TRACE_MEMORY_SIZE", "100"))
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+    
+    # SQLite log that carries /api/events between worker processes (empty = in-process only)
+    EVENTS_DB = os.getenv("EVENTS_DB", "")
+    
+    # Seconds between event loop lag samples for /metrics (0 disables)
+    EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.25"))
+    
+    # Admission control, per worker process (a concurrency of 0 disables the class)
+    QUERY_CONCURRENCY = int(os.getenv("QUERY_CONCURRENCY", "8"))
+    QUERY_QUEUE_SIZE = int(os.getenv("QUERY_QUEUE_SIZE", "32"))
+    INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "2"))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+    # Requests running across all classes; queries get these slots first (0 = no shared limit)
+    ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "8"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+    # Files of one batch upload processed at the same time
+    UPLOAD_FILE_CONCURRENCY = int(os.getenv("UPLOAD_FILE_CONCURRENCY", "4"))
+    
+    # /api/ask latency budget (0 = none; X-Deadline-Ms overrides per request)
+    ASK_DEADLINE_MS = int(os.getenv("ASK_DEADLINE_MS", "0"))
+    ASK_RERANK_CANDIDATES = int(os.getenv("ASK_RERANK_CANDIDATES", "20"))
+    ASK_MIN_RERANK_CANDIDATES = int(os.getenv("ASK_MIN_RERANK_CANDIDATES", "5"))
+    ASK_CONTEXT_CHUNKS = int(os.getenv("ASK_CONTEXT_CHUNKS", "5"))
+    ASK_REDUCED_CONTEXT_CHUNKS = int(os.getenv("ASK_REDUCED_CONTEXT_CHUNKS", "2"))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    # Concurrent identical questions share one pipeline run
+    ASK_COALESCE = os.getenv("ASK_COALESCE", "true").lower() == "true"
+    
+    # On-demand request profiling (admin endpoints are disabled without ADMIN_TOKEN)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    
+    # Index compaction (rebuild a collection once this share of its index is deleted)
+    COMPACTION_THRESHOLD = float(os.getenv("COMPACTION_THRESHOLD", "0.3"))
+    COMPACTION_INTERVAL_SECONDS = int(os.getenv("COMPACTION_INTERVAL_SECONDS", "3600"))
+    COMPACTION_GRACE_SECONDS = int(os.getenv("COMPACTION_GRACE_SECONDS", "30"))
+    COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "500"))
+    
     # Chunking Configuration
     DEFAULT_CHUNK_SIZE = int(os.getenv("DEFAULT_CHUNK_SIZE", "1000"))
     DEFAULT_OVERLAP = int(os.getenv("DEFAULT_OVERLAP", "200"))
     DEFAULT_STRATEGY = os.getenv("DEFAULT_STRATEGY", "fixed_size")
+    CHUNK_CACHE_MAX_ENTRIES = int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "256"))
     
     # Embedding Model Configuration
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
@@ -38,6 +107,18 @@ class Config:
     
     # API Configuration
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+    SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "0"))  # 0 = one per CPU
+    PRELOAD_ON_STARTUP = os.getenv("PRELOAD_ON_STARTUP", "true").lower() == "true"
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+    # Inference process pool (0 = run models in the web process)
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+    INFERENCE_CPU_AFFINITY = os.getenv("INFERENCE_CPU_AFFINITY", "")  # e.g. "0-3"
+    INFERENCE_START_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_START_TIMEOUT_SECONDS", "300"))
+    INFERENCE_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", "60"))  # per call
+    # Pool shared by backend.serve's workers (unset = pool in this process);
+    # clients authenticate with VECTOR_STORE_AUTHKEY
+    INFERENCE_POOL_ADDRESS = os.getenv("INFERENCE_POOL_ADDRESS", "")
     
     @classmethod
     def get_chunking_config(cls) -> Dict[str, Any]:
@@ -45,7 +126,8 @@ class Config:
         return {
             "default_chunk_size": cls.DEFAULT_CHUNK_SIZE,
             "default_overlap": cls.DEFAULT_OVERLAP,
-            "default_strategy": cls.DEFAULT_STRATEGY
+            "default_strategy": cls.DEFAULT_STRATEGY,
+            "chunk_cache_max_entries": cls.CHUNK_CACHE_MAX_ENTRIES
         }
     
     @classmethod
@@ -72,4 +154,24 @@ class Config:
             "model": cls.OPENAI_MODEL,
             "max_tokens": cls.OPENAI_MAX_TOKENS,
             "temperature": cls.OPENAI_TEMPERATURE
-        } 
\ No newline at end of file
+        }
+    
+    @classmethod
+    def get_hnsw_config(cls, collection_name: str) -> Dict[str, Any]:
+        """Get HNSW index parameters for a collection, with overrides applied."""
+        params = {
+            "space": cls.HNSW_SPACE,
+            "M": cls.HNSW_M,
+            "construction_ef": cls.HNSW_CONSTRUCTION_EF,
+            "search_ef": cls.HNSW_SEARCH_EF,
+        }
+        params.update(cls.HNSW_COLLECTION_PARAMS.get(collection_name, {}))
+        return params
+    
+    @classmethod
+    def get_collection_metadata(cls, collection_name: str) -> Dict[str, Any]:
+        """Get ChromaDB collection metadata carrying the HNSW index parameters."""
+        return {
+            f"hnsw:{key}": value
+            for key, value in cls.get_hnsw_config(collection_name).items()
+        }
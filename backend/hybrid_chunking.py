@@ -1,78 +1,229 @@
 from enum import Enum
 import logging
 import re
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.metrics.pairwise import cosine_similarity
-import nltk
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping, Tuple, Union
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
 import tiktoken
-import hashlib
-import traceback
 
-# Download required NLTK data
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt")
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_punkt_missing = False
+
+
+def sentence_tokenize(text: str) -> List[str]:
+    """
+    Split text into sentences with NLTK's punkt model when it is installed.
+    Falls back to splitting on terminal punctuation instead of downloading it.
+    """
+    global _punkt_missing
+    if not _punkt_missing:
+        try:
+            import nltk
+
+            return nltk.sent_tokenize(text)
+        except (ImportError, LookupError):
+            logger.warning("NLTK punkt data unavailable; using regex sentence splitting")
+            _punkt_missing = True
+    return [s for s in _SENTENCE_END.split(text.strip()) if s]
+
+
+# FIXED_TOKENS defaults: headroom under the bi-encoder's 256-token input limit
+DEFAULT_CHUNK_TOKENS = 200
+DEFAULT_OVERLAP_TOKENS = 40
+
 
 class ChunkingStrategy(str, Enum):
     FIXED_SIZE = "fixed_size"
     SEMANTIC = "semantic"
     HYBRID = "hybrid"
+    FIXED_TOKENS = "fixed_tokens"
+    SEMANTIC_SIMILARITY = "semantic_similarity"
+
+
+@dataclass(slots=True)
+class SourceText:
+    """Document text and file-level metadata, shared by every chunk cut from it."""
+
+    text: str
+    file_id: Optional[str] = None
+    project_id: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class ChunkMetadata:
     chunk_index: int
     start_pos: int
     end_pos: int
     total_chunks: int
-    file_id: Optional[str] = None
-    project_id: Optional[str] = None
-    extra: Dict[str, Any] = field(default_factory=dict)
+    token_count: Optional[int] = None
+    source: Optional[SourceText] = field(default=None, repr=False, compare=False)
+    # This chunk's own copy of the file-level fields, made on its first change
+    _own: Optional[SourceText] = field(default=None, init=False, repr=False, compare=False)
+
+    # File-level fields are read from the shared source. Setting one copies them
+    # for this chunk only (copy-on-write); the shared source and its text are
+    # never modified through a chunk.
+
+    @property
+    def file_id(self) -> Optional[str]:
+        fields = self._own or self.source
+        return fields.file_id if fields else None
+
+    @file_id.setter
+    def file_id(self, value: Optional[str]) -> None:
+        self._own_fields().file_id = value
+
+    @property
+    def project_id(self) -> Optional[str]:
+        fields = self._own or self.source
+        return fields.project_id if fields else None
+
+    @project_id.setter
+    def project_id(self, value: Optional[str]) -> None:
+        self._own_fields().project_id = value
+
+    @property
+    def extra(self) -> Mapping[str, Any]:
+        """Read-only view; assign a new dict to change one chunk's extra metadata."""
+        fields = self._own or self.source
+        return MappingProxyType(fields.extra if fields else {})
+
+    @extra.setter
+    def extra(self, value: Mapping[str, Any]) -> None:
+        self._own_fields().extra = dict(value)
+
+    def _own_fields(self) -> SourceText:
+        if self._own is None:
+            shared = self.source
+            self._own = SourceText(
+                text="",  # never read; chunk text always comes from source
+                file_id=shared.file_id if shared else None,
+                project_id=shared.project_id if shared else None,
+                extra=dict(shared.extra) if shared else {},
+            )
+        return self._own
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chunk_index": self.chunk_index,
+            "start_pos": self.start_pos,
+            "end_pos": self.end_pos,
+            "total_chunks": self.total_chunks,
+            "file_id": self.file_id,
+            "project_id": self.project_id,
+            "token_count": self.token_count,
+            "extra": dict(self.extra),
+        }
 
 
-@dataclass
 class Chunk:
-    text: str
-    metadata: ChunkMetadata
+    """
+    A span of a shared SourceText. The text is sliced from the source on access
+    unless the chunk was created with explicit text (e.g. decoded token windows).
+    """
+
+    __slots__ = ("metadata", "_text")
+
+    def __init__(self, metadata: ChunkMetadata, text: Optional[str] = None):
+        self.metadata = metadata
+        self._text = text
+
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        source = self.metadata.source
+        if source is None:
+            return ""
+        return source.text[self.metadata.start_pos : self.metadata.end_pos]
+
+    def __repr__(self) -> str:
+        return f"Chunk(text={self.text!r}, metadata={self.metadata!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return self.text == other.text and self.metadata == other.metadata
+
+
+TextSource = Union[str, SourceText]
 
 
 class HybridChunker:
-    def __init__(self, default_chunk_size: int = 1000, overlap: int = 200):
+    def __init__(
+        self,
+        default_chunk_size: int = 1000,
+        overlap: int = 200,
+        encoder=None,
+        max_workers: int = 1,
+    ):
         self.default_chunk_size = default_chunk_size
         self.overlap = overlap
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        self._tokenizer = None
+        self._encoder = encoder
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_size = 0
+
+    @property
+    def tokenizer(self):
+        """cl100k_base tokenizer, loaded on first use (it may need a download)."""
+        if self._tokenizer is None:
+            self._tokenizer = tiktoken.get_encoding("cl100k_base")
+        return self._tokenizer
+
+    @property
+    def encoder(self):
+        """Sentence embedding model, defaulting to the shared bi-encoder."""
+        if self._encoder is None:
+            from backend.services.models import get_bi_encoder
+
+            self._encoder = get_bi_encoder()
+        return self._encoder
+
+    @staticmethod
+    def _as_source(text: TextSource) -> SourceText:
+        return text if isinstance(text, SourceText) else SourceText(text=text)
 
     def fixed_size_chunk(
-        self, text: str, chunk_size: int = 0, overlap: int = 0
+        self, text: TextSource, chunk_size: int = 0, overlap: Optional[int] = None
+    ) -> List[Chunk]:
+        source = self._as_source(text)
+        return self._fixed_size_span_chunks(
+            source, 0, len(source.text), chunk_size, overlap
+        )
+
+    def _fixed_size_span_chunks(
+        self,
+        source: SourceText,
+        span_start: int,
+        span_end: int,
+        chunk_size: int = 0,
+        overlap: Optional[int] = None,
     ) -> List[Chunk]:
         chunk_size = chunk_size or self.default_chunk_size
-        overlap = overlap or self.overlap
+        overlap = overlap if overlap is not None else self.overlap
         chunks = []
-        start = 0
-        end = 0
-        text_length = len(text)
+        start = span_start
+        end = span_start
+        text_length = span_end
         chunk_index = 0
         while start < text_length:
             end = min(start + chunk_size, text_length)
-            chunk_text = text[start:end]
             chunks.append(
                 Chunk(
-                    text=chunk_text,
                     metadata=ChunkMetadata(
                         chunk_index=chunk_index,
                         start_pos=start,
                         end_pos=end,
                         total_chunks=0,  # will update later
+                        source=source,
                     ),
                 )
             )
@@ -84,7 +235,80 @@ class HybridChunker:
             c.metadata.total_chunks = total
         return chunks
 
-    def semantic_chunk(self, text: str) -> List[Chunk]:
+    def fixed_token_chunk(
+        self,
+        text: TextSource,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    ) -> List[Chunk]:
+        """
+        Fixed-size chunking measured in tokens rather than characters.
+
+        The text is encoded once and sliced into windows of chunk_tokens tokens
+        that overlap by overlap_tokens. The default leaves headroom under the
+        bi-encoder's 256-token input limit.
+        """
+        source = self._as_source(text)
+        tokens = self.tokenizer.encode_ordinary(source.text)
+        return self._token_window_chunks(source, tokens, chunk_tokens, overlap_tokens)
+
+    def fixed_token_chunk_batch(
+        self,
+        texts: List[str],
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    ) -> List[List[Chunk]]:
+        """Token-based fixed-size chunking of many texts with one batched encode."""
+        token_lists = self.tokenizer.encode_ordinary_batch(texts)
+        return [
+            self._token_window_chunks(
+                SourceText(text=text), tokens, chunk_tokens, overlap_tokens
+            )
+            for text, tokens in zip(texts, token_lists)
+        ]
+
+    def _token_window_chunks(
+        self,
+        source: SourceText,
+        tokens: List[int],
+        chunk_tokens: int,
+        overlap_tokens: int,
+    ) -> List[Chunk]:
+        if chunk_tokens <= 0:
+            raise ValueError("chunk_tokens must be positive")
+        step = (
+            chunk_tokens - overlap_tokens
+            if chunk_tokens > overlap_tokens
+            else chunk_tokens
+        )
+        offsets = self._token_char_offsets(tokens)
+        chunks = []
+        for start in range(0, len(tokens), step):
+            end = min(start + chunk_tokens, len(tokens))
+            start_pos = int(offsets[start])
+            end_pos = int(offsets[end])
+            chunks.append(
+                Chunk(
+                    metadata=ChunkMetadata(
+                        chunk_index=len(chunks),
+                        start_pos=start_pos,
+                        end_pos=end_pos,
+                        total_chunks=0,  # will update later
+                        token_count=end - start,
+                        source=source,
+                    ),
+                )
+            )
+            if end == len(tokens):
+                break
+        total = len(chunks)
+        for c in chunks:
+            c.metadata.total_chunks = total
+        return chunks
+
+    def semantic_chunk(self, text: TextSource) -> List[Chunk]:
+        source = self._as_source(text)
+        text = source.text
         # Split by paragraphs or sentences for semantic boundaries
         paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
         chunks = []
@@ -94,12 +318,12 @@ class HybridChunker:
             end = start + len(para)
             chunks.append(
                 Chunk(
-                    text=para,
                     metadata=ChunkMetadata(
                         chunk_index=idx,
                         start_pos=start,
                         end_pos=end,
                         total_chunks=0,  # will update later
+                        source=source,
                     ),
                 )
             )
@@ -109,10 +333,12 @@ class HybridChunker:
             c.metadata.total_chunks = total
         return chunks
 
-    def structural_chunking(self, text: str) -> List[Chunk]:
+    def structural_chunking(self, text: TextSource) -> List[Chunk]:
         """
         Chunking based on document structure (headers, paragraphs, etc.)
         """
+        source = self._as_source(text)
+        text = source.text
         chunks = []
 
         # Split by double newlines (paragraphs)
@@ -140,20 +366,44 @@ class HybridChunker:
                 start_pos=start_pos,
                 end_pos=end_pos,
                 total_chunks=0,  # will update later if needed
+                source=source,
             )
 
-            chunks.append(Chunk(text=paragraph, metadata=metadata))
+            chunks.append(Chunk(metadata=metadata))
             current_position = end_pos
 
         return chunks
 
+    def _token_char_offsets(self, tokens: List[int]) -> np.ndarray:
+        """
+        Character offset of every token boundary, decoding each token once.
+
+        offsets[i] equals len(self.tokenizer.decode(tokens[:i])). A prefix that
+        ends inside a multi-byte character decodes to one replacement character,
+        so the decoded length is the number of UTF-8 lead bytes in the prefix.
+        """
+        token_bytes = self.tokenizer.decode_tokens_bytes(tokens)
+        byte_lengths = np.fromiter(
+            (len(b) for b in token_bytes), dtype=np.int64, count=len(token_bytes)
+        )
+        byte_offsets = np.zeros(len(token_bytes) + 1, dtype=np.int64)
+        np.cumsum(byte_lengths, out=byte_offsets[1:])
+
+        raw = np.frombuffer(b"".join(token_bytes), dtype=np.uint8)
+        lead_counts = np.zeros(len(raw) + 1, dtype=np.int64)
+        np.cumsum((raw & 0xC0) != 0x80, out=lead_counts[1:])
+        return lead_counts[byte_offsets]
+
     def sliding_window_chunking(
-        self, text: str, window_size: int = 256, stride: int = 128
+        self, text: TextSource, window_size: int = 256, stride: int = 128
     ) -> List[Chunk]:
         """
         Sliding window chunking with configurable stride
         """
+        source = self._as_source(text)
+        text = source.text
         tokens = self.tokenizer.encode(text)
+        offsets = self._token_char_offsets(tokens)
         chunks = []
 
         for i in range(0, len(tokens), stride):
@@ -164,84 +414,186 @@ class HybridChunker:
             chunk_text = self.tokenizer.decode(window_tokens)
 
             # Calculate positions
-            start_pos = len(self.tokenizer.decode(tokens[:i]))
-            end_pos = len(self.tokenizer.decode(tokens[: i + len(window_tokens)]))
+            start_pos = int(offsets[i])
+            end_pos = int(offsets[i + len(window_tokens)])
 
             metadata = ChunkMetadata(
                 chunk_index=i // stride,
                 start_pos=start_pos,
                 end_pos=end_pos,
                 total_chunks=0,  # will update later if needed
+                source=source,
             )
 
-            chunks.append(Chunk(text=chunk_text, metadata=metadata))
+            # Decoded windows can differ from the source slice at split characters
+            chunks.append(Chunk(metadata=metadata, text=chunk_text))
 
         total = len(chunks)
         for c in chunks:
             c.metadata.total_chunks = total
         return chunks
 
-    def topic_based_chunking(
-        self, text: str, num_topics: int = 5, min_chunk_size: int = 200
+    def semantic_similarity_chunking(
+        self,
+        text: TextSource,
+        min_tokens: int = 64,
+        max_tokens: int = 256,
+        breakpoint_percentile: float = 25.0,
+        batch_size: int = 64,
     ) -> List[Chunk]:
         """
-        Topic-based chunking using sentence embeddings and clustering
-        """
-        sentences = nltk.sent_tokenize(text)
-        if len(sentences) < num_topics:
-            # Fallback to semantic_chunk if not enough sentences
-            return self.semantic_chunk(text)
-
-        # Remove sentence_transformer usage, fallback to random clustering for demo
-        # embeddings = self.sentence_transformer.encode(sentences)
-        # For demonstration, use sentence indices as fake embeddings
-        embeddings = np.array([[i] for i in range(len(sentences))])
-
-        # Cluster sentences
-        kmeans = KMeans(n_clusters=min(num_topics, len(sentences)), random_state=42)
-        clusters = kmeans.fit_predict(embeddings)
-
-        # Group sentences by cluster
-        clustered_sentences = {}
-        for i, cluster_id in enumerate(clusters):
-            if cluster_id not in clustered_sentences:
-                clustered_sentences[cluster_id] = []
-            clustered_sentences[cluster_id].append((i, sentences[i]))
-
-        chunks = []
-        for cluster_id, sentence_list in clustered_sentences.items():
-            # Sort by original order
-            sentence_list.sort(key=lambda x: x[0])
-            cluster_text = " ".join([s[1] for s in sentence_list])
+        Split text where the similarity between adjacent sentence embeddings dips.
 
-            if len(cluster_text) < min_chunk_size:
+        Sentences are encoded in batches with the bi-encoder. A boundary is placed
+        after a sentence when its similarity to the next one falls at or below the
+        given percentile and the chunk has reached min_tokens, or when adding the
+        next sentence would exceed max_tokens. A sentence longer than max_tokens is
+        first cut into max_tokens windows, so no chunk exceeds max_tokens.
+        """
+        source = self._as_source(text)
+        text = source.text
+        sentences = sentence_tokenize(text)
+        if not sentences:
+            return []
+
+        # Locate sentences in the original text so chunks keep its spacing;
+        # ordinary encoding treats "<|endoftext|>" in user text as plain text
+        units, spans, token_counts = [], [], []
+        pos = 0
+        for sentence, tokens in zip(sentences, self.tokenizer.encode_ordinary_batch(sentences)):
+            start = text.find(sentence, pos)
+            if start == -1:
+                start = pos
+            end = start + len(sentence)
+            pos = end
+            if len(tokens) <= max_tokens:
+                units.append(sentence)
+                spans.append((start, end))
+                token_counts.append(len(tokens))
                 continue
+            offsets = self._token_char_offsets(tokens)
+            for i in range(0, len(tokens), max_tokens):
+                j = min(i + max_tokens, len(tokens))
+                piece_start, piece_end = start + int(offsets[i]), start + int(offsets[j])
+                units.append(text[piece_start:piece_end])
+                spans.append((piece_start, piece_end))
+                token_counts.append(j - i)
+        sentences = units
+
+        if len(sentences) > 1:
+            embeddings = np.asarray(
+                self.encoder.encode(
+                    sentences,
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                )
+            )
+            # similarities[i] compares sentence i with sentence i + 1
+            similarities = np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+            threshold = np.percentile(similarities, breakpoint_percentile)
+            # Never treat the most similar pairs as dips, e.g. when most values tie
+            is_dip = (similarities <= threshold) & (similarities < similarities.max())
+        else:
+            is_dip = np.zeros(0, dtype=bool)
+
+        groups = []
+        group_start = 0
+        group_tokens = 0
+        for i, count in enumerate(token_counts):
+            group_tokens += count
+            if i == len(sentences) - 1:
+                break
+            split_at_dip = is_dip[i] and group_tokens >= min_tokens
+            too_large = group_tokens + token_counts[i + 1] > max_tokens
+            if split_at_dip or too_large:
+                groups.append((group_start, i, group_tokens))
+                group_start = i + 1
+                group_tokens = 0
+        groups.append((group_start, len(sentences) - 1, group_tokens))
 
-            # Calculate approximate position
-            first_sentence_idx = sentence_list[0][0]
-            approx_start = sum(len(s) for s in sentences[:first_sentence_idx])
-
+        chunks = []
+        for idx, (first, last, _) in enumerate(groups):
+            start_pos = spans[first][0]
+            end_pos = spans[last][1]
             metadata = ChunkMetadata(
-                chunk_index=cluster_id,
-                start_pos=approx_start,
-                end_pos=approx_start + len(cluster_text),
-                total_chunks=0,  # will update later if needed
+                chunk_index=idx,
+                start_pos=start_pos,
+                end_pos=end_pos,
+                total_chunks=len(groups),
+                source=source,
+            )
+            chunks.append(Chunk(metadata=metadata))
+        return chunks
+
+    def _strategy_call(
+        self, strategy: ChunkingStrategy, custom_params: Dict[str, Dict]
+    ) -> Optional[Tuple[str, tuple]]:
+        """Method name and arguments that run a single (non-hybrid) strategy."""
+        params = custom_params.get(strategy.value, {})
+        if strategy == ChunkingStrategy.FIXED_SIZE:
+            chunk_size = params.get("chunk_size", self.default_chunk_size)
+            overlap = params.get("overlap", self.overlap)
+            return "fixed_size_chunk", (chunk_size, overlap)
+        if strategy == ChunkingStrategy.SEMANTIC:
+            return "semantic_chunk", ()
+        if strategy == ChunkingStrategy.FIXED_TOKENS:
+            overlap_tokens = params.get("overlap_tokens")
+            return "fixed_token_chunk", (
+                params.get("chunk_tokens") or DEFAULT_CHUNK_TOKENS,
+                overlap_tokens if overlap_tokens is not None else DEFAULT_OVERLAP_TOKENS,
+            )
+        if strategy == ChunkingStrategy.SEMANTIC_SIMILARITY:
+            return "semantic_similarity_chunking", (
+                params.get("min_tokens", 64),
+                params.get("max_tokens", 256),
+                params.get("breakpoint_percentile", 25.0),
             )
+        return None
 
-            chunk = Chunk(text=cluster_text, metadata=metadata)
-            # Remove chunk.embedding assignment
-            chunks.append(chunk)
+    def _hybrid_plan(
+        self, source: SourceText, custom_params: Dict[str, Dict]
+    ) -> Tuple[List[Chunk], List[Optional[tuple]]]:
+        """
+        Paragraph chunks for the HYBRID strategy, plus for each paragraph the
+        _fixed_size_span_chunks arguments when it is too large to keep whole.
+        """
+        chunk_size = custom_params.get("hybrid", {}).get(
+            "chunk_size", self.default_chunk_size
+        )
+        overlap = custom_params.get("hybrid", {}).get("overlap", self.overlap)
+        semantic_chunks = self.semantic_chunk(source)
+        splits = []
+        for chunk in semantic_chunks:
+            start, end = chunk.metadata.start_pos, chunk.metadata.end_pos
+            if end - start > chunk_size * 1.5:
+                splits.append((start, end, chunk_size, overlap))
+            else:
+                splits.append(None)
+        return semantic_chunks, splits
 
-        total = len(chunks)
-        for c in chunks:
+    @staticmethod
+    def _merge_hybrid(
+        semantic_chunks: List[Chunk], sub_chunks: List[Optional[List[Chunk]]]
+    ) -> List[Chunk]:
+        hybrid_chunks = []
+        for chunk, split in zip(semantic_chunks, sub_chunks):
+            if split is None:
+                hybrid_chunks.append(chunk)
+            else:
+                hybrid_chunks.extend(split)
+        # Update total_chunks
+        total = len(hybrid_chunks)
+        for c in hybrid_chunks:
             c.metadata.total_chunks = total
-        return chunks
+        return hybrid_chunks
 
     def hybrid_chunk(
         self,
-        text: str,
+        text: TextSource,
         strategies: Optional[List[ChunkingStrategy]] = None,
         custom_params: Optional[Dict[str, Dict]] = None,
+        max_workers: Optional[int] = None,
     ) -> Dict[ChunkingStrategy, List[Chunk]]:
         """
         Apply multiple chunking strategies to the same text
@@ -250,6 +602,8 @@ class HybridChunker:
             text: Input text to chunk
             strategies: List of strategies to apply
             custom_params: Custom parameters for each strategy
+            max_workers: Run strategies and HYBRID sub-chunking in a process
+                pool of this size (defaults to the chunker's max_workers)
 
         Returns:
             Dictionary mapping strategies to their chunks
@@ -264,37 +618,354 @@ class HybridChunker:
         if custom_params is None:
             custom_params = {}
 
+        # All strategies share one source so chunks never copy the text
+        source = self._as_source(text)
+
+        max_workers = max_workers or self.max_workers
+        if max_workers > 1:
+            return self._parallel_hybrid_chunk(
+                source, strategies, custom_params, max_workers
+            )
+
         results = {}
         for strategy in strategies:
-            if strategy == ChunkingStrategy.FIXED_SIZE:
-                chunk_size = custom_params.get("fixed_size", {}).get(
-                    "chunk_size", self.default_chunk_size
-                )
-                overlap = custom_params.get("fixed_size", {}).get(
-                    "overlap", self.overlap
-                )
-                results[strategy] = self.fixed_size_chunk(text, chunk_size, overlap)
-            elif strategy == ChunkingStrategy.SEMANTIC:
-                results[strategy] = self.semantic_chunk(text)
-            elif strategy == ChunkingStrategy.HYBRID:
-                chunk_size = custom_params.get("hybrid", {}).get(
-                    "chunk_size", self.default_chunk_size
-                )
-                overlap = custom_params.get("hybrid", {}).get("overlap", self.overlap)
-                semantic_chunks = self.semantic_chunk(text)
-                hybrid_chunks = []
-                for chunk in semantic_chunks:
-                    if len(chunk.text) > chunk_size * 1.5:
-                        hybrid_chunks.extend(
-                            self.fixed_size_chunk(chunk.text, chunk_size, overlap)
-                        )
-                    else:
-                        hybrid_chunks.append(chunk)
-                # Update total_chunks
-                total = len(hybrid_chunks)
-                for c in hybrid_chunks:
-                    c.metadata.total_chunks = total
-                results[strategy] = hybrid_chunks
-            else:
+            if strategy == ChunkingStrategy.HYBRID:
+                semantic_chunks, splits = self._hybrid_plan(source, custom_params)
+                sub_chunks = [
+                    None if split is None
+                    else self._fixed_size_span_chunks(source, *split)
+                    for split in splits
+                ]
+                results[strategy] = self._merge_hybrid(semantic_chunks, sub_chunks)
+                continue
+            call = self._strategy_call(strategy, custom_params)
+            if call is None:
                 results[strategy] = []
+            else:
+                method, args = call
+                results[strategy] = getattr(self, method)(source, *args)
         return results
+
+    def _get_pool(self, max_workers: int) -> ProcessPoolExecutor:
+        if self._pool is None or self._pool_size != max_workers:
+            self.close()
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_chunking_worker,
+                initargs=(self.default_chunk_size, self.overlap),
+            )
+            self._pool_size = max_workers
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the chunking process pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_size = 0
+
+    def _parallel_hybrid_chunk(
+        self,
+        source: SourceText,
+        strategies: List[ChunkingStrategy],
+        custom_params: Dict[str, Dict],
+        max_workers: int,
+    ) -> Dict[ChunkingStrategy, List[Chunk]]:
+        """
+        Process-pool version of hybrid_chunk with identical results.
+
+        The source text is written once to shared memory; workers decode it once
+        per document and return chunk spans, which are rebuilt here against the
+        caller's SourceText. Semantic similarity chunking stays in this process
+        because it needs the bi-encoder.
+        """
+        pool = self._get_pool(max_workers)
+        data = source.text.encode("utf-8")
+        shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+        try:
+            shm.buf[: len(data)] = data
+
+            def submit(method: str, args: tuple) -> Future:
+                return pool.submit(
+                    _run_chunking_task, shm.name, len(data), method, args
+                )
+
+            pending: Dict[ChunkingStrategy, Any] = {}
+            local: List[Tuple[ChunkingStrategy, str, tuple]] = []
+            for strategy in strategies:
+                if strategy == ChunkingStrategy.HYBRID:
+                    semantic_chunks, splits = self._hybrid_plan(source, custom_params)
+                    futures = [
+                        None if split is None
+                        else submit("_fixed_size_span_chunks", split)
+                        for split in splits
+                    ]
+                    pending[strategy] = (semantic_chunks, futures)
+                    continue
+                call = self._strategy_call(strategy, custom_params)
+                if call is None:
+                    pending[strategy] = []
+                elif strategy == ChunkingStrategy.SEMANTIC_SIMILARITY:
+                    local.append((strategy, *call))
+                else:
+                    pending[strategy] = submit(*call)
+
+            # Run in-process work while the pool is busy
+            local_results = {
+                strategy: getattr(self, method)(source, *args)
+                for strategy, method, args in local
+            }
+
+            results = {}
+            for strategy in strategies:
+                if strategy in local_results:
+                    results[strategy] = local_results[strategy]
+                    continue
+                item = pending[strategy]
+                if strategy == ChunkingStrategy.HYBRID:
+                    semantic_chunks, futures = item
+                    sub_chunks = [
+                        None if future is None
+                        else _unpack_chunks(future.result(), source)
+                        for future in futures
+                    ]
+                    results[strategy] = self._merge_hybrid(semantic_chunks, sub_chunks)
+                elif isinstance(item, Future):
+                    results[strategy] = _unpack_chunks(item.result(), source)
+                else:
+                    results[strategy] = item
+            return results
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+class StreamingChunker:
+    """
+    Incremental chunking of text that arrives in pieces.
+
+    feed() returns the chunks that are final given the text received so far and
+    finish() flushes the rest. FIXED_SIZE windows match fixed_size_chunk exactly.
+    Other strategies run on segments of roughly segment_size characters cut at
+    paragraph breaks, so paragraph-based strategies match the whole-document
+    result. Chunks are numbered across the stream; total_chunks is only known
+    once finish() returns, as total_chunks on this object.
+    """
+
+    def __init__(
+        self,
+        chunker: HybridChunker,
+        strategy: ChunkingStrategy = ChunkingStrategy.FIXED_SIZE,
+        custom_params: Optional[Dict[str, Dict]] = None,
+        segment_size: int = 64 * 1024,
+    ):
+        self.chunker = chunker
+        self.strategy = strategy
+        self.custom_params = custom_params or {}
+        self.segment_size = segment_size
+        # Holds file-level metadata; chunk text is materialized per chunk
+        self.source = SourceText(text="")
+        self.total_chunks = 0
+        self._buffer = ""
+        self._buffer_start = 0  # document offset of _buffer[0]
+        self._next_start = 0  # FIXED_SIZE: document offset of the next window
+        # Other strategies: _buffer[:_scan_from] has been scanned for cut points
+        self._scan_from = 0
+        self._last_break: Optional[int] = None
+        self._last_space: Optional[int] = None
+
+    def feed(self, text: str) -> List[Chunk]:
+        self._buffer += text
+        if self.strategy == ChunkingStrategy.FIXED_SIZE:
+            return self._drain_fixed(final=False)
+        return self._drain_segments(final=False)
+
+    def finish(self) -> List[Chunk]:
+        if self.strategy == ChunkingStrategy.FIXED_SIZE:
+            return self._drain_fixed(final=True)
+        return self._drain_segments(final=True)
+
+    def _make_chunk(
+        self,
+        start_pos: int,
+        end_pos: int,
+        text: str,
+        token_count: Optional[int] = None,
+    ) -> Chunk:
+        chunk = Chunk(
+            metadata=ChunkMetadata(
+                chunk_index=self.total_chunks,
+                start_pos=start_pos,
+                end_pos=end_pos,
+                total_chunks=0,  # unknown until the stream ends
+                token_count=token_count,
+                source=self.source,
+            ),
+            text=text,
+        )
+        self.total_chunks += 1
+        return chunk
+
+    def _drain_fixed(self, final: bool) -> List[Chunk]:
+        params = self.custom_params.get(self.strategy.value, {})
+        chunk_size = params.get("chunk_size") or self.chunker.default_chunk_size
+        overlap = params.get("overlap")
+        if overlap is None:
+            overlap = self.chunker.overlap
+        data_end = self._buffer_start + len(self._buffer)
+        chunks = []
+        while self._next_start < data_end:
+            start = self._next_start
+            end = start + chunk_size
+            if end > data_end:
+                if not final:
+                    break  # wait for more text to fill the window
+                end = data_end
+            local = start - self._buffer_start
+            chunks.append(
+                self._make_chunk(start, end, self._buffer[local : local + end - start])
+            )
+            self._next_start = end - overlap if end - overlap > start else end
+        # Drop text that no future window can reach
+        drop = self._next_start - self._buffer_start
+        self._buffer = self._buffer[drop:]
+        self._buffer_start = self._next_start
+        return chunks
+
+    def _segment_cut(self) -> Optional[int]:
+        """
+        Start of the last paragraph break that is followed by more text.
+
+        Only text added since the last call is scanned. Without a paragraph
+        break for more than 4 * segment_size characters, cuts at the last line
+        break or space instead, or at segment_size if there is neither.
+        """
+        buffer = self._buffer
+        for match in _PARAGRAPH_BREAK.finditer(buffer, self._scan_from):
+            if match.end() < len(buffer) and match.start() > 0:
+                self._last_break = match.start()
+        space = max(buffer.rfind("\n", self._scan_from), buffer.rfind(" ", self._scan_from))
+        if space > 0:
+            self._last_space = space
+        # A break can run across the end of the text received so far, so the
+        # trailing whitespace is scanned again next time
+        scan_from = len(buffer)
+        while scan_from > self._scan_from and buffer[scan_from - 1].isspace():
+            scan_from -= 1
+        self._scan_from = scan_from
+
+        if self._last_break is not None:
+            return self._last_break
+        if len(buffer) > 4 * self.segment_size:
+            # No paragraph break for a long stretch; fall back to a line or
+            # space, and never let the buffer grow without bound
+            return self._last_space if self._last_space is not None else self.segment_size
+        return None
+
+    def _drain_segments(self, final: bool) -> List[Chunk]:
+        chunks = []
+        while True:
+            if final:
+                cut = len(self._buffer)
+            elif len(self._buffer) < self.segment_size:
+                break
+            else:
+                cut = self._segment_cut()
+                if cut is None:
+                    break
+            chunks.extend(self._chunk_segment(cut))
+            if final:
+                break
+        return chunks
+
+    def _chunk_segment(self, cut: int) -> List[Chunk]:
+        """Chunk _buffer[:cut] and drop it from the buffer."""
+        segment = self._buffer[:cut]
+        chunks = []
+        if segment.strip():
+            results = self.chunker.hybrid_chunk(
+                segment, strategies=[self.strategy], custom_params=self.custom_params
+            )
+            for chunk in results.get(self.strategy, []):
+                chunks.append(
+                    self._make_chunk(
+                        self._buffer_start + chunk.metadata.start_pos,
+                        self._buffer_start + chunk.metadata.end_pos,
+                        chunk.text,
+                        chunk.metadata.token_count,
+                    )
+                )
+        self._buffer = self._buffer[cut:]
+        self._buffer_start += cut
+        # Cut points found so far are either consumed or move with the buffer
+        self._scan_from = max(self._scan_from - cut, 0)
+        self._last_break = None
+        self._last_space = (
+            self._last_space - cut
+            if self._last_space is not None and self._last_space > cut
+            else None
+        )
+        return chunks
+
+
+# Process-pool workers for HybridChunker.hybrid_chunk. Chunks cross the process
+# boundary as plain span tuples so the source text is never pickled.
+
+_worker_chunker: Optional[HybridChunker] = None
+_worker_source: Tuple[str, str] = ("", "")
+
+
+def _init_chunking_worker(default_chunk_size: int, overlap: int) -> None:
+    global _worker_chunker
+    _worker_chunker = HybridChunker(default_chunk_size, overlap)
+
+
+def _worker_source_text(shm_name: str, size: int) -> str:
+    """Decode the shared source text, once per document per worker."""
+    global _worker_source
+    if _worker_source[0] != shm_name:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            text = bytes(shm.buf[:size]).decode("utf-8")
+        finally:
+            shm.close()
+        _worker_source = (shm_name, text)
+    return _worker_source[1]
+
+
+def _run_chunking_task(
+    shm_name: str, size: int, method: str, args: tuple
+) -> List[tuple]:
+    source = SourceText(text=_worker_source_text(shm_name, size))
+    chunks = getattr(_worker_chunker, method)(source, *args)
+    return [
+        (
+            c.metadata.chunk_index,
+            c.metadata.start_pos,
+            c.metadata.end_pos,
+            c.metadata.total_chunks,
+            c.metadata.token_count,
+            c._text,
+        )
+        for c in chunks
+    ]
+
+
+def _unpack_chunks(spans: List[tuple], source: SourceText) -> List[Chunk]:
+    return [
+        Chunk(
+            metadata=ChunkMetadata(
+                chunk_index=chunk_index,
+                start_pos=start_pos,
+                end_pos=end_pos,
+                total_chunks=total_chunks,
+                token_count=token_count,
+                source=source,
+            ),
+            text=text,
+        )
+        for chunk_index, start_pos, end_pos, total_chunks, token_count, text in spans
+    ]
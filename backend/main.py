@@ -2,29 +2,174 @@ import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import BackgroundTasks, Depends, FastAPI, UploadFile, File, Form, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List
 import uvicorn
 import os
 from typing import Optional
 from enum import Enum
 
-from backend.hybrid_chunking import HybridChunker, ChunkingStrategy
+from backend.hybrid_chunking import (
+    DEFAULT_CHUNK_TOKENS,
+    DEFAULT_OVERLAP_TOKENS,
+    ChunkingStrategy,
+    HybridChunker,
+    StreamingChunker,
+)
 
 # === Add missing imports ===
-from sentence_transformers import SentenceTransformer, CrossEncoder
-import chromadb
-import pdfplumber
+# Heavy dependencies (sentence-transformers, chromadb, openai) are imported on
+# first use through backend.services so the app starts serving immediately.
 import asyncio
-import openai
-
+import codecs
+import hashlib
+import hmac
+import json
+import logging
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from backend.config import Config
 from backend.file_conversion import convert_to_pdf
 from backend.metadata_store import add_file, update_file_status
+from backend.services.admission import AdmissionMiddleware, admission_controller
+from backend.services.cache import LRUCache
+from backend.services.coalescing import ask_coalescer, normalize_question
+from backend.services.deadline import (
+    CONTEXT_REDUCED,
+    DEGRADATIONS,
+    LLM_TIMEOUT,
+    REDUCED_LLM_COST,
+    RERANK_REDUCED,
+    RERANK_SKIPPED,
+    RETRIEVAL_ONLY,
+    Deadline,
+    llm_plan,
+    request_deadline,
+    rerank_budget,
+    stage_estimates,
+)
+from backend.services.events import event_broadcaster, format_sse
+from backend.services.metrics import (
+    BATCH_SIZE,
+    IN_FLIGHT,
+    QUEUE_DEPTH,
+    metrics,
+    monitor_event_loop_lag,
+    observe_cache,
+    track_stage,
+)
+from backend.services import tracing
+from backend.services.tracing import span, start_trace, timings_requested
+from backend.services import profiling
+from backend.services.profiling import ProfilingMiddleware, request_profiler
+from backend.services.models import get_bi_encoder, get_cross_encoder, get_llm_client
+from backend.services.readiness import readiness
+from backend.services.vector_store import delete_chunks, find_chunk_ids, get_collection
+
+logger = logging.getLogger(__name__)
+
+chunker = HybridChunker()
+chunk_cache = LRUCache(Config.CHUNK_CACHE_MAX_ENTRIES)
+
+
+PRELOAD_STEPS = [
+    ("tokenizer", lambda: chunker.tokenizer),
+    ("bi_encoder", get_bi_encoder),
+    ("cross_encoder", get_cross_encoder),
+    ("vector_store", get_collection),
+]
+
+WARMUP_TEXTS = [
+    "What is this document about?",
+    "Retrieval-augmented generation combines a vector search over document "
+    "chunks with a language model that answers from the retrieved context.",
+]
+
+
+def warm_up_tokenizer():
+    chunker.tokenizer.encode_batch(WARMUP_TEXTS)
+
+
+def warm_up_encode():
+    get_bi_encoder().encode(WARMUP_TEXTS)
+
+
+def warm_up_rerank():
+    get_cross_encoder().predict([[WARMUP_TEXTS[0], text] for text in WARMUP_TEXTS])
+
+
+def warm_up_query():
+    # The first query loads the HNSW index from disk
+    collection = get_collection()
+    if collection.count() > 0:
+        embedding = get_bi_encoder().encode([WARMUP_TEXTS[0]])[0]
+        collection.query(query_embeddings=[embedding], n_results=1, include=[])
+
+
+WARMUP_STEPS = [
+    ("warmup_tokenizer", warm_up_tokenizer),
+    ("warmup_encode", warm_up_encode),
+    ("warmup_rerank", warm_up_rerank),
+    ("warmup_query", warm_up_query),
+]
+
 
-app = FastAPI()
+def startup_steps():
+    """Preload steps, followed by synthetic warm-up calls when enabled."""
+    return PRELOAD_STEPS + (WARMUP_STEPS if Config.WARMUP_ON_STARTUP else [])
 
+
+def load_dependencies():
+    """Load models, tokenizer and the vector store, recording readiness."""
+    total_start = time.perf_counter()
+    for name, load in startup_steps():
+        start = time.perf_counter()
+        try:
+            load()
+        except Exception as e:
+            logger.exception("Startup step %s failed", name)
+            readiness.mark_failed(name, str(e))
+            continue
+        elapsed = time.perf_counter() - start
+        readiness.mark_ready(name, elapsed)
+        logger.info("Startup step %s finished in %.2fs", name, elapsed)
+    logger.info("Startup loading finished in %.2fs", time.perf_counter() - total_start)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load in the background so health checks answer while models load
+    if Config.PRELOAD_ON_STARTUP:
+        for name, _ in startup_steps():
+            readiness.mark_loading(name)
+        threading.Thread(
+            target=load_dependencies, name="preload", daemon=True
+        ).start()
+    # With a vector store owner process, compaction is scheduled there instead
+    if Config.COMPACTION_INTERVAL_SECONDS > 0 and not Config.VECTOR_STORE_ADDRESS:
+        from backend.services.compaction import start_compaction_scheduler
+
+        start_compaction_scheduler()
+    lag_monitor = None
+    if Config.EVENT_LOOP_LAG_INTERVAL > 0:
+        lag_monitor = asyncio.create_task(
+            monitor_event_loop_lag(Config.EVENT_LOOP_LAG_INTERVAL)
+        )
+    yield
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Admission control runs inside CORS so rejections carry CORS headers
+app.add_middleware(AdmissionMiddleware)
 # CORS support for local frontend
 app.add_middleware(
     CORSMiddleware,
@@ -33,19 +178,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-chunker = HybridChunker()
-
-# Load models and ChromaDB client
-bi_encoder = SentenceTransformer("all-MiniLM-L6-v2")
-cross_encoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
-chroma_client = chromadb.PersistentClient(path="./chroma_db_test")
-
-# Ensure the documents collection exists
-try:
-    chroma_client.get_collection("documents")
-except:
-    chroma_client.create_collection("documents", metadata={"hnsw:space": "cosine"})
+# Profiles requests only while an admin has armed the profiler
+app.add_middleware(ProfilingMiddleware)
 
 
 async def save_upload_file(upload_file, destination):
@@ -72,16 +206,36 @@ def embed_and_store_chunks(path, project_id, strategy, file_id):
         loop.close()
 
 
-def list_projects():
-    """Get list of all projects."""
-    from backend.metadata_store import list_projects as metadata_list_projects
-    return metadata_list_projects()
+def set_file_status(file_id, project_id, status, **data):
+    """Update a file's status and push the transition to event subscribers."""
+    update_file_status(file_id, status)
+    event_broadcaster.publish(
+        "file_status", fileId=file_id, projectId=project_id, status=status, **data
+    )
+
+
+def query_projects(**kwargs):
+    """Get one page of projects, filtered and counted by the metadata store."""
+    from backend.metadata_store import query_projects as metadata_query_projects
+    return metadata_query_projects(**kwargs)
+
+
+def query_files(project_id, **kwargs):
+    """Get one page of a project's files, filtered and counted by the metadata store."""
+    from backend.metadata_store import query_files as metadata_query_files
+    return metadata_query_files(project_id, **kwargs)
 
 
-def list_files(project_id):
-    """Get list of files for a project."""
-    from backend.metadata_store import list_files as metadata_list_files
-    return metadata_list_files(project_id)
+SEARCH_MODES = ("substring", "prefix")
+
+
+def check_page_params(search_mode, cursor):
+    if search_mode not in SEARCH_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"search_mode must be one of {SEARCH_MODES}"
+        )
+    if cursor and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 def delete_project(project_id):
@@ -96,11 +250,108 @@ def delete_file(file_id):
     metadata_delete_file(file_id)
 
 
+def collect_runtime_metrics():
+    observe_cache("chunk", chunk_cache.get_stats())
+    QUEUE_DEPTH.set(event_broadcaster.queued_events, queue="sse_events")
+    IN_FLIGHT.set(event_broadcaster.subscriber_count, kind="sse_stream")
+    from backend.services.inference_pool import current_inference_pool
+
+    pool = current_inference_pool()
+    if pool is not None:
+        QUEUE_DEPTH.set(pool.pending, queue="inference")
+    admission_controller.collect()
+
+
+metrics.add_collector(collect_runtime_metrics)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/api/traces")
+def recent_traces(limit: int = 20):
+    """Most recent request traces (TRACE_EXPORTER=memory)."""
+    if not isinstance(tracing.exporter, tracing.InMemoryExporter):
+        raise HTTPException(
+            status_code=404, detail="In-memory trace exporter is not enabled"
+        )
+    return {"traces": tracing.exporter.recent(limit)}
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow a request only if it carries the configured ADMIN_TOKEN."""
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, Config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/api/admin/profiler", dependencies=[Depends(require_admin)])
+def arm_profiler(payload: dict):
+    """Profile the next `requests` requests to `endpoint`."""
+    endpoint = payload.get("endpoint")
+    mode = payload.get("mode", "sampling")
+    requests = payload.get("requests", 1)
+    if (
+        not isinstance(endpoint, str)
+        or not endpoint.startswith("/api/")
+        or endpoint.startswith("/api/admin/")
+    ):
+        raise HTTPException(
+            status_code=400, detail="endpoint must be an /api/ path, e.g. /api/ask"
+        )
+    if mode not in profiling.MODES:
+        raise HTTPException(
+            status_code=400, detail=f"mode must be one of {', '.join(profiling.MODES)}"
+        )
+    if not isinstance(requests, int) or not 1 <= requests <= profiling.MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400, detail=f"requests must be between 1 and {profiling.MAX_REQUESTS}"
+        )
+    return request_profiler.arm(endpoint, requests, mode)
+
+
+@app.get("/api/admin/profiler", dependencies=[Depends(require_admin)])
+def profiler_status():
+    return request_profiler.status()
+
+
+@app.delete("/api/admin/profiler", dependencies=[Depends(require_admin)])
+def disarm_profiler(endpoint: Optional[str] = None):
+    return request_profiler.disarm(endpoint)
+
+
+@app.get("/api/admin/profiler/captures", dependencies=[Depends(require_admin)])
+def list_profiles():
+    return {"captures": request_profiler.list_captures()}
+
+
+@app.get("/api/admin/profiler/captures/{capture_id}", dependencies=[Depends(require_admin)])
+def download_profile(capture_id: str):
+    path = request_profiler.capture_file(capture_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Capture not found")
+    media_type = "text/plain" if path.endswith(".folded") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+
 @app.get("/api/test")
 def test_endpoint():
     return {"message": "Server is working!", "status": "ok"}
 
 
+@app.get("/api/ready")
+def ready_endpoint():
+    """Readiness check: 200 once models and the vector store are loaded, else 503."""
+    status = readiness.get_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 @app.post("/api/test-chunk")
 async def test_chunk_simple(text: str = Form(...)):
     """Simple test endpoint for chunking"""
@@ -113,7 +364,7 @@ async def test_chunk_simple(text: str = Form(...)):
 
 
 def serialize_metadata(metadata):
-    d = metadata.__dict__.copy()
+    d = metadata.to_dict()
     if isinstance(d.get("strategy"), Enum):
         d["strategy"] = d["strategy"].value
     # Convert all numpy types to native Python types
@@ -124,16 +375,44 @@ def serialize_metadata(metadata):
     return d
 
 
+def chunk_params(
+    strategy: ChunkingStrategy,
+    chunk_size: Optional[int],
+    overlap: Optional[int],
+    chunk_tokens: Optional[int],
+    overlap_tokens: Optional[int],
+) -> dict:
+    """Size parameters a strategy uses, with defaults filled in (None = default)."""
+    if strategy in (ChunkingStrategy.FIXED_SIZE, ChunkingStrategy.HYBRID):
+        return {
+            "chunk_size": chunk_size or chunker.default_chunk_size,
+            "overlap": overlap if overlap is not None else chunker.overlap,
+        }
+    if strategy == ChunkingStrategy.FIXED_TOKENS:
+        return {
+            "chunk_tokens": chunk_tokens or DEFAULT_CHUNK_TOKENS,
+            "overlap_tokens": (
+                overlap_tokens if overlap_tokens is not None else DEFAULT_OVERLAP_TOKENS
+            ),
+        }
+    return {}
+
+
 @app.post("/api/chunk")
 async def chunk_text_or_file(
     text: str = Form(...),
     strategy: str = Form("fixed_size"),
     chunk_size: Optional[int] = Form(1000),
     overlap: Optional[int] = Form(200),
+    chunk_tokens: Optional[int] = Form(None),
+    overlap_tokens: Optional[int] = Form(None),
 ):
     """
     Advanced chunking endpoint using the unified chunking service.
     Returns chunks with rich metadata for embedding pipeline.
+    Responses are cached by text digest and strategy, plus the size parameters
+    that strategy uses (chunk_size and overlap for fixed_size and hybrid,
+    chunk_tokens and overlap_tokens for fixed_tokens).
     """
     try:
         # Select chunking strategy
@@ -141,17 +420,32 @@ async def chunk_text_or_file(
     except Exception:
         strategy_enum = ChunkingStrategy.FIXED_SIZE
 
+    params = chunk_params(strategy_enum, chunk_size, overlap, chunk_tokens, overlap_tokens)
+    # Parameters a strategy ignores must not split the cache
+    cache_key = (
+        hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        strategy_enum.value,
+    ) + tuple(sorted(params.items()))
+    cached = chunk_cache.get(cache_key)
+    if cached is not None:
+        return JSONResponse(cached)
+
     # Chunk the text
     try:
-        results = chunker.hybrid_chunk(text, strategies=[strategy_enum])
+        with track_stage("chunking"):
+            results = chunker.hybrid_chunk(
+                text,
+                strategies=[strategy_enum],
+                custom_params={strategy_enum.value: params},
+            )
         chunks = results[strategy_enum]
         # Return chunk text and metadata (not embeddings)
-        return JSONResponse(
-            [
-                {"text": chunk.text, "metadata": serialize_metadata(chunk.metadata)}
-                for chunk in chunks
-            ]
-        )
+        response = [
+            {"text": chunk.text, "metadata": serialize_metadata(chunk.metadata)}
+            for chunk in chunks
+        ]
+        chunk_cache.set(cache_key, response)
+        return JSONResponse(response)
     except Exception as e:
         import traceback
 
@@ -160,8 +454,139 @@ async def chunk_text_or_file(
         raise HTTPException(status_code=500, detail=f"Chunking failed: {str(e)}")
 
 
+STREAM_READ_SIZE = 64 * 1024
+STREAM_SPOOL_SIZE = 1024 * 1024
+
+
+async def _iter_upload(upload: UploadFile):
+    while True:
+        block = await upload.read(STREAM_READ_SIZE)
+        if not block:
+            break
+        yield block
+
+
+@app.post("/api/chunk/stream")
+async def chunk_stream(
+    request: Request,
+    strategy: str = "fixed_size",
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    chunk_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None,
+):
+    """
+    Streaming chunking endpoint for large documents.
+    Accepts a multipart upload (`file` or `text` field) or a raw UTF-8 request
+    body, spooled to disk past 1MB, and writes each chunk as an NDJSON line as
+    soon as it is produced.
+    The last line is {"done": true, "total_chunks": N}.
+    """
+    try:
+        strategy_enum = ChunkingStrategy(strategy)
+    except Exception:
+        strategy_enum = ChunkingStrategy.FIXED_SIZE
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is not None and not isinstance(upload, str):
+            blocks = _iter_upload(upload)
+        elif isinstance(form.get("text"), str):
+            text_block = form["text"].encode("utf-8")
+
+            async def single_block():
+                yield text_block
+
+            blocks = single_block()
+        else:
+            raise HTTPException(status_code=400, detail="Provide a file or text.")
+    else:
+        # Spool the body before responding: the response stream must not compete
+        # with the request body for ASGI receive() messages
+        spool = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_SIZE)
+        async for block in request.stream():
+            spool.write(block)
+        spool.seek(0)
+        blocks = _iter_upload(UploadFile(file=spool))
+
+    stream = StreamingChunker(
+        chunker,
+        strategy_enum,
+        custom_params={
+            strategy_enum.value: chunk_params(
+                strategy_enum, chunk_size, overlap, chunk_tokens, overlap_tokens
+            )
+        },
+    )
+
+    def to_lines(chunks):
+        return "".join(
+            json.dumps(
+                {"text": chunk.text, "metadata": serialize_metadata(chunk.metadata)}
+            )
+            + "\n"
+            for chunk in chunks
+        )
+
+    async def generate():
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            async for block in blocks:
+                text = decoder.decode(block)
+                if text:
+                    chunks = await run_in_threadpool(stream.feed, text)
+                    if chunks:
+                        yield to_lines(chunks)
+            tail = decoder.decode(b"", final=True)
+            chunks = await run_in_threadpool(stream.feed, tail) if tail else []
+            chunks += await run_in_threadpool(stream.finish)
+            if chunks:
+                yield to_lines(chunks)
+            yield json.dumps({"done": True, "total_chunks": stream.total_chunks}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Chunking failed: {str(e)}"}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+EVENT_HEARTBEAT_SECONDS = 15
+
+
+@app.get("/api/events")
+async def ingestion_events(request: Request, projectId: Optional[str] = None):
+    """Stream file status transitions and ingestion progress as Server-Sent Events."""
+    last_event_id = request.headers.get("last-event-id")
+    subscription = event_broadcaster.subscribe(
+        projectId, int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    )
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    event_id, event = await asyncio.wait_for(
+                        subscription.queue.get(), EVENT_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event_id, event)
+        finally:
+            event_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/batch-upload")
 async def batch_upload(
+    request: Request,
     projectId: str = Form(...),
     files: List[UploadFile] = File(...),
     strategy: Optional[str] = Form("fixed_size"),
@@ -181,25 +606,37 @@ async def batch_upload(
         temp_path = f"/tmp/{file.filename}"
         pdf_path = None
         file_id = None
+        IN_FLIGHT.inc(kind="upload")
         try:
             # Save uploaded file
-            await save_upload_file(file, temp_path)
+            with span("save_upload"):
+                await save_upload_file(file, temp_path)
             # Register file as 'uploading'
-            file_id = add_file(
-                projectId,
-                file.filename,
-                file.content_type or "txt",
-                file.size if hasattr(file, "size") else os.path.getsize(temp_path),
-            )
-            update_file_status(file_id, "processing")
+            with span("register_file"):
+                file_id = add_file(
+                    projectId,
+                    file.filename,
+                    file.content_type or "txt",
+                    file.size if hasattr(file, "size") else os.path.getsize(temp_path),
+                )
+                set_file_status(
+                    file_id, projectId, "processing", filename=file.filename
+                )
             # Process file through embedding pipeline with strategy
             # The pipeline will handle PDF conversion and text extraction internally
-            result = embed_and_store_chunks(
-                temp_path, projectId, strategy=strategy_enum, file_id=file_id
+            # Off the event loop, so progress events keep streaming meanwhile
+            result = await run_in_threadpool(
+                embed_and_store_chunks,
+                temp_path,
+                projectId,
+                strategy=strategy_enum,
+                file_id=file_id,
             )
             if not result["success"]:
                 raise Exception(result["error"])
-            update_file_status(file_id, "completed")
+            set_file_status(
+                file_id, projectId, "completed", chunks=result["chunks_created"]
+            )
             results.append(
                 {
                     "fileId": file_id,
@@ -210,7 +647,7 @@ async def batch_upload(
             )
         except Exception as e:
             if file_id:
-                update_file_status(file_id, "failed")
+                set_file_status(file_id, projectId, "failed", error=str(e))
             errors.append({"filename": file.filename, "error": str(e)})
         finally:
             # Clean up temp files
@@ -221,31 +658,95 @@ async def batch_upload(
                     os.remove(pdf_path)
             except Exception:
                 pass
+            IN_FLIGHT.dec(kind="upload")
+
+    # Bound the files processed at once, however many were uploaded
+    file_slots = asyncio.Semaphore(max(Config.UPLOAD_FILE_CONCURRENCY, 1))
 
-    await asyncio.gather(*(process_file(file) for file in files))
+    async def traced_process_file(file: UploadFile):
+        async with file_slots:
+            with span("process_file", filename=file.filename):
+                await process_file(file)
 
-    return {"results": results, "errors": errors}
+    debug = timings_requested(request.headers)
+    with start_trace(
+        "batch_upload", force=debug, projectId=projectId, files=len(files)
+    ) as root:
+        await asyncio.gather(*(traced_process_file(file) for file in files))
+
+    response = {"results": results, "errors": errors}
+    if debug:
+        response["timings"] = root.to_dict()
+    return response
 
 
 @app.post("/api/ask")
-async def ask_question(payload: dict):
+async def ask_question(payload: dict, request: Request):
     project_id = payload.get("projectId")
     question = payload.get("question")
     if not project_id or not question:
         raise HTTPException(
             status_code=400, detail="projectId and question are required."
         )
+    try:
+        deadline = request_deadline(
+            request.headers, getattr(request.state, "received_at", None)
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="X-Deadline-Ms must be a positive integer."
+        )
+
+    debug = timings_requested(request.headers)
+    IN_FLIGHT.inc(kind="ask")
+    try:
+        with start_trace("ask", force=debug, projectId=project_id) as root:
+            if Config.ASK_COALESCE:
+                # Identical questions in flight share one pipeline run
+                key = (
+                    project_id,
+                    normalize_question(question),
+                    deadline.budget_ms if deadline is not None else None,
+                )
+                with span("coalesce"):
+                    result, coalesced = await ask_coalescer.run(
+                        key, lambda: answer_question(project_id, question, deadline)
+                    )
+                # Shared between callers; copy before adding per-request fields
+                response = dict(result, coalesced=coalesced)
+                if coalesced and deadline is not None:
+                    response["elapsed_ms"] = deadline.elapsed_ms()
+            else:
+                response = await answer_question(project_id, question, deadline)
+    finally:
+        IN_FLIGHT.dec(kind="ask")
+    if debug:
+        response["timings"] = root.to_dict()
+    return response
+
+
+async def answer_question(
+    project_id: str, question: str, deadline: Optional[Deadline] = None
+):
+    degradations = []
+
+    def degrade(name):
+        degradations.append(name)
+        DEGRADATIONS.inc(degradation=name)
 
     # 1. Embed the question
-    question_emb = bi_encoder.encode([question])[0]
+    with track_stage("encode"):
+        question_emb = (await run_in_threadpool(get_bi_encoder().encode, [question]))[0]
 
     # 2. Query ChromaDB for top-k chunks
-    collection = chroma_client.get_collection("documents")
-    results = collection.query(
-        query_embeddings=[question_emb],
-        n_results=20,
-        include=["documents", "metadatas"],
-    )
+    collection = get_collection()
+    with track_stage("collection_query"):
+        results = await run_in_threadpool(
+            collection.query,
+            query_embeddings=[question_emb],
+            n_results=Config.ASK_RERANK_CANDIDATES,
+            include=["documents", "metadatas"],
+        )
     documents = results.get("documents")
     metadatas = results.get("metadatas")
     if not documents or not metadatas or not documents[0] or not metadatas[0]:
@@ -257,60 +758,120 @@ async def ask_question(payload: dict):
             for doc, meta in zip(documents[0], metadatas[0])
         ]
 
-    # 3. Rerank with cross-encoder
-    cross_inp = [[question, chunk["text"]] for chunk in candidate_chunks]
-    rerank_scores = cross_encoder.predict(cross_inp)
-    reranked = sorted(
-        zip(candidate_chunks, rerank_scores), key=lambda x: x[1], reverse=True
-    )
-    top_chunks = [chunk for chunk, score in reranked[:5]]
+    # 3. Rerank with cross-encoder, leaving time for the LLM under a deadline
+    rerank_count = len(candidate_chunks)
+    if deadline is not None and candidate_chunks:
+        rerank_count = rerank_budget(deadline, len(candidate_chunks))
+        if rerank_count == 0:
+            degrade(RERANK_SKIPPED)
+        elif rerank_count < len(candidate_chunks):
+            degrade(RERANK_REDUCED)
+    if rerank_count:
+        # Vector order is the fallback ranking for candidates left out
+        cross_inp = [[question, chunk["text"]] for chunk in candidate_chunks[:rerank_count]]
+        BATCH_SIZE.observe(len(cross_inp), operation="rerank")
+        start = time.perf_counter()
+        with track_stage("rerank"):
+            rerank_scores = await run_in_threadpool(get_cross_encoder().predict, cross_inp)
+        stage_estimates.observe("rerank", time.perf_counter() - start, len(cross_inp))
+        reranked = sorted(
+            zip(candidate_chunks, rerank_scores), key=lambda x: x[1], reverse=True
+        )
+        candidate_chunks = [chunk for chunk, score in reranked] + candidate_chunks[rerank_count:]
+    plan = llm_plan(deadline) if deadline is not None else "full"
+    if plan == "reduced":
+        degrade(CONTEXT_REDUCED)
+        top_chunks = candidate_chunks[: Config.ASK_REDUCED_CONTEXT_CHUNKS]
+    else:
+        top_chunks = candidate_chunks[: Config.ASK_CONTEXT_CHUNKS]
 
     # 4. Assemble context
-    context = "\n\n".join([chunk["text"] for chunk in top_chunks])
+    with span("context_assembly", chunks=len(top_chunks)):
+        context = "\n\n".join([chunk["text"] for chunk in top_chunks])
 
-    # 5. Generate answer with OpenAI LLM (placeholder for API key)
-    # Temporarily return context instead of generating answer for testing
-    try:
-        openai.api_key = os.getenv("OPENAI_API_KEY", "sk-...your-key...")
-        prompt = (
-            f"You are a helpful assistant. Use ONLY the context below to answer the question.\n"
-            f"If the answer is not in the context, say 'I don't know.'\n"
-            f"Context:\n{context}\n\nQuestion: {question}\nAnswer:"
-        )
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY", "sk-...your-key..."))
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=512,
-            temperature=0.2,
-        )
-        content = response.choices[0].message.content
-        answer = content.strip() if content else ""
-    except Exception as e:
-        answer = f"OpenAI API not available. Retrieved context: {context[:200]}..."
+    # 5. Generate answer with OpenAI LLM, unless the deadline leaves no time
+    if plan == "skip":
+        degrade(RETRIEVAL_ONLY)
+        answer = retrieval_only_answer(top_chunks)
+    else:
+        answer = await generate_answer(question, context, plan, deadline, degrade)
+        if answer is None:
+            answer = retrieval_only_answer(top_chunks)
 
-    return {
+    response = {
         "answer": answer,
         "sources": top_chunks,
         "context": context,
         "retrieved_chunks_count": len(top_chunks),
+        "degradations": degradations,
     }
+    if deadline is not None:
+        response["deadline_ms"] = deadline.budget_ms
+        response["elapsed_ms"] = deadline.elapsed_ms()
+    return response
+
+
+def retrieval_only_answer(top_chunks):
+    if not top_chunks:
+        return "I don't know."
+    return (
+        "No answer could be generated in time. Most relevant passage: "
+        + top_chunks[0]["text"][:500]
+    )
+
+
+async def generate_answer(question, context, plan, deadline, degrade):
+    """LLM answer, or None if the call ran out of time."""
+    prompt = (
+        f"You are a helpful assistant. Use ONLY the context below to answer the question.\n"
+        f"If the answer is not in the context, say 'I don't know.'\n"
+        f"Context:\n{context}\n\nQuestion: {question}\nAnswer:"
+    )
+    timeout = Config.LLM_TIMEOUT_SECONDS
+    if deadline is not None:
+        timeout = min(timeout, max(deadline.remaining(), 0.0))
+    cost_share = REDUCED_LLM_COST if plan == "reduced" else 1.0
+    start = time.perf_counter()
+    try:
+        client = get_llm_client()
+        with track_stage("llm"):
+            # Off the event loop, and bounded even if the client ignores its timeout
+            response = await asyncio.wait_for(
+                run_in_threadpool(
+                    client.chat.completions.create,
+                    model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=int(512 * cost_share),
+                    temperature=0.2,
+                    timeout=timeout,
+                ),
+                timeout,
+            )
+        stage_estimates.observe("llm", (time.perf_counter() - start) / cost_share)
+        content = response.choices[0].message.content
+        return content.strip() if content else ""
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        if isinstance(e, asyncio.TimeoutError) or elapsed >= timeout:
+            stage_estimates.observe("llm", elapsed / cost_share)
+            degrade(LLM_TIMEOUT)
+            return None
+        return f"OpenAI API not available. Retrieved context: {context[:200]}..."
 
 
 @app.get("/api/projects")
-def get_projects(limit: int = 20, offset: int = 0, search: str = ""):
-    all_projects = list_projects()
-    if search:
-        all_projects = [
-            p
-            for p in all_projects
-            if search.lower() in p["name"].lower()
-            or search.lower() in p["description"].lower()
-        ]
-    return {
-        "projects": all_projects[offset : offset + limit],
-        "total": len(all_projects),
-    }
+def get_projects(
+    limit: int = 20,
+    offset: int = 0,
+    search: str = "",
+    search_mode: str = "substring",
+    cursor: str = "",
+):
+    check_page_params(search_mode, cursor)
+    projects, total, next_cursor = query_projects(
+        limit=limit, offset=offset, search=search, search_mode=search_mode, cursor=cursor
+    )
+    return {"projects": projects, "total": total, "nextCursor": next_cursor}
 
 
 @app.get("/api/projects/{project_id}/files")
@@ -320,26 +881,69 @@ def get_project_files(
     offset: int = 0,
     search: str = "",
     status: str = "",
+    search_mode: str = "substring",
+    cursor: str = "",
 ):
-    all_files = list_files(project_id)
-    if search:
-        all_files = [f for f in all_files if search.lower() in f["filename"].lower()]
-    if status:
-        all_files = [f for f in all_files if f["status"] == status]
-    return {"files": all_files[offset : offset + limit], "total": len(all_files)}
+    check_page_params(search_mode, cursor)
+    files, total, next_cursor = query_files(
+        project_id,
+        limit=limit,
+        offset=offset,
+        search=search,
+        status=status,
+        search_mode=search_mode,
+        cursor=cursor,
+    )
+    return {"files": files, "total": total, "nextCursor": next_cursor}
+
+
+def delete_project_chunks(project_id: str) -> int:
+    start = time.perf_counter()
+    deleted = delete_chunks({"project_id": project_id})
+    logger.info(
+        "Deleted %d chunks of project %s in %.2fs",
+        deleted,
+        project_id,
+        time.perf_counter() - start,
+    )
+    return deleted
 
 
 @app.delete("/api/projects/{project_id}")
-def remove_project(project_id: str):
+def remove_project(project_id: str, background_tasks: BackgroundTasks):
+    # Look one past the threshold to decide without listing every chunk id
+    threshold = Config.VECTOR_DELETE_BACKGROUND_THRESHOLD
+    chunk_ids = find_chunk_ids({"project_id": project_id}, limit=threshold + 1)
+    if len(chunk_ids) > threshold:
+        delete_project(project_id)
+        background_tasks.add_task(delete_project_chunks, project_id)
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": "deleting",
+                "projectId": project_id,
+                "chunksDeleted": 0,
+                "background": True,
+            },
+        )
+    chunks_deleted = delete_project_chunks(project_id) if chunk_ids else 0
     delete_project(project_id)
-    return {"status": "deleted", "projectId": project_id}
+    return {
+        "status": "deleted",
+        "projectId": project_id,
+        "chunksDeleted": chunks_deleted,
+        "background": False,
+    }
 
 
 @app.delete("/api/files/{file_id}")
 def remove_file(file_id: str):
+    # Vectors first, so a failure leaves the file listed for another attempt
+    chunks_deleted = delete_chunks({"file_id": file_id})
     delete_file(file_id)
-    return {"status": "deleted", "fileId": file_id}
+    return {"status": "deleted", "fileId": file_id, "chunksDeleted": chunks_deleted}
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     uvicorn.run(app, host="0.0.0.0", port=8000)
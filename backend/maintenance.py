@@ -0,0 +1,75 @@
+"""
+Maintenance commands for the RAG service's vector store.
+
+Usage:
+    python -m backend.maintenance stats
+    python -m backend.maintenance compact [--collection documents] [--threshold 0.3] [--force]
+
+Run these while the API is stopped, or leave compaction to the scheduled task
+(COMPACTION_INTERVAL_SECONDS) in a running server: ChromaDB expects a single
+process to write to its persist directory.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from backend.config import Config
+from backend.services.compaction import (
+    collection_stats,
+    compact_collection,
+    compact_if_needed,
+    list_logical_collections,
+)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Vector store maintenance")
+    parser.add_argument("--persist-directory", default=Config.CHROMA_PERSIST_DIRECTORY)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show fragmentation per collection")
+    compact = commands.add_parser("compact", help="Rebuild fragmented collections")
+    compact.add_argument("--collection", help="Only this collection")
+    compact.add_argument("--threshold", type=float, default=Config.COMPACTION_THRESHOLD)
+    compact.add_argument("--force", action="store_true", help="Ignore the threshold")
+    compact.add_argument(
+        "--grace-seconds",
+        type=float,
+        default=0,
+        help="Keep the old collection this long after the swap",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    directory = args.persist_directory
+    if args.command == "stats":
+        for name in list_logical_collections(directory):
+            print(json.dumps(collection_stats(name, directory)))
+        return
+
+    if args.collection:
+        stats = collection_stats(args.collection, directory)
+        if args.force or stats["fragmentation"] >= args.threshold:
+            reports = [compact_collection(args.collection, directory, args.grace_seconds)]
+        else:
+            reports = []
+    elif args.force:
+        reports = [
+            compact_collection(name, directory, args.grace_seconds)
+            for name in list_logical_collections(directory)
+        ]
+    else:
+        Config.COMPACTION_GRACE_SECONDS = args.grace_seconds
+        reports = compact_if_needed(args.threshold, directory)
+    if not reports:
+        print("No collection needed compaction")
+    for report in reports:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,267 @@
 import json
+import logging
 import os
+import sqlite3
+import threading
 from datetime import datetime
 import uuid
 
+logger = logging.getLogger(__name__)
+
 METADATA_FILE = "metadata.json"
+METADATA_DB = os.getenv("METADATA_DB", "metadata.db")
+
+SCHEMA_VERSION = 2
+MAX_PAGE_SIZE = 200
+
+PROJECT_COLUMNS = ("projectId", "name", "description", "createdAt", "status")
+FILE_COLUMNS = ("fileId", "projectId", "filename", "type", "size", "uploadedAt", "status")
+
+# seq is an explicit INTEGER PRIMARY KEY so it survives VACUUM; it gives a
+# stable insertion order for keyset pagination and keys the filename index.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    seq INTEGER PRIMARY KEY,
+    projectId TEXT UNIQUE NOT NULL,
+    name TEXT,
+    description TEXT,
+    createdAt TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    seq INTEGER PRIMARY KEY,
+    fileId TEXT UNIQUE NOT NULL,
+    projectId TEXT,
+    filename TEXT,
+    type TEXT,
+    size INTEGER,
+    uploadedAt TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_projects_name ON projects (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_files_project ON files (projectId);
+CREATE INDEX IF NOT EXISTS idx_files_status ON files (status);
+CREATE INDEX IF NOT EXISTS idx_files_filename ON files (filename);
+CREATE INDEX IF NOT EXISTS idx_files_project_status ON files (projectId, status);
+CREATE INDEX IF NOT EXISTS idx_files_project_filename ON files (projectId, filename COLLATE NOCASE)
+"""
+
+# Trigram full-text index so substring filename search does not scan the table
+FTS_SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+        filename, content='files', content_rowid='seq', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts (rowid, filename) VALUES (new.seq, new.filename);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files BEGIN
+        INSERT INTO files_fts (files_fts, rowid, filename) VALUES ('delete', old.seq, old.filename);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS files_fts_update AFTER UPDATE OF filename ON files BEGIN
+        INSERT INTO files_fts (files_fts, rowid, filename) VALUES ('delete', old.seq, old.filename);
+        INSERT INTO files_fts (rowid, filename) VALUES (new.seq, new.filename);
+    END""",
+)
+
+# One connection per thread (and per process, since serve.py forks workers)
+_local = threading.local()
+
 
-def load_metadata():
+def _connect():
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+    conn = sqlite3.connect(METADATA_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _init_db(conn)
+    _local.conn = conn
+    _local.pid = os.getpid()
+    return conn
+
+
+def _init_db(conn):
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    # BEGIN IMMEDIATE so only one process creates the schema and migrates
+    conn.execute("BEGIN IMMEDIATE")
+    migrated = False
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            _create_schema(conn)
+            migrated = _migrate_json(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    # Only once the import is committed; a failed start retries from the JSON file
+    if migrated:
+        os.replace(METADATA_FILE, METADATA_FILE + ".migrated")
+
+
+def _create_schema(conn):
+    for statement in SCHEMA.split(";"):
+        conn.execute(statement)
+    try:
+        for statement in FTS_SCHEMA:
+            conn.execute(statement)
+    except sqlite3.OperationalError as e:
+        # SQLite built without FTS5/trigram: substring search falls back to LIKE
+        logger.warning("Filename search index unavailable: %s", e)
+
+
+def _migrate_json(conn):
+    """One-time import of the legacy metadata.json file; True if it was imported."""
     if not os.path.exists(METADATA_FILE):
-        return {"projects": {}, "files": {}}
+        return False
     with open(METADATA_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+        metadata = json.load(f)
+    conn.executemany(
+        _insert_sql("projects", PROJECT_COLUMNS, "OR IGNORE"),
+        [tuple(p.get(c) for c in PROJECT_COLUMNS) for p in metadata.get("projects", {}).values()],
+    )
+    conn.executemany(
+        _insert_sql("files", FILE_COLUMNS, "OR IGNORE"),
+        [tuple(f.get(c) for c in FILE_COLUMNS) for f in metadata.get("files", {}).values()],
+    )
+    return True
+
+
+def _insert_sql(table, columns, conflict=""):
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT {conflict} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def _has_fts(conn):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def _like_pattern(search, mode):
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%" if mode == "prefix" else "%" + escaped + "%"
+
+
+def _page(conn, table, columns, where, params, limit, offset, cursor):
+    """Run one page query plus its count query.
+
+    Results are ordered by insertion (seq). A cursor (the nextCursor of the
+    previous page) continues with a keyset seek and ignores offset, so deep
+    pages cost the same as the first one.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    condition = " AND ".join(where) or "1"
+    total = conn.execute(
+        f"SELECT COUNT(*) FROM {table} WHERE {condition}", params
+    ).fetchone()[0]
+
+    page_where, page_params = list(where), list(params)
+    if cursor:
+        page_where.append("seq > ?")
+        page_params.append(int(cursor))
+        offset = 0
+    rows = conn.execute(
+        f"SELECT seq, {', '.join(columns)} FROM {table} "
+        f"WHERE {' AND '.join(page_where) or '1'} ORDER BY seq LIMIT ? OFFSET ?",
+        page_params + [limit, max(0, int(offset))],
+    ).fetchall()
+    items = [{c: row[c] for c in columns} for row in rows]
+    next_cursor = str(rows[-1]["seq"]) if len(rows) == limit else None
+    return items, total, next_cursor
 
-def save_metadata(metadata):
-    with open(METADATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=2, default=str)
 
 # Project management
 def create_project(name, description):
-    metadata = load_metadata()
     project_id = str(uuid.uuid4())
-    metadata["projects"][project_id] = {
-        "projectId": project_id,
-        "name": name,
-        "description": description,
-        "createdAt": datetime.utcnow().isoformat(),
-        "status": "active"
-    }
-    save_metadata(metadata)
+    _connect().execute(
+        _insert_sql("projects", PROJECT_COLUMNS),
+        (project_id, name, description, datetime.utcnow().isoformat(), "active"),
+    )
     return project_id
 
 def list_projects():
-    metadata = load_metadata()
-    return list(metadata["projects"].values())
+    rows = _connect().execute(f"SELECT {', '.join(PROJECT_COLUMNS)} FROM projects ORDER BY seq")
+    return [dict(row) for row in rows]
+
+def query_projects(limit=20, offset=0, search="", search_mode="substring", cursor=None):
+    """One page of projects matching a name/description search.
+
+    search_mode "prefix" matches the start of the name using its index;
+    "substring" matches anywhere in the name or description.
+    Returns (projects, total, next_cursor).
+    """
+    where, params = [], []
+    if search:
+        pattern = _like_pattern(search, search_mode)
+        if search_mode == "prefix":
+            where.append("name LIKE ? ESCAPE '\\'")
+            params.append(pattern)
+        else:
+            where.append("(name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+    return _page(_connect(), "projects", PROJECT_COLUMNS, where, params, limit, offset, cursor)
 
 def delete_project(project_id):
-    metadata = load_metadata()
-    # Remove project
-    metadata["projects"].pop(project_id, None)
-    # Remove all files under this project
-    metadata["files"] = {fid: f for fid, f in metadata["files"].items() if f["projectId"] != project_id}
-    save_metadata(metadata)
+    conn = _connect()
+    with conn:
+        conn.execute("BEGIN")
+        # Remove all files under this project, then the project
+        conn.execute("DELETE FROM files WHERE projectId = ?", (project_id,))
+        conn.execute("DELETE FROM projects WHERE projectId = ?", (project_id,))
 
 # File management
 def add_file(project_id, filename, filetype, size):
-    metadata = load_metadata()
     file_id = str(uuid.uuid4())
-    metadata["files"][file_id] = {
-        "fileId": file_id,
-        "projectId": project_id,
-        "filename": filename,
-        "type": filetype,
-        "size": size,
-        "uploadedAt": datetime.utcnow().isoformat(),
-        "status": "processing"
-    }
-    save_metadata(metadata)
+    _connect().execute(
+        _insert_sql("files", FILE_COLUMNS),
+        (file_id, project_id, filename, filetype, size,
+         datetime.utcnow().isoformat(), "processing"),
+    )
     return file_id
 
 def list_files(project_id=None):
-    metadata = load_metadata()
-    files = list(metadata["files"].values())
+    conn = _connect()
+    columns = ", ".join(FILE_COLUMNS)
+    if project_id:
+        rows = conn.execute(
+            f"SELECT {columns} FROM files WHERE projectId = ? ORDER BY seq", (project_id,)
+        )
+    else:
+        rows = conn.execute(f"SELECT {columns} FROM files ORDER BY seq")
+    return [dict(row) for row in rows]
+
+def query_files(project_id=None, limit=20, offset=0, search="", status="",
+                search_mode="substring", cursor=None):
+    """One page of files filtered by project, filename search and status.
+
+    Substring searches of three or more characters use the trigram index;
+    shorter ones fall back to LIKE within the project. Prefix searches use
+    the (projectId, filename) index. Returns (files, total, next_cursor).
+    """
+    conn = _connect()
+    where, params = [], []
     if project_id:
-        files = [f for f in files if f["projectId"] == project_id]
-    return files
+        where.append("projectId = ?")
+        params.append(project_id)
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if search:
+        if search_mode != "prefix" and len(search) >= 3 and _has_fts(conn):
+            where.append("seq IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?)")
+            params.append('"' + search.replace('"', '""') + '"')
+        else:
+            where.append("filename LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(search, search_mode))
+    return _page(conn, "files", FILE_COLUMNS, where, params, limit, offset, cursor)
 
 def delete_file(file_id):
-    metadata = load_metadata()
-    metadata["files"].pop(file_id, None)
-    save_metadata(metadata)
+    _connect().execute("DELETE FROM files WHERE fileId = ?", (file_id,))
 
 def update_file_status(file_id, status):
-    metadata = load_metadata()
-    if file_id in metadata["files"]:
-        metadata["files"][file_id]["status"] = status
-        save_metadata(metadata) 
\ No newline at end of file
+    _connect().execute("UPDATE files SET status = ? WHERE fileId = ?", (status, file_id))
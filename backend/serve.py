@@ -0,0 +1,249 @@
+"""
+Multi-process server for the RAG service.
+
+The parent process loads the bi-encoder, cross-encoder and tokenizer once and
+then forks the uvicorn workers, so model weights are shared copy-on-write
+instead of being loaded per worker. A separate owner process holds the only
+ChromaDB client; workers reach the collection over a local socket (see
+backend/services/vector_store.py). With INFERENCE_WORKERS set, one inference
+pool process serves every worker instead of the parent loading the models
+(see backend/services/inference_pool.py). Workers that exit unexpectedly are
+re-forked from the parent, which keeps the loaded models; a worker that keeps
+dying shortly after starting is re-forked with an increasing delay. If an owner
+process exits, the server shuts down with a non-zero status so a process
+supervisor can restart it cleanly.
+
+Usage:
+    python -m backend.serve --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import secrets
+import signal
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
+# A worker exiting sooner than this after its fork counts as a crash loop
+MIN_WORKER_UPTIME = 10.0
+MAX_RESTART_DELAY = 30.0
+
+
+def _start_owner(
+    target, manager_class, address: str, authkey: str, name: str,
+    daemon: bool, timeout: float,
+) -> multiprocessing.Process:
+    """Start a manager-serving process (spawned, not forked) and wait for it."""
+    ctx = multiprocessing.get_context("spawn")
+    process = ctx.Process(target=target, args=(address, authkey), name=name, daemon=daemon)
+    process.start()
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            manager = manager_class(address=address, authkey=authkey.encode("utf-8"))
+            manager.connect()
+            return process
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not process.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"{name} process failed to start")
+            time.sleep(0.1)
+
+
+def start_vector_store_owner(address: str, authkey: str) -> multiprocessing.Process:
+    """Start the ChromaDB owner in a fresh (spawned) process and wait for it."""
+    from backend.services.vector_store import (
+        VectorStoreManager,
+        run_vector_store_server,
+    )
+
+    return _start_owner(
+        run_vector_store_server, VectorStoreManager, address, authkey,
+        "vector-store-owner", daemon=True, timeout=120,
+    )
+
+
+def start_inference_owner(address: str, authkey: str) -> multiprocessing.Process:
+    """Start the shared inference pool in a spawned process and wait for it."""
+    from backend.services.inference_pool import InferenceManager, run_inference_server
+
+    # Not a daemon: daemonic processes may not start the pool's workers
+    return _start_owner(
+        run_inference_server, InferenceManager, address, authkey,
+        "inference-pool", daemon=False,
+        timeout=Config.INFERENCE_START_TIMEOUT_SECONDS + 60,
+    )
+
+
+def preload_models() -> None:
+    """Load models in the parent so forked workers share their weights."""
+    from backend.main import chunker
+    from backend.services.models import get_bi_encoder, get_cross_encoder
+
+    start = time.perf_counter()
+    chunker.tokenizer
+    if Config.INFERENCE_WORKERS > 0:
+        # The shared inference pool process holds the models
+        logger.info("INFERENCE_WORKERS is set; skipping model preload")
+    else:
+        get_bi_encoder()
+        get_cross_encoder()
+    logger.info("Loaded shared models in %.2fs", time.perf_counter() - start)
+    # Keep the garbage collector from touching (and so copying) preloaded objects
+    gc.collect()
+    gc.freeze()
+
+
+def fork_worker(config, sock) -> int:
+    pid = os.fork()
+    if pid == 0:
+        import uvicorn
+
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            uvicorn.Server(config).run(sockets=[sock])
+        finally:
+            os._exit(0)
+    return pid
+
+
+def restart_delay(failures: int) -> float:
+    """Seconds to wait before re-forking a worker after consecutive quick exits."""
+    if failures <= 0:
+        return 0.0
+    return min(2.0 ** (failures - 1), MAX_RESTART_DELAY)
+
+
+def serve(host: str, port: int, workers: int) -> int:
+    """Run the server until stopped; returns the process exit status."""
+    import uvicorn
+
+    # Workers inherit the owner address through Config and the environment
+    if not Config.VECTOR_STORE_ADDRESS:
+        Config.VECTOR_STORE_ADDRESS = os.path.join(
+            tempfile.mkdtemp(prefix="rag-vector-store-"), "owner.sock"
+        )
+    if not Config.VECTOR_STORE_AUTHKEY:
+        Config.VECTOR_STORE_AUTHKEY = secrets.token_hex(16)
+    os.environ["VECTOR_STORE_ADDRESS"] = Config.VECTOR_STORE_ADDRESS
+    os.environ["VECTOR_STORE_AUTHKEY"] = Config.VECTOR_STORE_AUTHKEY
+    # Event streams see uploads handled by any worker
+    if not Config.EVENTS_DB:
+        Config.EVENTS_DB = os.path.join(tempfile.mkdtemp(prefix="rag-events-"), "events.db")
+    os.environ["EVENTS_DB"] = Config.EVENTS_DB
+
+    owner = start_vector_store_owner(
+        Config.VECTOR_STORE_ADDRESS, Config.VECTOR_STORE_AUTHKEY
+    )
+    owners = {owner.pid: owner}
+    if Config.INFERENCE_WORKERS > 0:
+        # One pool for all workers rather than one per worker
+        if not Config.INFERENCE_POOL_ADDRESS:
+            Config.INFERENCE_POOL_ADDRESS = os.path.join(
+                tempfile.mkdtemp(prefix="rag-inference-"), "pool.sock"
+            )
+        os.environ["INFERENCE_POOL_ADDRESS"] = Config.INFERENCE_POOL_ADDRESS
+        inference_owner = start_inference_owner(
+            Config.INFERENCE_POOL_ADDRESS, Config.VECTOR_STORE_AUTHKEY
+        )
+        owners[inference_owner.pid] = inference_owner
+    preload_models()
+
+    from backend.main import app
+
+    config = uvicorn.Config(app, host=host, port=port)
+    sock = config.bind_socket()
+
+    children: Dict[int, int] = {}
+    started: Dict[int, float] = {}
+    failures: Dict[int, int] = {}
+
+    def start_worker(slot: int) -> None:
+        pid = fork_worker(config, sock)
+        children[pid] = slot
+        started[pid] = time.monotonic()
+
+    for slot in range(workers):
+        start_worker(slot)
+    logger.info("Started %d workers on %s:%d", workers, host, port)
+
+    stopping = False
+    exit_code = 0
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        if pid in owners:
+            exited = owners.pop(pid)
+            if not stopping:
+                # Workers cannot serve requests without it
+                logger.error("%s exited with status %d; shutting down", exited.name, status)
+                exit_code = 1
+                stop(None, None)
+            continue
+        slot = children.pop(pid, None)
+        uptime = time.monotonic() - started.pop(pid, 0.0)
+        if slot is None or stopping:
+            continue
+        failures[slot] = failures.get(slot, 0) + 1 if uptime < MIN_WORKER_UPTIME else 0
+        delay = restart_delay(failures[slot])
+        logger.warning(
+            "Worker %d exited with status %d; restarting in %.0fs", pid, status, delay
+        )
+        deadline = time.monotonic() + delay
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(0.1)
+        if not stopping:
+            start_worker(slot)
+
+    sock.close()
+    for process in owners.values():
+        process.terminate()
+        process.join(timeout=10)
+    return exit_code
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve the RAG API with multiple workers"
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=Config.SERVE_WORKERS or os.cpu_count()
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(serve(args.host, args.port, max(args.workers, 1)))
+
+
+if __name__ == "__main__":
+    main()
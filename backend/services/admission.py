@@ -0,0 +1,232 @@
+"""
+Admission control for the RAG service.
+Each traffic class (questions, ingestion) has a concurrency limit and a bounded
+queue of waiting requests. Requests are admitted before their body is read, so
+an overloaded server turns requests away cheaply instead of buffering uploads
+and timing out:
+
+- queue full: 429 with Retry-After
+- waited longer than ADMISSION_QUEUE_TIMEOUT: 503 with Retry-After
+
+On top of the per-class limits, ADMISSION_CONCURRENCY caps the requests
+running across all classes. Classes are listed in priority order and those
+shared slots go to higher-priority classes first: ingestion only waits behind
+queued questions that are waiting for shared capacity, not behind questions
+that are waiting for a query slot. Limits apply per worker process.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from starlette.responses import JSONResponse
+
+from backend.config import Config
+from backend.services.metrics import metrics
+
+ADMISSION_ACTIVE = metrics.gauge(
+    "rag_admission_active", "Admitted requests running, per traffic class", ("traffic_class",)
+)
+ADMISSION_QUEUED = metrics.gauge(
+    "rag_admission_queued", "Requests waiting for admission", ("traffic_class",)
+)
+ADMISSION_QUEUE_OCCUPANCY = metrics.gauge(
+    "rag_admission_queue_occupancy", "Queued requests / queue size", ("traffic_class",)
+)
+ADMISSION_LIMIT = metrics.gauge(
+    "rag_admission_limit", "Concurrency limit per traffic class", ("traffic_class",)
+)
+ADMISSION_REJECTED = metrics.counter(
+    "rag_admission_rejected_total",
+    "Requests turned away, by reason (queue_full or timeout)",
+    ("traffic_class", "reason"),
+)
+ADMISSION_WAIT_SECONDS = metrics.histogram(
+    "rag_admission_wait_seconds", "Time spent queued before admission", ("traffic_class",)
+)
+
+
+class AdmissionRejected(Exception):
+    """A request could not be admitted."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class TrafficClass:
+    """Concurrency limit and wait queue for one kind of request."""
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long an admitted request holds its slot
+        self.avg_seconds = 1.0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self.waiters if not waiter.done())
+
+    def retry_after(self) -> int:
+        """Seconds until a retry is likely to find room."""
+        return max(1, round(self.avg_seconds * (self.queued + 1) / max(self.limit, 1)))
+
+
+class AdmissionController:
+    """Admits requests per traffic class, in priority order."""
+
+    def __init__(self, classes: List[TrafficClass], queue_timeout: float,
+                 total_limit: int = 0):
+        # Highest priority first
+        self.classes: Dict[str, TrafficClass] = {c.name: c for c in classes}
+        self.queue_timeout = queue_timeout
+        # Requests running across all classes; 0 for no shared limit
+        self.total_limit = total_limit
+
+    @property
+    def total_active(self) -> int:
+        return sum(c.active for c in self.classes.values())
+
+    def _can_start(self, traffic_class: TrafficClass) -> bool:
+        """Whether a request of this class may take a slot now."""
+        if traffic_class.active >= traffic_class.limit:
+            return False
+        if not self.total_limit:
+            return True
+        if self.total_active >= self.total_limit:
+            return False
+        # Shared slots go first to higher-priority requests that only lack one
+        for other in self.classes.values():
+            if other is traffic_class:
+                return True
+            if other.queued and other.active < other.limit:
+                return False
+        return True
+
+    async def acquire(self, name: str) -> None:
+        """Wait for a slot in a traffic class or raise AdmissionRejected."""
+        traffic_class = self.classes[name]
+        if not traffic_class.queued and self._can_start(traffic_class):
+            traffic_class.active += 1
+            ADMISSION_WAIT_SECONDS.observe(0.0, traffic_class=name)
+            return
+        if traffic_class.queued >= traffic_class.max_queue:
+            ADMISSION_REJECTED.inc(traffic_class=name, reason="queue_full")
+            raise AdmissionRejected(
+                429, f"Too many {name} requests queued", traffic_class.retry_after()
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        traffic_class.waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                # Lower-priority classes may have been waiting behind this request
+                self._dispatch()
+                ADMISSION_REJECTED.inc(traffic_class=name, reason="timeout")
+                raise AdmissionRejected(
+                    503, f"Timed out waiting for a {name} slot", traffic_class.retry_after()
+                )
+            # Admitted just as the timeout fired
+        except asyncio.CancelledError:
+            # Client went away; hand the slot on if it was already granted
+            if waiter.cancel():
+                self._dispatch()
+            else:
+                self.release(name, 0.0)
+            raise
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - start, traffic_class=name)
+
+    def release(self, name: str, held_seconds: float) -> None:
+        traffic_class = self.classes[name]
+        traffic_class.active -= 1
+        if held_seconds:
+            traffic_class.avg_seconds = 0.8 * traffic_class.avg_seconds + 0.2 * held_seconds
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, highest-priority class first."""
+        for traffic_class in self.classes.values():
+            waiters = traffic_class.waiters
+            while waiters and self._can_start(traffic_class):
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    traffic_class.active += 1
+                    waiter.set_result(None)
+            while waiters and waiters[0].done():
+                waiters.popleft()
+
+    def collect(self) -> None:
+        """Refresh the admission gauges (registered as a metrics collector)."""
+        for name, traffic_class in self.classes.items():
+            queued = traffic_class.queued
+            ADMISSION_ACTIVE.set(traffic_class.active, traffic_class=name)
+            ADMISSION_QUEUED.set(queued, traffic_class=name)
+            ADMISSION_QUEUE_OCCUPANCY.set(
+                queued / traffic_class.max_queue if traffic_class.max_queue else 0.0,
+                traffic_class=name,
+            )
+            ADMISSION_LIMIT.set(traffic_class.limit, traffic_class=name)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying admission control by request path."""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None,
+                 routes: Optional[Dict[str, str]] = None):
+        self.app = app
+        self.controller = controller or admission_controller
+        self.routes = routes or ADMISSION_ROUTES
+
+    async def __call__(self, scope, receive, send):
+        name = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if name is None or scope.get("method") == "OPTIONS" or name not in self.controller.classes:
+            await self.app(scope, receive, send)
+            return
+        # Request deadlines count time spent waiting here (request.state.received_at)
+        scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        try:
+            await self.controller.acquire(name)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.perf_counter() - start)
+
+
+def _create_controller() -> AdmissionController:
+    classes = [
+        TrafficClass("query", Config.QUERY_CONCURRENCY, Config.QUERY_QUEUE_SIZE),
+        TrafficClass("ingest", Config.INGEST_CONCURRENCY, Config.INGEST_QUEUE_SIZE),
+    ]
+    # A limit of 0 turns admission control off for that class
+    return AdmissionController(
+        [c for c in classes if c.limit > 0],
+        Config.ADMISSION_QUEUE_TIMEOUT,
+        Config.ADMISSION_CONCURRENCY,
+    )
+
+
+ADMISSION_ROUTES = {
+    "/api/ask": "query",
+    "/api/batch-upload": "ingest",
+}
+
+# Global instance
+admission_controller = _create_controller()
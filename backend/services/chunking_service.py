@@ -4,6 +4,7 @@ from backend.hybrid_chunking import (
     ChunkingStrategy,
     Chunk,
     ChunkMetadata,
+    SourceText,
 )
 import hashlib
 from datetime import datetime
@@ -28,6 +29,8 @@ class ChunkingService:
         chunk_size: Optional[int] = None,
         overlap: Optional[int] = None,
         file_metadata: Optional[Dict[str, Any]] = None,
+        chunk_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
     ) -> List[Chunk]:
         """
         Chunk text using the specified strategy and return chunks with metadata.
@@ -38,6 +41,8 @@ class ChunkingService:
             chunk_size: Override default chunk size
             overlap: Override default overlap
             file_metadata: Additional metadata to attach to chunks
+            chunk_tokens: Override the fixed_tokens window size
+            overlap_tokens: Override the fixed_tokens overlap
 
         Returns:
             List of Chunk objects with metadata
@@ -45,31 +50,32 @@ class ChunkingService:
         if not text.strip():
             return []
 
+        # File-level metadata is stored once on the shared source, not per chunk
+        source = SourceText(text=text)
+        if file_metadata:
+            source.file_id = file_metadata.get("file_id")
+            source.project_id = file_metadata.get("project_id")
+            # Add any additional metadata
+            for key, value in file_metadata.items():
+                if key not in ["file_id", "project_id"]:
+                    source.extra[key] = value
+
         # Use hybrid chunking with single strategy
         results = self.chunker.hybrid_chunk(
-            text,
+            source,
             strategies=[strategy],
             custom_params={
                 strategy.value: {
                     "chunk_size": chunk_size or self.default_chunk_size,
-                    "overlap": overlap or self.default_overlap,
+                    "overlap": overlap if overlap is not None else self.default_overlap,
+                    # None falls back to the fixed_tokens defaults
+                    "chunk_tokens": chunk_tokens,
+                    "overlap_tokens": overlap_tokens,
                 }
             },
         )
 
-        chunks = results.get(strategy, [])
-
-        # Enhance metadata with file information if provided
-        if file_metadata:
-            for chunk in chunks:
-                chunk.metadata.file_id = file_metadata.get("file_id")
-                chunk.metadata.project_id = file_metadata.get("project_id")
-                # Add any additional metadata
-                for key, value in file_metadata.items():
-                    if key not in ["file_id", "project_id"]:
-                        chunk.metadata.extra[key] = value
-
-        return chunks
+        return results.get(strategy, [])
 
     def chunk_file(
         self,
@@ -125,8 +131,10 @@ class ChunkingService:
         chunk_metadatas = []
 
         for i, chunk in enumerate(chunks):
-            # Generate unique chunk ID
-            chunk_id = f"{chunk.metadata.extra.get('file_hash', 'unknown')}_{i}"
+            # Keyed on the per-upload file ID: re-uploading a file with the same
+            # name must not collide with (and be dropped in favour of) old chunks
+            prefix = chunk.metadata.file_id or chunk.metadata.extra.get("file_hash", "unknown")
+            chunk_id = f"{prefix}_{i}"
             chunk_ids.append(chunk_id)
             chunk_texts.append(chunk.text)
 
@@ -144,6 +152,9 @@ class ChunkingService:
                 "created_at": datetime.now().isoformat(),
             }
 
+            if chunk.metadata.token_count is not None:
+                metadata["token_count"] = chunk.metadata.token_count
+
             # Add any extra metadata
             metadata.update(chunk.metadata.extra)
             chunk_metadatas.append(metadata)
@@ -0,0 +1,79 @@
+"""
+In-flight request coalescing for the RAG service.
+When identical work is requested while the same work is already running, the
+later callers (followers) wait for the first caller's (the leader's) result
+instead of repeating it. /api/ask coalesces on (project, normalized question,
+deadline), so a burst of the same question costs one embed, search, rerank and
+LLM completion. Coalescing is per worker process and only covers requests that
+overlap in time; nothing is cached afterwards.
+"""
+
+import asyncio
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from backend.services.metrics import metrics
+
+COALESCED = metrics.counter(
+    "rag_coalesced_requests_total",
+    "Requests answered by waiting for an identical request already in flight",
+    ("operation",),
+)
+COALESCE_IN_FLIGHT = metrics.gauge(
+    "rag_coalesce_in_flight", "Distinct coalescable operations in flight", ("operation",)
+)
+
+
+def normalize_question(question: str) -> str:
+    """Case-fold and collapse whitespace so trivially different questions match."""
+    return " ".join(unicodedata.normalize("NFKC", question).casefold().split())
+
+
+class RequestCoalescer:
+    """Runs at most one operation per key at a time and shares its result."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(
+        self, key: Hashable, factory: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run factory() for key, or wait for the run already in progress.
+
+        Args:
+            key: Identifies identical work
+            factory: Starts the work; only called by the leader
+
+        Returns:
+            The result and whether this caller was a follower
+        """
+        task = self._in_flight.get(key)
+        follower = task is not None
+        if follower:
+            COALESCED.inc(operation=self.operation)
+        else:
+            # A separate task, so the leader's client disconnecting does not
+            # cancel the work its followers are waiting for
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            COALESCE_IN_FLIGHT.inc(operation=self.operation)
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), follower
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        COALESCE_IN_FLIGHT.dec(operation=self.operation)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+
+# Global instance
+ask_coalescer = RequestCoalescer("ask")
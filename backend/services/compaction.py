@@ -0,0 +1,294 @@
+"""
+Vector index compaction for the RAG service.
+ChromaDB marks deleted vectors as tombstones in its HNSW index instead of
+removing them, so after heavy deletes and re-ingestion the index holds far more
+elements than live chunks, and query latency and disk use drift upward.
+
+Compaction measures this per collection and, past COMPACTION_THRESHOLD, copies
+the live chunks into a fresh collection and swaps it in through the collection
+alias (see vector_store.py). Reads keep going to the old collection until the
+swap. Ids written during the copy are recorded by the vector store's write gate
+and replayed onto the new collection from the old one's current contents; the
+last replay and the swap run with writes paused, so no write is lost. Writes
+are only seen when made in the compacting process, which is why compaction
+runs in the process that owns the collection.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from backend.config import Config
+from backend.services.vector_store import (
+    get_chroma_client,
+    physical_collection_name,
+    read_collection_aliases,
+    write_collection_alias,
+    write_gate,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPACTED_SUFFIX = "__compact_"
+COMPACTION_LOG_FILE = "compaction_log.jsonl"
+
+# Persisted hnswlib header, preceded by ChromaDB's format version
+HNSW_HEADER = struct.Struct("<iQQQQQQiIQQQdQ")
+HNSW_ELEMENT_COUNT_FIELD = 3
+
+_compaction_lock = threading.Lock()
+
+
+def _persist_directory(persist_directory: Optional[str]) -> str:
+    return persist_directory or Config.CHROMA_PERSIST_DIRECTORY
+
+
+def _vector_segment_dir(collection_id: str, persist_directory: str) -> Optional[str]:
+    db_path = os.path.join(persist_directory, "chroma.sqlite3")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        row = conn.execute(
+            "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'",
+            (collection_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+    return os.path.join(persist_directory, row[0]) if row else None
+
+
+def _hnsw_element_count(segment_dir: Optional[str]) -> Optional[int]:
+    """Elements stored in the persisted HNSW index, tombstones included."""
+    if not segment_dir:
+        return None
+    try:
+        with open(os.path.join(segment_dir, "header.bin"), "rb") as f:
+            header = f.read()
+    except FileNotFoundError:
+        # Not flushed to disk yet
+        return None
+    if len(header) != HNSW_HEADER.size:
+        return None
+    return HNSW_HEADER.unpack(header)[HNSW_ELEMENT_COUNT_FIELD]
+
+
+def _dir_size(path: Optional[str]) -> int:
+    if not path or not os.path.isdir(path):
+        return 0
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def collection_stats(
+    collection_name: Optional[str] = None, persist_directory: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Measure index fragmentation for a logical collection.
+
+    Args:
+        collection_name: Logical collection name (default CHROMA_COLLECTION_NAME)
+        persist_directory: ChromaDB directory (default CHROMA_PERSIST_DIRECTORY)
+
+    Returns:
+        Live chunk count, elements stored in the HNSW index, the deleted share
+        of the index (fragmentation) and the index size on disk
+    """
+    persist_directory = _persist_directory(persist_directory)
+    name = collection_name or Config.CHROMA_COLLECTION_NAME
+    physical_name = physical_collection_name(name, persist_directory)
+    collection = get_chroma_client(persist_directory).get_collection(physical_name)
+    live = collection.count()
+    segment_dir = _vector_segment_dir(str(collection.id), persist_directory)
+    stored = _hnsw_element_count(segment_dir)
+    fragmentation = 1.0 - live / stored if stored else 0.0
+    return {
+        "collection": name,
+        "physical_collection": physical_name,
+        "live_chunks": live,
+        "index_elements": stored,
+        "fragmentation": round(max(fragmentation, 0.0), 4),
+        "index_bytes": _dir_size(segment_dir),
+    }
+
+
+def list_logical_collections(persist_directory: Optional[str] = None) -> List[str]:
+    """Logical names of all collections, hiding compacted physical copies."""
+    persist_directory = _persist_directory(persist_directory)
+    aliases = read_collection_aliases(persist_directory)
+    physical = {c.name for c in get_chroma_client(persist_directory).list_collections()}
+    names = {n for n in physical if COMPACTED_SUFFIX not in n} - set(aliases.values())
+    return sorted(names | {n for n, target in aliases.items() if target in physical})
+
+
+def measure_query_latency(collection, samples: int = 20, n_results: int = 10) -> Optional[float]:
+    """Median query latency in milliseconds, using stored embeddings as queries."""
+    stored = collection.get(limit=samples, include=["embeddings"])["embeddings"]
+    if stored is None or len(stored) == 0:
+        return None
+    timings = []
+    for embedding in stored:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[embedding], n_results=n_results, include=[])
+        timings.append(time.perf_counter() - start)
+    return round(float(np.median(timings)) * 1000, 3)
+
+
+def _all_ids(collection, batch_size: int) -> Set[str]:
+    ids: Set[str] = set()
+    offset = 0
+    while True:
+        batch = collection.get(include=[], limit=batch_size, offset=offset)["ids"]
+        if not batch:
+            return ids
+        ids.update(batch)
+        offset += len(batch)
+
+
+def _copy_ids(source, target, ids: List[str], batch_size: int) -> None:
+    for start in range(0, len(ids), batch_size):
+        records = source.get(
+            ids=ids[start : start + batch_size],
+            include=["embeddings", "documents", "metadatas"],
+        )
+        if records["ids"]:
+            target.upsert(
+                ids=records["ids"],
+                embeddings=records["embeddings"],
+                documents=records["documents"],
+                metadatas=records["metadatas"],
+            )
+
+
+def _replay_changes(source, target, written: Set[str], batch_size: int) -> None:
+    """Make target match source for ids written on source during the copy."""
+    ids = sorted(written)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start : start + batch_size]
+        records = source.get(ids=batch, include=["embeddings", "documents", "metadatas"])
+        if records["ids"]:
+            # Upsert, not add: a re-added id must take its new content
+            target.upsert(
+                ids=records["ids"],
+                embeddings=records["embeddings"],
+                documents=records["documents"],
+                metadatas=records["metadatas"],
+            )
+        removed = sorted(set(batch) - set(records["ids"]))
+        if removed:
+            target.delete(ids=removed)
+
+
+def _record(report: Dict[str, Any], persist_directory: str) -> None:
+    logger.info("Compaction report: %s", json.dumps(report))
+    with open(os.path.join(persist_directory, COMPACTION_LOG_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+
+
+def compact_collection(
+    collection_name: Optional[str] = None,
+    persist_directory: Optional[str] = None,
+    grace_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Rebuild a collection into a fresh copy and swap it in.
+
+    Args:
+        collection_name: Logical collection name (default CHROMA_COLLECTION_NAME)
+        persist_directory: ChromaDB directory (default CHROMA_PERSIST_DIRECTORY)
+        grace_seconds: How long the old collection is kept after the swap for
+            requests that already hold it (default COMPACTION_GRACE_SECONDS)
+
+    Returns:
+        Report with before/after stats and query latency, also appended to
+        compaction_log.jsonl in the persist directory
+    """
+    persist_directory = _persist_directory(persist_directory)
+    name = collection_name or Config.CHROMA_COLLECTION_NAME
+    grace_seconds = Config.COMPACTION_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    batch_size = Config.COMPACTION_BATCH_SIZE
+    client = get_chroma_client(persist_directory)
+
+    with _compaction_lock:
+        start = time.perf_counter()
+        before = collection_stats(name, persist_directory)
+        old = client.get_collection(before["physical_collection"])
+        before["query_p50_ms"] = measure_query_latency(old)
+
+        new_name = f"{name}{COMPACTED_SUFFIX}{int(time.time())}"
+        new = client.create_collection(new_name, metadata=old.metadata)
+        try:
+            with write_gate.paused():
+                # Listed with writes paused, so offset paging cannot skip ids
+                ids = _all_ids(old, batch_size)
+                write_gate.start_recording(old.name)
+            _copy_ids(old, new, sorted(ids), batch_size)
+            # Catch up while writes continue, then finish with them paused
+            _replay_changes(old, new, write_gate.drain(old.name), batch_size)
+            with write_gate.paused():
+                _replay_changes(old, new, write_gate.drain(old.name), batch_size)
+                write_collection_alias(name, new_name, persist_directory)
+        except Exception:
+            client.delete_collection(new_name)
+            raise
+        finally:
+            write_gate.stop_recording(old.name)
+        logger.info("Swapped %s from %s to %s", name, old.name, new_name)
+
+        # Writes now go to the new collection; let reads already running
+        # against the old one finish before dropping it
+        time.sleep(grace_seconds)
+        client.delete_collection(old.name)
+
+        after = collection_stats(name, persist_directory)
+        after["query_p50_ms"] = measure_query_latency(new)
+        report = {
+            "collection": name,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_seconds": round(time.perf_counter() - start, 3),
+            "before": before,
+            "after": after,
+        }
+        _record(report, persist_directory)
+        return report
+
+
+def compact_if_needed(
+    threshold: Optional[float] = None, persist_directory: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Compact every collection whose fragmentation is at or above threshold."""
+    threshold = Config.COMPACTION_THRESHOLD if threshold is None else threshold
+    reports = []
+    for name in list_logical_collections(persist_directory):
+        stats = collection_stats(name, persist_directory)
+        logger.info(
+            "Collection %s: %d live chunks, %s index elements, fragmentation %.2f",
+            name,
+            stats["live_chunks"],
+            stats["index_elements"],
+            stats["fragmentation"],
+        )
+        if stats["live_chunks"] and stats["fragmentation"] >= threshold:
+            reports.append(compact_collection(name, persist_directory))
+    return reports
+
+
+def start_compaction_scheduler(interval_seconds: Optional[int] = None) -> threading.Thread:
+    """Check for fragmented collections every interval in a daemon thread."""
+    interval_seconds = interval_seconds or Config.COMPACTION_INTERVAL_SECONDS
+
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                compact_if_needed()
+            except Exception as e:
+                logger.error("Scheduled compaction failed: %s", e)
+
+    thread = threading.Thread(target=run, name="compaction", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,139 @@
+"""
+Latency budgets for /api/ask.
+A request's deadline comes from the X-Deadline-Ms header or ASK_DEADLINE_MS and
+is counted from when the request arrived, including time spent queued for
+admission. Before each optional stage, answer_question compares the remaining
+budget with what that stage has recently cost and degrades in order: fewer
+rerank candidates, a smaller context, then a retrieval-only answer.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.config import Config
+from backend.services.metrics import metrics
+
+DEADLINE_HEADER = "x-deadline-ms"
+
+# Degradations reported in the ask response
+RERANK_REDUCED = "rerank_candidates_reduced"
+RERANK_SKIPPED = "rerank_skipped"
+CONTEXT_REDUCED = "context_reduced"
+RETRIEVAL_ONLY = "retrieval_only"
+LLM_TIMEOUT = "llm_timeout"
+
+# Share of the full LLM cost expected with a reduced context and half the max_tokens
+REDUCED_LLM_COST = 0.5
+
+DEGRADATIONS = metrics.counter(
+    "rag_ask_degradations_total",
+    "Questions answered with a shortened pipeline to meet their deadline",
+    ("degradation",),
+)
+
+
+class StageEstimates:
+    """Moving averages of recent stage costs, per item where a stage is batched."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self._per_item: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, items: int = 1) -> None:
+        if items <= 0:
+            return
+        value = seconds / items
+        with self._lock:
+            previous = self._per_item.get(stage)
+            self._per_item[stage] = (
+                value if previous is None else previous + self.alpha * (value - previous)
+            )
+
+    def estimate(self, stage: str, items: int = 1) -> float:
+        """Expected seconds for a stage; 0 until it has been observed."""
+        return self._per_item.get(stage, 0.0) * items
+
+
+class Deadline:
+    """A latency budget measured from a start time."""
+
+    def __init__(self, budget_ms: int, start: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self.start = time.perf_counter() if start is None else start
+        self.expires = self.start + budget_ms / 1000
+
+    def remaining(self) -> float:
+        """Seconds left, negative once the deadline has passed."""
+        return self.expires - time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.start) * 1000, 3)
+
+
+def request_deadline(headers, start: Optional[float] = None) -> Optional[Deadline]:
+    """
+    Deadline for a request from its X-Deadline-Ms header or ASK_DEADLINE_MS.
+
+    Args:
+        headers: Request headers
+        start: perf_counter() time the request arrived (default now)
+
+    Returns:
+        The deadline, or None when the request has no budget
+
+    Raises:
+        ValueError: If the header is not a positive integer
+    """
+    value = headers.get(DEADLINE_HEADER)
+    if value is None:
+        budget_ms = Config.ASK_DEADLINE_MS
+    else:
+        budget_ms = int(value)
+        if budget_ms <= 0:
+            raise ValueError(value)
+    return Deadline(budget_ms, start) if budget_ms > 0 else None
+
+
+def rerank_budget(deadline: Deadline, candidates: int) -> int:
+    """
+    How many candidates to rerank while leaving time for the LLM.
+
+    Args:
+        deadline: The request's deadline
+        candidates: Candidates retrieved from the vector store
+
+    Returns:
+        All candidates when they fit, otherwise as many as fit (at least
+        ASK_MIN_RERANK_CANDIDATES if those fit in what is left), or 0 to skip
+    """
+    per_pair = stage_estimates.estimate("rerank")
+    if per_pair <= 0:
+        return candidates
+    remaining = deadline.remaining()
+    affordable = int((remaining - stage_estimates.estimate("llm")) / per_pair)
+    if affordable >= candidates:
+        return candidates
+    minimum = min(Config.ASK_MIN_RERANK_CANDIDATES, candidates)
+    if affordable >= minimum:
+        return affordable
+    # The LLM will have to be cut back anyway; keep a minimal rerank if it fits
+    return minimum if remaining >= per_pair * minimum else 0
+
+
+def llm_plan(deadline: Deadline) -> str:
+    """Whether the LLM call fits: "full", "reduced" context, or "skip"."""
+    remaining = deadline.remaining()
+    expected = stage_estimates.estimate("llm")
+    if remaining <= 0:
+        return "skip"
+    if remaining >= expected:
+        return "full"
+    if remaining >= expected * REDUCED_LLM_COST:
+        return "reduced"
+    return "skip"
+
+
+# Global instance
+stage_estimates = StageEstimates()
@@ -3,34 +3,33 @@ import json
 import asyncio
 from typing import List, Dict, Any, Optional
 from pathlib import Path
-import chromadb
-from chromadb.config import Settings
 import hashlib
 from datetime import datetime
 
 # Import local modules
+from backend.config import Config
 from backend.file_conversion import convert_to_pdf
 from backend.metadata_store import add_file, update_file_status
 from backend.services.chunking_service import chunking_service
+from backend.services.events import event_broadcaster
+from backend.services.metrics import BATCH_SIZE, ITEMS_PROCESSED, track_stage
+from backend.services.models import get_bi_encoder
+from backend.services.vector_store import get_collection
 from backend.hybrid_chunking import ChunkingStrategy
 
 
 class EmbeddingPipeline:
-    def __init__(self, chroma_persist_directory: str = "./chroma_db_test"):
-        """Initialize the embedding pipeline with ChromaDB client."""
-        self.chroma_persist_directory = chroma_persist_directory
-        self.client = chromadb.Client(settings=Settings(anonymized_telemetry=False))
-        # Removed MetadataStore usage
-
-        # Get or create collections
-        self.documents_collection = self.client.get_or_create_collection(
-            name="documents", metadata={"hnsw:space": "cosine"}
+    def __init__(self, chroma_persist_directory: Optional[str] = None):
+        """Initialize the embedding pipeline; ChromaDB is opened on first use."""
+        self.chroma_persist_directory = (
+            chroma_persist_directory or Config.CHROMA_PERSIST_DIRECTORY
         )
 
-    def _generate_chunk_id(self, file_path: str, chunk_index: int) -> str:
-        """Generate a unique ID for a chunk."""
-        file_hash = hashlib.md5(file_path.encode()).hexdigest()
-        return f"{file_hash}_{chunk_index}"
+    @property
+    def documents_collection(self):
+        """The shared documents collection, created with its HNSW parameters."""
+        # Resolved on each use so a compaction swap is picked up
+        return get_collection(Config.CHROMA_COLLECTION_NAME, self.chroma_persist_directory)
 
     def _extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file using pdfplumber (consistent with main.py)."""
@@ -74,12 +73,21 @@ class EmbeddingPipeline:
         Returns:
             Dictionary with processing results
         """
+        def publish_stage(stage: str, **data):
+            event_broadcaster.publish(
+                "file_stage", fileId=file_id, projectId=project_id, stage=stage, **data
+            )
+
         try:
             # Convert file to PDF if needed
-            pdf_path = convert_to_pdf(file_path)
+            publish_stage("converting")
+            with track_stage("convert_to_pdf"):
+                pdf_path = convert_to_pdf(file_path)
 
             # Extract text from PDF
-            text = self._extract_text_from_pdf(pdf_path)
+            publish_stage("extracting")
+            with track_stage("pdf_extract"):
+                text = self._extract_text_from_pdf(pdf_path)
 
             if not text.strip():
                 return {
@@ -99,13 +107,16 @@ class EmbeddingPipeline:
             }
 
             # Use unified chunking service
-            chunks = chunking_service.chunk_text(
-                text=text,
-                strategy=strategy,
-                chunk_size=chunk_size,
-                overlap=overlap,
-                file_metadata=file_metadata,
-            )
+            publish_stage("chunking", textLength=len(text))
+            with track_stage("chunking"):
+                chunks = chunking_service.chunk_text(
+                    text=text,
+                    strategy=strategy,
+                    chunk_size=chunk_size,
+                    overlap=overlap,
+                    file_metadata=file_metadata,
+                )
+            ITEMS_PROCESSED.inc(len(chunks), kind="chunks_created")
 
             if not chunks:
                 return {
@@ -117,19 +128,28 @@ class EmbeddingPipeline:
             # Prepare chunks for embedding and storage
             chunk_data = chunking_service.prepare_chunks_for_embedding(chunks)
 
-            # Generate embeddings for chunks (using sentence-transformers)
-            from sentence_transformers import SentenceTransformer
-
-            embedder = SentenceTransformer("all-MiniLM-L6-v2")
-            embeddings = embedder.encode(chunk_data["texts"])
-
-            # Store in ChromaDB with embeddings
-            self.documents_collection.add(
-                ids=chunk_data["ids"],
-                embeddings=embeddings.tolist(),
-                documents=chunk_data["texts"],
-                metadatas=chunk_data["metadatas"],
-            )
+            # Embed and store in batches, reporting progress after each one
+            embedder = get_bi_encoder()
+            collection = self.documents_collection
+            total = len(chunk_data["ids"])
+            batch_size = Config.EMBEDDING_BATCH_SIZE
+            publish_stage("embedding", chunks=total, embedded=0)
+            for start in range(0, total, batch_size):
+                end = min(start + batch_size, total)
+                BATCH_SIZE.observe(end - start, operation="encode")
+                with track_stage("encode", batch_size=end - start):
+                    embeddings = embedder.encode(chunk_data["texts"][start:end])
+                ITEMS_PROCESSED.inc(end - start, kind="texts_embedded")
+                BATCH_SIZE.observe(end - start, operation="collection_add")
+                with track_stage("collection_add", batch_size=end - start):
+                    collection.add(
+                        ids=chunk_data["ids"][start:end],
+                        embeddings=embeddings.tolist(),
+                        documents=chunk_data["texts"][start:end],
+                        metadatas=chunk_data["metadatas"][start:end],
+                    )
+                ITEMS_PROCESSED.inc(end - start, kind="chunks_stored")
+                publish_stage("embedding", chunks=total, embedded=end)
 
             # Get chunking statistics
             stats = chunking_service.get_chunking_stats(chunks)
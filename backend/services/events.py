@@ -0,0 +1,271 @@
+"""
+Ingestion event broadcasting for the RAG service.
+One shared broadcaster fans out file stage transitions and chunk/embedding
+progress to Server-Sent Events subscribers (see /api/events in main.py).
+
+Publishing is thread-safe and cheap while nobody is subscribed. Each
+subscriber has a bounded queue; a client that falls behind loses its oldest
+events rather than holding up ingestion. Recent events are kept so a client
+that reconnects with Last-Event-ID catches up on what it missed.
+
+With EVENTS_DB set (backend.serve sets it for its workers), events go through
+a small SQLite log shared by every worker process instead, so a stream sees
+uploads handled by any worker. One relay thread per process writes published
+events to the log and hands new ones to that process's subscribers; event ids
+come from the log, so Last-Event-ID also works across workers.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the shared log for other workers' events
+SHARED_POLL_INTERVAL = 0.2
+
+
+class Subscription:
+    """One subscriber's queue, bound to the event loop that reads it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, project_id: Optional[str], max_queue: int):
+        self.loop = loop
+        self.project_id = project_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        # Shared log only: events after this id are still to be replayed
+        self.replay_after: Optional[int] = None
+        self.live = False
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        return self.project_id is None or event.get("projectId") == self.project_id
+
+    def _put(self, item: Tuple[int, Dict[str, Any]]) -> None:
+        # Runs on the subscriber's loop; drop the oldest event when full
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+
+class EventBroadcaster:
+    """Fan out ingestion events to all current subscribers."""
+
+    def __init__(self, history_size: int = 256, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscriptions: List[Subscription] = []
+        self._history: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, **data: Any) -> None:
+        """Publish an event from any thread."""
+        event = {"type": event_type, "timestamp": time.time(), **data}
+        with self._lock:
+            item = (next(self._ids), event)
+            self._history.append(item)
+            subscriptions = [s for s in self._subscriptions if s.wants(event)]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, item)
+            except RuntimeError:
+                # Subscriber's loop already closed
+                self.unsubscribe(subscription)
+
+    def subscribe(
+        self, project_id: Optional[str] = None, last_event_id: Optional[int] = None
+    ) -> Subscription:
+        """Register a subscriber on the running loop, replaying missed events."""
+        subscription = Subscription(asyncio.get_running_loop(), project_id, self.max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                for item in self._history:
+                    if item[0] > last_event_id and subscription.wants(item[1]):
+                        subscription._put(item)
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    @property
+    def queued_events(self) -> int:
+        """Events waiting to be sent, across all subscribers."""
+        return sum(s.queue.qsize() for s in list(self._subscriptions))
+
+
+class SharedEventBroadcaster(EventBroadcaster):
+    """
+    Broadcaster whose events pass through a SQLite log shared by all workers.
+
+    publish() only queues the event; the relay thread does all SQLite work, so
+    neither the event loop nor ingestion waits on the database.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        history_size: int = 256,
+        max_queue: int = 1000,
+        poll_interval: float = SHARED_POLL_INTERVAL,
+    ):
+        super().__init__(history_size, max_queue)
+        self.db_path = db_path
+        self.history_size = history_size
+        self.poll_interval = poll_interval
+        self._outbox: List[Dict[str, Any]] = []
+        self._wakeup = threading.Event()
+        self._relay: Optional[threading.Thread] = None
+        self._relay_pid: Optional[int] = None
+
+    def _ensure_relay(self) -> None:
+        # Started lazily, and again in each forked worker
+        with self._lock:
+            if self._relay is not None and self._relay_pid == os.getpid():
+                return
+            self._relay_pid = os.getpid()
+            self._relay = threading.Thread(
+                target=self._run_relay, name="event-relay", daemon=True
+            )
+            self._relay.start()
+
+    def publish(self, event_type: str, **data: Any) -> None:
+        """Queue an event for the shared log; never blocks on the database."""
+        event = {"type": event_type, "timestamp": time.time(), **data}
+        with self._lock:
+            self._outbox.append(event)
+        self._ensure_relay()
+        self._wakeup.set()
+
+    def subscribe(
+        self, project_id: Optional[str] = None, last_event_id: Optional[int] = None
+    ) -> Subscription:
+        """Register a subscriber; the relay replays missed events before live ones."""
+        subscription = Subscription(asyncio.get_running_loop(), project_id, self.max_queue)
+        subscription.replay_after = last_event_id
+        with self._lock:
+            self._subscriptions.append(subscription)
+        self._ensure_relay()
+        self._wakeup.set()
+        return subscription
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS events "
+            "(id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)"
+        )
+        return conn
+
+    def _write(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            events, self._outbox = self._outbox, []
+        if not events:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for event in events:
+                conn.execute("INSERT INTO events (payload) VALUES (?)", (json.dumps(event),))
+            # AUTOINCREMENT never reuses ids, so trimming keeps them monotonic
+            conn.execute(
+                "DELETE FROM events WHERE id <= last_insert_rowid() - ?", (self.history_size,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            with self._lock:
+                self._outbox[:0] = events
+            raise
+
+    @staticmethod
+    def _read(conn: sqlite3.Connection, after: int, up_to: Optional[int] = None):
+        if up_to is None:
+            rows = conn.execute(
+                "SELECT id, payload FROM events WHERE id > ? ORDER BY id", (after,)
+            )
+        else:
+            rows = conn.execute(
+                "SELECT id, payload FROM events WHERE id > ? AND id <= ? ORDER BY id",
+                (after, up_to),
+            )
+        return [(event_id, json.loads(payload)) for event_id, payload in rows]
+
+    def _deliver(self, subscription: Subscription, item: Tuple[int, Dict[str, Any]]) -> None:
+        if not subscription.wants(item[1]):
+            return
+        try:
+            subscription.loop.call_soon_threadsafe(subscription._put, item)
+        except RuntimeError:
+            # Subscriber's loop already closed
+            self.unsubscribe(subscription)
+
+    def _relay_once(self, conn: sqlite3.Connection, cursor: int) -> int:
+        """Write queued events, then replay and deliver; returns the new cursor."""
+        self._write(conn)
+        latest = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            # Nobody here to deliver to; skip what was published meanwhile
+            return latest
+        # Only this thread delivers, so new subscribers get exactly the
+        # events up to the cursor from the replay and the rest live
+        for subscription in subscriptions:
+            if not subscription.live:
+                if subscription.replay_after is not None:
+                    for item in self._read(conn, subscription.replay_after, cursor):
+                        self._deliver(subscription, item)
+                subscription.live = True
+        items = self._read(conn, cursor)
+        for item in items:
+            for subscription in subscriptions:
+                self._deliver(subscription, item)
+        return items[-1][0] if items else cursor
+
+    def _run_relay(self) -> None:
+        conn = None
+        cursor = None
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                if conn is None:
+                    conn = self._connect()
+                if cursor is None:
+                    # Live delivery starts with events published from now on
+                    cursor = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+                cursor = self._relay_once(conn, cursor)
+            except sqlite3.Error:
+                # Queued events stay queued; retry on the next round
+                logger.exception("Event relay failed on %s", self.db_path)
+                conn = None
+
+
+def format_sse(event_id: int, event: Dict[str, Any]) -> str:
+    """Format one event as a Server-Sent Events message."""
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+# Global instance
+event_broadcaster = (
+    SharedEventBroadcaster(Config.EVENTS_DB) if Config.EVENTS_DB else EventBroadcaster()
+)
@@ -0,0 +1,494 @@
+"""
+Dedicated inference processes for the bi-encoder and cross-encoder.
+
+When INFERENCE_WORKERS > 0, model inference runs in separate processes that own
+the models, optionally pinned to INFERENCE_CPU_AFFINITY, instead of competing
+with request handling in the web process. Texts are sent to a worker over its
+pipe, and the worker writes the resulting embeddings or scores straight into
+a shared memory buffer allocated by the caller, so result arrays are never
+pickled. Workers that exit are replaced, and calls fail with TimeoutError
+after INFERENCE_TIMEOUT_SECONDS instead of hanging.
+
+Under backend.serve one pool runs in its own process, started by the launcher,
+and every web worker reaches it through RemoteInferencePool at
+INFERENCE_POOL_ADDRESS (a multiprocessing manager socket, as for the vector
+store owner).
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from multiprocessing.managers import BaseManager
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
+RESULT_DTYPE = np.float32
+
+
+def parse_cpu_list(spec: str) -> Optional[List[int]]:
+    """Parse a CPU list such as "0-3,6" into [0, 1, 2, 3, 6]."""
+    if not spec.strip():
+        return None
+    cpus = []
+    for part in spec.split(","):
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            cpus.append(int(part))
+    return cpus
+
+
+def _inference_worker(worker_id, conn, cpus: Optional[List[int]]) -> None:
+    """Worker loop: load the models once, then serve encode/predict requests."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    try:
+        from sentence_transformers import CrossEncoder, SentenceTransformer
+
+        if cpus:
+            import torch
+
+            torch.set_num_threads(len(cpus))
+
+        bi_encoder = SentenceTransformer(Config.EMBEDDING_MODEL)
+        cross_encoder = CrossEncoder(Config.CROSS_ENCODER_MODEL)
+    except Exception as e:
+        conn.send(("failed", worker_id, f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", worker_id, bi_encoder.get_sentence_embedding_dimension()))
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        request_id, op, inputs, kwargs, shm_name, shape = request
+        try:
+            if op == "encode":
+                kwargs = {**kwargs, "convert_to_numpy": True}
+                output = bi_encoder.encode(inputs, **kwargs)
+            else:
+                output = cross_encoder.predict(inputs, **kwargs)
+            output = np.asarray(output, dtype=RESULT_DTYPE).reshape(shape)
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                np.ndarray(shape, dtype=RESULT_DTYPE, buffer=shm.buf)[...] = output
+            finally:
+                shm.close()
+            conn.send(("done", request_id, None))
+        except Exception as e:
+            conn.send(("error", request_id, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """One inference process and the requests it has been sent."""
+
+    def __init__(self, slot: int, process, conn):
+        self.slot = slot
+        self.process = process
+        self.conn = conn
+        self.ready = False
+        self.alive = True
+        self.assigned: Set[int] = set()
+        # Connections are not safe for concurrent sends
+        self.send_lock = threading.Lock()
+
+
+class InferencePool:
+    """
+    Process pool that owns the models and returns arrays via shared memory.
+
+    Each worker has its own pipe, and requests go to the ready worker with the
+    fewest in flight. A dispatcher thread reads results and watches the worker
+    processes: when one exits, its in-flight requests fail, their shared
+    memory is released and, if it had started successfully, it is replaced.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        cpus: Optional[List[int]] = None,
+        start_timeout: Optional[float] = None,
+    ):
+        self._ctx = multiprocessing.get_context("spawn")
+        self._cpus = cpus
+        self._pending: Dict[int, Tuple[Future, Optional[shared_memory.SharedMemory], tuple]] = {}
+        self._backlog: Deque[tuple] = deque()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._closing = False
+        self._failed: Set[int] = set()
+        self.embedding_dimension = 0
+        # Wakes the dispatcher when the set of workers changes
+        self._wakeup_reader, self._wakeup_writer = self._ctx.Pipe(duplex=False)
+        self._workers: List[Optional[_Worker]] = [None] * num_workers
+        for slot in range(num_workers):
+            self._start_worker(slot)
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="inference-results", daemon=True
+        )
+        self._dispatcher.start()
+        # The first loaded worker tells us the embedding size
+        start_timeout = (
+            Config.INFERENCE_START_TIMEOUT_SECONDS if start_timeout is None else start_timeout
+        )
+        if not self._ready.wait(start_timeout) or not self.embedding_dimension:
+            self.close()
+            raise RuntimeError("Inference workers failed to start")
+
+    def _start_worker(self, slot: int) -> None:
+        conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_inference_worker,
+            args=(slot, child_conn, self._cpus),
+            name=f"inference-{slot}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        with self._lock:
+            self._workers[slot] = _Worker(slot, process, conn)
+        self._wakeup_writer.send(None)
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock:
+                workers = [w for w in self._workers if w is not None and w.alive]
+            conns = {w.conn: w for w in workers}
+            sentinels = {w.process.sentinel: w for w in workers}
+            ready = wait(list(conns) + list(sentinels) + [self._wakeup_reader])
+            # Results first, so a worker that answered and then exited is not
+            # blamed for the request it answered
+            for conn in ready:
+                if conn in conns:
+                    try:
+                        self._handle(conns[conn], conn.recv())
+                    except (EOFError, OSError):
+                        pass  # the sentinel reports the exit
+            for sentinel in ready:
+                if sentinel in sentinels:
+                    self._worker_exited(sentinels[sentinel])
+            if self._wakeup_reader in ready:
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv()
+                if self._closing:
+                    break
+
+    def _handle(self, worker: _Worker, message: tuple) -> None:
+        kind, key, value = message
+        if kind == "ready":
+            self.embedding_dimension = value
+            with self._lock:
+                worker.ready = True
+                backlog = [request for request in self._backlog if request[0] in self._pending]
+                self._backlog.clear()
+                worker.assigned.update(request[0] for request in backlog)
+            for request in backlog:
+                self._send(worker, request)
+            self._ready.set()
+        elif kind == "failed":
+            logger.error("Inference worker %s failed to start: %s", key, value)
+        else:
+            with self._lock:
+                worker.assigned.discard(key)
+            self._complete(key, value if kind == "error" else None)
+
+    def _worker_exited(self, worker: _Worker) -> None:
+        # Pick up anything it sent before exiting
+        try:
+            while worker.conn.poll():
+                self._handle(worker, worker.conn.recv())
+        except (EOFError, OSError):
+            pass
+        worker.process.join()
+        with self._lock:
+            worker.alive = False
+            lost = list(worker.assigned)
+            worker.assigned.clear()
+        worker.conn.close()
+        error = f"Inference worker {worker.slot} exited with code {worker.process.exitcode}"
+        for request_id in lost:
+            self._complete(request_id, error)
+        if self._closing:
+            return
+        if not worker.ready:
+            # Failed while loading the models; restarting would fail the same way
+            self._failed.add(worker.slot)
+            if len(self._failed) == len(self._workers):
+                self._fail_backlog("No inference workers could be started")
+                self._ready.set()
+            return
+        logger.warning("%s; restarting it (%d requests failed)", error, len(lost))
+        self._start_worker(worker.slot)
+
+    def _fail_backlog(self, error: str) -> None:
+        with self._lock:
+            backlog = list(self._backlog)
+            self._backlog.clear()
+        for request in backlog:
+            self._complete(request[0], error)
+
+    def _complete(self, request_id: int, error: Optional[str]) -> None:
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return  # abandoned by a caller that timed out
+        future, shm, shape = entry
+        try:
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            elif shm is None:
+                future.set_result(None)
+            else:
+                view = np.ndarray(shape, dtype=RESULT_DTYPE, buffer=shm.buf)
+                future.set_result(view.copy())
+                del view
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    def _send(self, worker: _Worker, request: tuple) -> None:
+        try:
+            with worker.send_lock:
+                worker.conn.send(request)
+        except (OSError, ValueError):
+            # The worker is gone; its exit fails the request
+            pass
+
+    def _submit(
+        self, op: str, inputs: list, kwargs: Dict, shape: tuple, shm_name: Optional[str] = None
+    ) -> Future:
+        future: Future = Future()
+        shm = None
+        if shm_name is None:
+            nbytes = int(np.prod(shape)) * np.dtype(RESULT_DTYPE).itemsize
+            shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+            shm_name = shm.name
+        request_id = next(self._ids)
+        future.request_id = request_id
+        request = (request_id, op, inputs, kwargs, shm_name, shape)
+        with self._lock:
+            self._pending[request_id] = (future, shm, shape)
+            ready = [w for w in self._workers if w is not None and w.alive and w.ready]
+            worker = min(ready, key=lambda w: len(w.assigned)) if ready else None
+            if worker is None:
+                # Sent once a worker (re)starts
+                self._backlog.append(request)
+            else:
+                worker.assigned.add(request_id)
+        if worker is not None:
+            self._send(worker, request)
+        return future
+
+    def _result(self, future: Future, timeout: Optional[float]):
+        timeout = Config.INFERENCE_TIMEOUT_SECONDS if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout or None)
+        except FutureTimeoutError:
+            self._abandon(future.request_id)
+            raise TimeoutError(f"Inference request timed out after {timeout}s")
+
+    def _abandon(self, request_id: int) -> None:
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+        if entry is not None and entry[1] is not None:
+            entry[1].close()
+            entry[1].unlink()
+
+    @property
+    def pending(self) -> int:
+        """Requests submitted and not yet answered."""
+        return len(self._pending)
+
+    def dimension(self) -> int:
+        """The embedding size (embedding_dimension, as a method for proxies)."""
+        return self.embedding_dimension
+
+    def compute(
+        self, op: str, inputs: list, kwargs: Dict, shape: tuple, timeout: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Run "encode" or "predict" and wait for the result.
+
+        Args:
+            op: "encode" (bi-encoder) or "predict" (cross-encoder)
+            inputs: Texts, or (query, passage) pairs
+            kwargs: Model call keyword arguments
+            shape: Result shape
+            timeout: Seconds to wait (default INFERENCE_TIMEOUT_SECONDS, 0 = no limit)
+
+        Returns:
+            The float32 result array
+
+        Raises:
+            TimeoutError: If no result arrives in time
+            RuntimeError: If the model call failed or its worker exited
+        """
+        return self._result(self._submit(op, inputs, kwargs, shape), timeout)
+
+    def compute_into(
+        self,
+        op: str,
+        inputs: list,
+        kwargs: Dict,
+        shm_name: str,
+        shape: tuple,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Like compute(), writing the result into the caller's shared memory."""
+        self._result(self._submit(op, inputs, kwargs, shape, shm_name), timeout)
+
+    def close(self) -> None:
+        self._closing = True
+        with self._lock:
+            workers = [w for w in self._workers if w is not None and w.alive]
+        for worker in workers:
+            self._send(worker, None)
+        for worker in workers:
+            worker.process.join(timeout=10)
+        self._wakeup_writer.send(None)
+        self._dispatcher.join(timeout=10)
+        self._fail_backlog("Inference pool closed")
+
+
+class InferenceManager(BaseManager):
+    """Manager serving the inference pool from backend.serve's inference process."""
+
+
+def _serve_pool() -> InferencePool:
+    return get_inference_pool()
+
+
+InferenceManager.register(
+    "inference_pool", callable=_serve_pool, exposed=("compute_into", "dimension")
+)
+
+
+class RemoteInferencePool:
+    """
+    Client for the pool in backend.serve's inference process.
+
+    Texts travel over the manager socket; results are written by the inference
+    worker straight into shared memory allocated here, as with a local pool.
+    """
+
+    def __init__(self, address: str, authkey: str):
+        manager = InferenceManager(address=address, authkey=authkey.encode("utf-8"))
+        manager.connect()
+        # Proxies open one connection per calling thread, so one can be shared
+        self._pool = manager.inference_pool()
+        self.embedding_dimension = self._pool.dimension()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Requests from this process waiting for a result."""
+        return self._in_flight
+
+    def compute(
+        self, op: str, inputs: list, kwargs: Dict, shape: tuple, timeout: Optional[float] = None
+    ) -> np.ndarray:
+        """See InferencePool.compute."""
+        nbytes = int(np.prod(shape)) * np.dtype(RESULT_DTYPE).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self._pool.compute_into(op, inputs, kwargs, shm.name, shape, timeout)
+            return np.ndarray(shape, dtype=RESULT_DTYPE, buffer=shm.buf).copy()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            shm.close()
+            shm.unlink()
+
+
+class PooledBiEncoder:
+    """SentenceTransformer-compatible encode() backed by the inference pool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def encode(self, sentences, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        kwargs.pop("convert_to_numpy", None)
+        texts = [sentences] if single else list(sentences)
+        embeddings = self.pool.compute(
+            "encode", texts, kwargs, (len(texts), self.pool.embedding_dimension)
+        )
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.pool.embedding_dimension
+
+
+class PooledCrossEncoder:
+    """CrossEncoder-compatible predict() backed by the inference pool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def predict(self, sentences, **kwargs) -> np.ndarray:
+        if not sentences:
+            return np.empty(0, dtype=RESULT_DTYPE)
+        pairs = [list(pair) for pair in sentences]
+        return self.pool.compute("predict", pairs, kwargs, (len(pairs),))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def current_inference_pool():
+    """The inference pool if it has been started, without starting it."""
+    return _pool
+
+
+def get_inference_pool():
+    """
+    Start (once) and return the inference pool configured in Config: a client
+    for the shared pool when INFERENCE_POOL_ADDRESS is set, else a local pool.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if Config.INFERENCE_POOL_ADDRESS:
+                _pool = RemoteInferencePool(
+                    Config.INFERENCE_POOL_ADDRESS, Config.VECTOR_STORE_AUTHKEY
+                )
+            else:
+                cpus = parse_cpu_list(Config.INFERENCE_CPU_AFFINITY)
+                _pool = InferencePool(Config.INFERENCE_WORKERS, cpus)
+                logger.info(
+                    "Started %d inference workers (cpus=%s)", Config.INFERENCE_WORKERS, cpus
+                )
+        return _pool
+
+
+def run_inference_server(address: str, authkey: str) -> None:
+    """Start the inference pool and serve it on address until terminated."""
+    # This process runs the pool that INFERENCE_POOL_ADDRESS points clients at
+    Config.INFERENCE_POOL_ADDRESS = ""
+    # Load the models before accepting connections so failures surface early
+    get_inference_pool()
+    manager = InferenceManager(address=address, authkey=authkey.encode("utf-8"))
+    server = manager.get_server()
+    logger.info("Inference pool serving on %s", address)
+    server.serve_forever()
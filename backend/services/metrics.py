@@ -0,0 +1,249 @@
+"""
+Prometheus metrics for the RAG service.
+A small in-process registry of counters, gauges and histograms, rendered in
+the Prometheus text exposition format by GET /metrics (see main.py). Values
+that already live elsewhere, such as cache hit counts or queue lengths, are
+read at scrape time through collectors.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from backend.services.tracing import span
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers sub-millisecond tokenizer calls up to multi-minute conversions
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 300.0,
+)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+# Seconds; a healthy event loop stays in the first few buckets
+LOOP_LAG_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class: a named metric family with fixed label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metric families and scrape-time collectors."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before each scrape."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        for collect in list(self._collectors):
+            collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each ingestion and query stage",
+    ("stage",),
+)
+STAGE_ERRORS = metrics.counter(
+    "rag_stage_errors_total", "Stage calls that raised an exception", ("stage",)
+)
+BATCH_SIZE = metrics.histogram(
+    "rag_batch_size", "Items per model or vector store call", ("operation",), BATCH_SIZE_BUCKETS
+)
+ITEMS_PROCESSED = metrics.counter(
+    "rag_items_processed_total",
+    "Chunks created, texts embedded and chunks stored; rate() gives throughput",
+    ("kind",),
+)
+IN_FLIGHT = metrics.gauge(
+    "rag_in_flight", "Work currently being processed", ("kind",)
+)
+QUEUE_DEPTH = metrics.gauge(
+    "rag_queue_depth", "Items waiting in internal queues", ("queue",)
+)
+CACHE_REQUESTS = metrics.gauge(
+    "rag_cache_requests", "Cache lookups since startup", ("cache", "result")
+)
+CACHE_HIT_RATIO = metrics.gauge(
+    "rag_cache_hit_ratio", "Share of cache lookups that hit", ("cache",)
+)
+CACHE_ENTRIES = metrics.gauge("rag_cache_entries", "Entries held in the cache", ("cache",))
+EVENT_LOOP_LAG = metrics.histogram(
+    "rag_event_loop_lag_seconds",
+    "How late the event loop ran a scheduled wakeup; high values mean blocking calls",
+    buckets=LOOP_LAG_BUCKETS,
+)
+
+
+def observe_cache(name: str, stats: Dict[str, int]) -> None:
+    """Copy an LRUCache.get_stats() snapshot into the cache gauges."""
+    lookups = stats["hits"] + stats["misses"]
+    CACHE_REQUESTS.set(stats["hits"], cache=name, result="hit")
+    CACHE_REQUESTS.set(stats["misses"], cache=name, result="miss")
+    CACHE_HIT_RATIO.set(stats["hits"] / lookups if lookups else 0.0, cache=name)
+    CACHE_ENTRIES.set(stats["entries"], cache=name)
+
+
+@contextmanager
+def track_stage(stage: str, **attributes) -> Iterator[None]:
+    """Time one stage call, count it as an error if it raises, and trace it as a span."""
+    start = time.perf_counter()
+    try:
+        with span(stage, **attributes):
+            yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Sample event loop lag every interval seconds until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - start - interval, 0.0))
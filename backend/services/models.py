@@ -0,0 +1,73 @@
+"""
+Shared model instances for the RAG service.
+The bi-encoder and cross-encoder are loaded once per process, on first use, and
+reused by the API, the embedding pipeline and the chunker. With INFERENCE_WORKERS
+set, they are drop-in proxies for models owned by the inference process pool.
+"""
+
+import threading
+from typing import Any, Callable, Dict
+
+from backend.config import Config
+
+_models: Dict[str, Any] = {}
+_load_lock = threading.Lock()
+
+
+def _get_or_load(name: str, load: Callable[[], Any]) -> Any:
+    # Double-checked so a request racing the startup preload waits for it
+    model = _models.get(name)
+    if model is None:
+        with _load_lock:
+            model = _models.get(name)
+            if model is None:
+                model = load()
+                _models[name] = model
+    return model
+
+
+def _load_bi_encoder():
+    if Config.INFERENCE_WORKERS > 0:
+        from backend.services.inference_pool import PooledBiEncoder, get_inference_pool
+
+        return PooledBiEncoder(get_inference_pool())
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(Config.EMBEDDING_MODEL)
+
+
+def _load_cross_encoder():
+    if Config.INFERENCE_WORKERS > 0:
+        from backend.services.inference_pool import PooledCrossEncoder, get_inference_pool
+
+        return PooledCrossEncoder(get_inference_pool())
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(Config.CROSS_ENCODER_MODEL)
+
+
+def _load_llm_client():
+    import openai
+
+    return openai.OpenAI(api_key=Config.OPENAI_API_KEY or "sk-...your-key...")
+
+
+def get_bi_encoder():
+    """Get the shared sentence embedding model."""
+    return _get_or_load("bi_encoder", _load_bi_encoder)
+
+
+def get_cross_encoder():
+    """Get the shared cross-encoder used for reranking."""
+    return _get_or_load("cross_encoder", _load_cross_encoder)
+
+
+def get_llm_client():
+    """Get the shared OpenAI client used for answer generation."""
+    return _get_or_load("llm", _load_llm_client)
+
+
+def set_model(name: str, model: Any) -> None:
+    """Install an instance (e.g. a benchmark stub) as "bi_encoder", "cross_encoder" or "llm"."""
+    with _load_lock:
+        _models[name] = model
@@ -0,0 +1,365 @@
+"""
+On-demand request profiling for the RAG service.
+An admin arms the profiler for the next N requests to one endpoint (see the
+/api/admin/profiler endpoints in main.py). Each of those requests is profiled
+and saved to PROFILE_DIR, one capture per request:
+
+- "sampling" samples the stacks of every thread every PROFILE_SAMPLE_INTERVAL_MS
+  and writes collapsed stacks (.folded), one "frame;frame;frame count" line per
+  stack. flamegraph.pl, inferno and speedscope read this format directly. The
+  samples cover the event loop and the threadpool workers, so they include
+  anything else running at the same time. Idle threads are left out.
+- "deterministic" runs cProfile on the event loop thread and writes pstats
+  (.prof) for snakeviz or flameprof. Work handed to the threadpool is not seen,
+  and requests are profiled one at a time.
+
+Armed endpoints live in a small SQLite database in PROFILE_DIR, so arming,
+status and disarming reach every worker process under backend.serve and the
+N requests are counted across workers. Each worker re-reads whether anything
+is armed at most every ARMED_CHECK_INTERVAL seconds; between those reads the
+middleware checks one attribute and passes the request straight through. The
+reads and the claim of a profiling slot run in the threadpool, so the event
+loop never waits on SQLite.
+"""
+
+import cProfile
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.config import Config
+
+MODES = ("sampling", "deterministic")
+MAX_REQUESTS = 100
+ARMED_CHECK_INTERVAL = 0.5
+TARGETS_DB = "armed.db"
+CAPTURE_ID = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Capture:
+    """The profile of one request."""
+
+    def __init__(self, endpoint: str, mode: str):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.endpoint = endpoint
+        self.mode = mode
+        self.started_at = time.time()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.pid = os.getpid()
+        self.stacks: Counter = Counter()
+        self.profile: Optional[cProfile.Profile] = None
+        self._start = time.perf_counter()
+
+    def finish(self, status_code: Optional[int]) -> None:
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        self.status_code = status_code
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status_code": self.status_code,
+            "pid": self.pid,
+            "samples": sum(self.stacks.values()) if self.mode == "sampling" else None,
+            "file": self.id + (".folded" if self.mode == "sampling" else ".prof"),
+        }
+
+
+class StackSampler:
+    """Samples all thread stacks into the active captures while any are running."""
+
+    def __init__(self):
+        self._captures: List[Capture] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop: Optional[threading.Event] = None
+        self.interval = Config.PROFILE_SAMPLE_INTERVAL_MS / 1000
+
+    def add(self, capture: Capture) -> None:
+        with self._lock:
+            self._captures.append(capture)
+            if self._thread is None:
+                # Each sampler thread gets its own stop event, so a quick
+                # remove/add never leaves two threads running
+                self._stop = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stop,), name="profile-sampler", daemon=True
+                )
+                self._thread.start()
+
+    def remove(self, capture: Capture) -> None:
+        with self._lock:
+            self._captures.remove(capture)
+            if not self._captures and self._thread is not None:
+                self._stop.set()
+                self._thread = None
+
+    def _sample(self) -> List[str]:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            stacks.append(";".join(reversed(labels)))
+        return stacks
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            stacks = self._sample()
+            with self._lock:
+                for capture in self._captures:
+                    capture.stacks.update(stacks)
+
+
+class RequestProfiler:
+    """Arms endpoints for profiling and stores the resulting captures."""
+
+    def __init__(self, directory: str, check_interval: float = ARMED_CHECK_INTERVAL):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._db_path = os.path.join(directory, TARGETS_DB)
+        self._armed = False
+        self._checked_at = float("-inf")
+        # One connection per thread (and per process, since serve.py forks workers)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sampler = StackSampler()
+        self._deterministic_busy = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self._db_path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS targets "
+            "(endpoint TEXT PRIMARY KEY, remaining INTEGER NOT NULL, mode TEXT NOT NULL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @property
+    def armed(self) -> bool:
+        """Checked on every request; True if some endpoint was armed at the last check."""
+        return self._armed
+
+    def check_due(self) -> bool:
+        """True at most once per check_interval; the caller then runs refresh_armed()."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        return True
+
+    def refresh_armed(self) -> bool:
+        """Re-read whether any endpoint is armed in any worker (blocking)."""
+        try:
+            self._armed = os.path.exists(self._db_path) and bool(
+                self._connect().execute("SELECT 1 FROM targets LIMIT 1").fetchone()
+            )
+        except sqlite3.Error:
+            self._armed = False
+        return self._armed
+
+    def arm(self, endpoint: str, requests: int, mode: str) -> Dict[str, Any]:
+        """Profile the next `requests` requests to endpoint, across all workers."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO targets (endpoint, remaining, mode) VALUES (?, ?, ?)",
+            (endpoint, requests, mode),
+        )
+        self._checked_at = float("-inf")
+        return self.status()
+
+    def disarm(self, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        conn = self._connect()
+        if endpoint is None:
+            conn.execute("DELETE FROM targets")
+        else:
+            conn.execute("DELETE FROM targets WHERE endpoint = ?", (endpoint,))
+        self._checked_at = float("-inf")
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        rows = self._connect().execute("SELECT endpoint, remaining, mode FROM targets")
+        return {
+            "armed": {
+                endpoint: {"remaining": remaining, "mode": mode}
+                for endpoint, remaining, mode in rows
+            }
+        }
+
+    def claim(self, path: str) -> Optional[Capture]:
+        """Take one profiling slot for a request to path, if armed."""
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM targets WHERE endpoint = ?", (path,)).fetchone() is None:
+            return None
+        with self._lock:
+            # BEGIN IMMEDIATE so concurrent workers never hand out the same slot
+            conn.execute("BEGIN IMMEDIATE")
+            mode = None
+            try:
+                row = conn.execute(
+                    "SELECT remaining, mode FROM targets WHERE endpoint = ?", (path,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                remaining, mode = row
+                if mode == "deterministic":
+                    # cProfile allows one active profiler per thread
+                    if self._deterministic_busy:
+                        conn.execute("ROLLBACK")
+                        return None
+                    self._deterministic_busy = True
+                if remaining <= 1:
+                    conn.execute("DELETE FROM targets WHERE endpoint = ?", (path,))
+                    self._checked_at = float("-inf")
+                else:
+                    conn.execute(
+                        "UPDATE targets SET remaining = remaining - 1 WHERE endpoint = ?", (path,)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                if mode == "deterministic":
+                    self._deterministic_busy = False
+                raise
+        return Capture(path, mode)
+
+    def start(self, capture: Capture) -> None:
+        if capture.mode == "sampling":
+            self._sampler.add(capture)
+        else:
+            capture.profile = cProfile.Profile()
+            capture.profile.enable()
+
+    def stop(self, capture: Capture, status_code: Optional[int]) -> None:
+        if capture.mode == "sampling":
+            self._sampler.remove(capture)
+        else:
+            capture.profile.disable()
+            with self._lock:
+                self._deterministic_busy = False
+        capture.finish(status_code)
+
+    def save(self, capture: Capture) -> None:
+        """Write the capture and its metadata sidecar to the profile directory."""
+        os.makedirs(self.directory, exist_ok=True)
+        info = capture.to_dict()
+        path = os.path.join(self.directory, info["file"])
+        if capture.mode == "sampling":
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in capture.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        else:
+            capture.profile.dump_stats(path)
+        with open(os.path.join(self.directory, capture.id + ".json"), "w", encoding="utf-8") as f:
+            json.dump(info, f)
+
+    def list_captures(self) -> List[Dict[str, Any]]:
+        """Saved captures, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        captures = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") and CAPTURE_ID.match(name[:-5]):
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    info = json.load(f)
+                info["bytes"] = os.path.getsize(os.path.join(self.directory, info["file"]))
+                captures.append(info)
+        return sorted(captures, key=lambda info: info["started_at"], reverse=True)
+
+    def capture_file(self, capture_id: str) -> Optional[str]:
+        """Path of a capture's profile file, None for unknown or malformed ids."""
+        if not CAPTURE_ID.match(capture_id):
+            return None
+        for extension in (".folded", ".prof"):
+            path = os.path.join(self.directory, capture_id + extension)
+            if os.path.isfile(path):
+                return path
+        return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests claimed from the profiler."""
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # SQLite work (and any lock wait across workers) stays off the event loop
+        if self.profiler.check_due():
+            await run_in_threadpool(self.profiler.refresh_armed)
+        if not self.profiler.armed:
+            await self.app(scope, receive, send)
+            return
+        try:
+            capture = await run_in_threadpool(self.profiler.claim, scope["path"])
+        except sqlite3.Error:
+            # A busy or broken targets database skips profiling, never the request
+            capture = None
+        if capture is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.profiler.start(capture)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.profiler.stop(capture, status_code)
+            await run_in_threadpool(self.profiler.save, capture)
+
+
+# Global instance
+request_profiler = RequestProfiler(Config.PROFILE_DIR)
@@ -0,0 +1,55 @@
+"""
+Startup readiness tracking for the RAG service.
+Components register while they load so /api/ready can report what is still
+loading, how long each step took, and any failures.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+
+class Readiness:
+    """Thread-safe registry of component load states."""
+
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self):
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def mark_loading(self, name: str) -> None:
+        with self._lock:
+            self._components[name] = {
+                "status": self.LOADING,
+                "started_at": time.time(),
+            }
+
+    def mark_ready(self, name: str, seconds: float) -> None:
+        with self._lock:
+            component = self._components.setdefault(name, {})
+            component.update({"status": self.READY, "seconds": round(seconds, 3)})
+
+    def mark_failed(self, name: str, error: str) -> None:
+        with self._lock:
+            component = self._components.setdefault(name, {})
+            component.update({"status": self.FAILED, "error": error})
+
+    def is_ready(self) -> bool:
+        """True when every registered component has loaded (or none are registered)."""
+        with self._lock:
+            return all(c["status"] == self.READY for c in self._components.values())
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(c) for name, c in self._components.items()}
+        return {
+            "ready": all(c["status"] == self.READY for c in components.values()),
+            "components": components,
+        }
+
+
+# Global instance
+readiness = Readiness()
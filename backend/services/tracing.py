@@ -0,0 +1,156 @@
+"""
+Lightweight request tracing for the RAG service.
+A trace is a tree of timed spans for one request. The current span lives in a
+context variable, so spans opened in worker threads (run_in_threadpool) and in
+concurrently gathered tasks attach to the right parent. Outside a trace,
+span() does nothing.
+
+Finished traces go to the exporter selected by TRACE_EXPORTER: "memory" keeps
+the most recent TRACE_MEMORY_SIZE traces for /api/traces, "file" appends one
+JSON line per trace to TRACE_FILE, and "none" records only traces that were
+explicitly requested (the X-Debug-Timings header), for that response alone.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from backend.config import Config
+
+DEBUG_TIMINGS_HEADER = "x-debug-timings"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation and the operations it contains."""
+
+    __slots__ = ("name", "attributes", "start", "end", "children")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+
+    def finish(self) -> None:
+        self.end = time.perf_counter()
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """Span tree with start offsets (from the root) and durations in ms."""
+        origin = self.start if origin is None else origin
+        end = self.end if self.end is not None else time.perf_counter()
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((end - self.start) * 1000, 3),
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+class InMemoryExporter:
+    """Keep the most recent traces in memory."""
+
+    def __init__(self, max_traces: int = 100):
+        self._traces: deque = deque(maxlen=max_traces)
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        self._traces.append(trace)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        traces = list(self._traces)
+        return traces[-limit:] if limit else traces
+
+
+class FileExporter:
+    """Append each trace as one JSON line to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace: Dict[str, Any]) -> None:
+        line = json.dumps(trace, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def _create_exporter():
+    if Config.TRACE_EXPORTER == "memory":
+        return InMemoryExporter(Config.TRACE_MEMORY_SIZE)
+    if Config.TRACE_EXPORTER == "file":
+        return FileExporter(Config.TRACE_FILE)
+    return None
+
+
+@contextmanager
+def start_trace(name: str, force: bool = False, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Open the root span of a request.
+
+    Args:
+        name: Root span name, e.g. "ask"
+        force: Record even when no exporter is configured (debug header)
+        **attributes: Attributes stored on the root span
+
+    Yields:
+        The root span, or None when the request is not traced
+    """
+    if exporter is None and not force:
+        yield None
+        return
+    root = Span(name, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.finish()
+        _current_span.reset(token)
+        if exporter is not None:
+            exporter.export(
+                {
+                    "trace_id": uuid.uuid4().hex,
+                    "timestamp": time.time(),
+                    **root.to_dict(),
+                }
+            )
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span (no-op outside a trace)."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attributes)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+def timings_requested(headers) -> bool:
+    """Whether a request asked for its span tree in the response."""
+    return headers.get(DEBUG_TIMINGS_HEADER, "").lower() in ("1", "true", "yes")
+
+
+# Global instance
+exporter = _create_exporter()
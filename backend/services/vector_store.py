@@ -0,0 +1,378 @@
+"""
+Shared ChromaDB access for the RAG service.
+The persistent client is opened on first use and reused by the API and the
+embedding pipeline, so ingestion and retrieval see the same collection.
+
+When VECTOR_STORE_ADDRESS is set (multi-worker serving, see backend/serve.py),
+a single owner process holds the client and every worker reaches the
+collection through a multiprocessing manager proxy over a local socket, so
+only one process ever writes to the persist directory.
+
+Logical collection names (e.g. "documents") can be pointed at a different
+physical collection through collection_aliases.json in the persist directory.
+Compaction (backend/services/compaction.py) builds a rebuilt copy and swaps it
+in by rewriting that alias, so readers never see a missing collection.
+Collections are handed out as AliasedCollection, which resolves the alias on
+every call and passes writes through write_gate, so compaction can see which
+ids were written during its copy and pause writes while it swaps.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Collection methods callable through the owner process
+REMOTE_COLLECTION_METHODS = (
+    "add",
+    "upsert",
+    "update",
+    "query",
+    "get",
+    "delete",
+    "count",
+)
+
+# persist directory -> client; logical name and directory -> collection.
+# Opened under _open_lock so concurrent first calls (startup preload racing a
+# request, parallel batch uploads) share one client per directory.
+_clients: Dict[str, Any] = {}
+_collections: Dict[Tuple[str, Optional[str]], "AliasedCollection"] = {}
+_open_lock = threading.RLock()
+
+
+def get_chroma_client(persist_directory: Optional[str] = None):
+    """Get the persistent ChromaDB client for a directory (default from Config)."""
+    path = persist_directory or Config.CHROMA_PERSIST_DIRECTORY
+    client = _clients.get(path)
+    if client is None:
+        with _open_lock:
+            client = _clients.get(path)
+            if client is None:
+                import chromadb
+                from chromadb.config import Settings
+
+                client = chromadb.PersistentClient(
+                    path=path, settings=Settings(anonymized_telemetry=False)
+                )
+                _clients[path] = client
+    return client
+
+
+ALIASES_FILE = "collection_aliases.json"
+
+# persist directory -> (aliases file mtime, aliases)
+_aliases_cache: Dict[str, Tuple[int, Dict[str, str]]] = {}
+
+
+def _aliases_path(persist_directory: Optional[str] = None) -> str:
+    return os.path.join(persist_directory or Config.CHROMA_PERSIST_DIRECTORY, ALIASES_FILE)
+
+
+def _aliases_generation(persist_directory: Optional[str] = None) -> int:
+    try:
+        return os.stat(_aliases_path(persist_directory)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def read_collection_aliases(persist_directory: Optional[str] = None) -> Dict[str, str]:
+    """Get the logical -> physical collection name map (re-read when it changes)."""
+    path = _aliases_path(persist_directory)
+    generation = _aliases_generation(persist_directory)
+    cached = _aliases_cache.get(path)
+    if cached and cached[0] == generation:
+        return cached[1]
+    aliases = {}
+    if generation:
+        with open(path, "r", encoding="utf-8") as f:
+            aliases = json.load(f)
+    _aliases_cache[path] = (generation, aliases)
+    return aliases
+
+
+def write_collection_alias(
+    name: str, physical_name: str, persist_directory: Optional[str] = None
+) -> None:
+    """Point a logical collection name at a physical collection (atomic)."""
+    aliases = dict(read_collection_aliases(persist_directory))
+    aliases[name] = physical_name
+    path = _aliases_path(persist_directory)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(aliases, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def physical_collection_name(name: str, persist_directory: Optional[str] = None) -> str:
+    """Resolve a logical collection name to the collection that currently backs it."""
+    return read_collection_aliases(persist_directory).get(name, name)
+
+
+class WriteGate:
+    """
+    Lets compaction pause collection writes made in this process and track
+    which ids they touched.
+
+    Writers hold the gate for the duration of a write; paused() waits for
+    running writes to finish and holds new ones until it exits.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._writing = 0
+        self._paused = False
+        # physical collection name -> ids written since the last drain()
+        self._recording: Dict[str, Set[str]] = {}
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            while self._paused:
+                self._condition.wait()
+            self._writing += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def paused(self):
+        with self._condition:
+            while self._paused:
+                self._condition.wait()
+            self._paused = True
+            while self._writing:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._paused = False
+                self._condition.notify_all()
+
+    def is_recording(self, physical_name: str) -> bool:
+        return physical_name in self._recording
+
+    def record(self, physical_name: str, ids: Iterable[str]) -> None:
+        with self._condition:
+            touched = self._recording.get(physical_name)
+            if touched is not None:
+                touched.update(ids)
+
+    def start_recording(self, physical_name: str) -> None:
+        with self._condition:
+            self._recording[physical_name] = set()
+
+    def drain(self, physical_name: str) -> Set[str]:
+        """Ids written since recording started or the previous drain."""
+        with self._condition:
+            touched = self._recording.get(physical_name, set())
+            self._recording[physical_name] = set()
+            return touched
+
+    def stop_recording(self, physical_name: str) -> None:
+        with self._condition:
+            self._recording.pop(physical_name, None)
+
+
+class AliasedCollection:
+    """
+    A logical collection in this process's ChromaDB client.
+
+    Each call goes to the physical collection the alias names at that moment,
+    so a compaction swap takes effect without handing out new objects.
+    Writes go through write_gate.
+    """
+
+    def __init__(self, name: str, persist_directory: Optional[str] = None):
+        self.name = name
+        self.persist_directory = persist_directory
+        self._physical: Dict[str, Any] = {}
+
+    def _resolve(self):
+        physical_name = physical_collection_name(self.name, self.persist_directory)
+        collection = self._physical.get(physical_name)
+        if collection is None:
+            with _open_lock:
+                collection = self._physical.get(physical_name)
+                if collection is None:
+                    client = get_chroma_client(self.persist_directory)
+                    collection = client.get_or_create_collection(
+                        name=physical_name,
+                        metadata=Config.get_collection_metadata(self.name),
+                    )
+                    self._physical = {physical_name: collection}
+        return collection
+
+    def _write(self, method: str, ids: Optional[List[str]], **kwargs):
+        with write_gate.write():
+            collection = self._resolve()
+            if ids is None and write_gate.is_recording(collection.name):
+                # Compaction needs the ids a filtered delete removes
+                ids = collection.get(
+                    where=kwargs.get("where"),
+                    where_document=kwargs.get("where_document"),
+                    include=[],
+                )["ids"]
+                kwargs = {}
+                if not ids:
+                    return None
+            try:
+                return getattr(collection, method)(ids=ids, **kwargs)
+            finally:
+                # Recorded once the write has landed, so a replay that reads
+                # these ids sees the written state
+                write_gate.record(collection.name, ids or [])
+
+    def add(self, ids, **kwargs):
+        return self._write("add", ids, **kwargs)
+
+    def upsert(self, ids, **kwargs):
+        return self._write("upsert", ids, **kwargs)
+
+    def update(self, ids, **kwargs):
+        return self._write("update", ids, **kwargs)
+
+    def delete(self, ids=None, **kwargs):
+        return self._write("delete", ids, **kwargs)
+
+    def query(self, *args, **kwargs):
+        return self._resolve().query(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        return self._resolve().get(*args, **kwargs)
+
+    def count(self):
+        return self._resolve().count()
+
+    def __getattr__(self, attribute):
+        return getattr(self._resolve(), attribute)
+
+
+def _aliased_collection(name: str, persist_directory: Optional[str]) -> AliasedCollection:
+    key = (name, persist_directory)
+    collection = _collections.get(key)
+    if collection is None:
+        with _open_lock:
+            collection = _collections.get(key)
+            if collection is None:
+                collection = AliasedCollection(name, persist_directory)
+                _collections[key] = collection
+    return collection
+
+
+def get_local_collection(
+    collection_name: Optional[str] = None, persist_directory: Optional[str] = None
+):
+    """Get or create a collection in this process's own ChromaDB client."""
+    collection = _aliased_collection(
+        collection_name or Config.CHROMA_COLLECTION_NAME, persist_directory
+    )
+    # Create it now, as callers expect
+    collection._resolve()
+    return collection
+
+
+def get_collection(
+    collection_name: Optional[str] = None, persist_directory: Optional[str] = None
+):
+    """Get or create a collection with its configured HNSW index parameters."""
+    if Config.VECTOR_STORE_ADDRESS:
+        # The owner resolves the alias on each call, so the proxy can be kept
+        return _remote_collection(collection_name or Config.CHROMA_COLLECTION_NAME)
+    return get_local_collection(collection_name, persist_directory)
+
+
+def find_chunk_ids(where: Dict[str, Any], limit: Optional[int] = None, collection=None) -> List[str]:
+    """Get the ids of chunks matching a metadata filter (no documents or embeddings)."""
+    collection = collection or get_collection()
+    return collection.get(where=where, limit=limit, include=[])["ids"]
+
+
+def delete_chunks(where: Dict[str, Any], batch_size: Optional[int] = None, collection=None) -> int:
+    """
+    Delete every chunk matching a metadata filter, one batch at a time.
+
+    Small batches keep each delete transaction short, so queries are not held
+    up behind one large delete.
+
+    Args:
+        where: Metadata filter, e.g. {"file_id": "..."} or {"project_id": "..."}
+        batch_size: Chunks per delete (default VECTOR_DELETE_BATCH_SIZE)
+        collection: Collection to delete from (default documents collection)
+
+    Returns:
+        Number of chunks deleted
+    """
+    collection = collection or get_collection()
+    batch_size = batch_size or Config.VECTOR_DELETE_BATCH_SIZE
+    deleted = 0
+    while True:
+        ids = find_chunk_ids(where, limit=batch_size, collection=collection)
+        if not ids:
+            return deleted
+        collection.delete(ids=ids)
+        deleted += len(ids)
+
+
+class VectorStoreManager(BaseManager):
+    """Manager serving ChromaDB collections from the owner process."""
+
+
+def _serve_collection(name: Optional[str] = None):
+    return get_local_collection(name)
+
+
+VectorStoreManager.register(
+    "get_collection", callable=_serve_collection, exposed=REMOTE_COLLECTION_METHODS
+)
+
+
+def _authkey() -> bytes:
+    return Config.VECTOR_STORE_AUTHKEY.encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _remote_manager() -> VectorStoreManager:
+    manager = VectorStoreManager(
+        address=Config.VECTOR_STORE_ADDRESS, authkey=_authkey()
+    )
+    manager.connect()
+    return manager
+
+
+@lru_cache(maxsize=16)
+def _remote_collection(name: str):
+    # Proxies open one connection per calling thread, so one can be shared
+    return _remote_manager().get_collection(name)
+
+
+def run_vector_store_server(address: str, authkey: str) -> None:
+    """Serve the local ChromaDB collections on address until terminated."""
+    # Open the client before accepting connections so failures surface early
+    get_local_collection()
+    if Config.COMPACTION_INTERVAL_SECONDS > 0:
+        from backend.services.compaction import start_compaction_scheduler
+
+        start_compaction_scheduler()
+    manager = VectorStoreManager(address=address, authkey=authkey.encode("utf-8"))
+    server = manager.get_server()
+    logger.info(
+        "Vector store owner serving %s on %s", Config.CHROMA_PERSIST_DIRECTORY, address
+    )
+    server.serve_forever()
+
+
+# Global instance
+write_gate = WriteGate()
@@ -0,0 +1,44 @@
+"""Fixtures shared by the backend unit tests."""
+
+import threading
+
+import pytest
+
+from backend import metadata_store
+from backend.config import Config
+from backend.services import vector_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A metadata store on a fresh database, with metadata.json in tmp_path."""
+    monkeypatch.setattr(metadata_store, "METADATA_DB", str(tmp_path / "metadata.db"))
+    monkeypatch.setattr(metadata_store, "METADATA_FILE", str(tmp_path / "metadata.json"))
+    monkeypatch.setattr(metadata_store, "_local", threading.local())
+    return metadata_store
+
+
+@pytest.fixture
+def persist_dir(tmp_path, monkeypatch):
+    """A fresh ChromaDB persist directory with nothing opened yet."""
+    path = str(tmp_path / "chroma")
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", path)
+    monkeypatch.setattr(Config, "VECTOR_STORE_ADDRESS", "")
+    monkeypatch.setattr(vector_store, "_clients", {})
+    monkeypatch.setattr(vector_store, "_collections", {})
+    return path
+
+
+def _add_chunks(collection, file_id, project_id, count):
+    collection.add(
+        ids=[f"{file_id}_{i}" for i in range(count)],
+        documents=["text"] * count,
+        embeddings=[[float(i), 1.0, 0.0] for i in range(count)],
+        metadatas=[{"file_id": file_id, "project_id": project_id}] * count,
+    )
+
+
+@pytest.fixture
+def add_chunks():
+    """add_chunks(collection, file_id, project_id, count) with 3-d embeddings."""
+    return _add_chunks
@@ -0,0 +1,136 @@
+"""
+Unit tests for admission control: per-class limits, shared-slot priority,
+queue timeouts and cancelled waiters.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.admission import AdmissionController, AdmissionRejected, TrafficClass
+
+
+def controller(query=(1, 4), ingest=(1, 4), total_limit=0, queue_timeout=1.0):
+    return AdmissionController(
+        [TrafficClass("query", *query), TrafficClass("ingest", *ingest)],
+        queue_timeout,
+        total_limit,
+    )
+
+
+async def settle():
+    """Let woken waiters run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_admits_up_to_limit_then_queues_then_rejects():
+    async def scenario():
+        c = controller(query=(2, 1))
+        await c.acquire("query")
+        await c.acquire("query")
+        waiting = asyncio.ensure_future(c.acquire("query"))
+        await settle()
+        assert not waiting.done()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await c.acquire("query")
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after >= 1
+
+        c.release("query", 0.1)
+        await settle()
+        assert waiting.done()
+        assert c.classes["query"].active == 2
+
+    asyncio.run(scenario())
+
+
+def test_ingest_not_held_back_by_queries_waiting_for_query_slots():
+    async def scenario():
+        c = controller(total_limit=4)
+        await c.acquire("query")
+        waiting_query = asyncio.ensure_future(c.acquire("query"))
+        await settle()
+        # The queued question lacks a query slot, not a shared one
+        await asyncio.wait_for(c.acquire("ingest"), 0.5)
+        assert c.total_active == 2
+        waiting_query.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_shared_slots_go_to_queries_first():
+    async def scenario():
+        c = controller(query=(2, 4), ingest=(2, 4), total_limit=2)
+        await c.acquire("ingest")
+        await c.acquire("ingest")
+        waiting_ingest = asyncio.ensure_future(c.acquire("ingest"))
+        await settle()
+        waiting_query = asyncio.ensure_future(c.acquire("query"))
+        await settle()
+
+        c.release("ingest", 0.1)
+        await settle()
+        assert waiting_query.done()
+        assert not waiting_ingest.done()
+
+        c.release("ingest", 0.1)
+        await settle()
+        assert waiting_ingest.done()
+        assert c.total_active == 2
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects_with_503_and_frees_queue():
+    async def scenario():
+        c = controller(query=(1, 1), queue_timeout=0.05)
+        await c.acquire("query")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await c.acquire("query")
+        assert rejected.value.status_code == 503
+        assert c.classes["query"].queued == 0
+
+        c.release("query", 0.0)
+        await asyncio.wait_for(c.acquire("query"), 0.5)
+        assert c.classes["query"].active == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    async def scenario():
+        c = controller()
+        await c.acquire("query")
+        waiting = asyncio.ensure_future(c.acquire("query"))
+        await settle()
+        waiting.cancel()
+        await settle()
+        assert c.classes["query"].queued == 0
+
+        c.release("query", 0.0)
+        assert c.classes["query"].active == 0
+        await asyncio.wait_for(c.acquire("query"), 0.5)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_after_admission_hands_the_slot_back():
+    async def scenario():
+        c = controller()
+        await c.acquire("query")
+        waiting = asyncio.ensure_future(c.acquire("query"))
+        await settle()
+        # Slot granted, then the client goes away before the waiter resumes
+        c.release("query", 0.0)
+        waiting.cancel()
+        await settle()
+        if not waiting.cancelled():
+            # wait_for may return the granted slot despite the cancel; the
+            # caller then holds it and releases it as usual
+            c.release("query", 0.0)
+        assert c.classes["query"].active == 0
+
+    asyncio.run(scenario())
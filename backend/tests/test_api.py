@@ -0,0 +1,149 @@
+"""
+Unit tests for the FastAPI endpoints in backend/main.py, called in-process
+with the stub tokenizer so nothing is downloaded.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.benchmarks.stubs import stub_tokenizer
+from backend.config import Config
+from backend.services.vector_store import get_collection
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main.chunker, "_tokenizer", stub_tokenizer())
+    main.chunk_cache.clear()
+    yield TestClient(main.app)
+    main.chunk_cache.clear()
+
+
+def chunk(client, **data):
+    response = client.post("/api/chunk", data=data)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_fixed_tokens_sizes_come_from_the_request(client):
+    text = "hello world " * 200
+    chunks = chunk(client, text=text, strategy="fixed_tokens", chunk_tokens=100, overlap_tokens=0)
+    assert {c["metadata"]["token_count"] for c in chunks[:-1]} == {100}
+    assert [c["metadata"]["start_pos"] for c in chunks[:3]] == [0, 100, 200]
+
+    overlapping = chunk(client, text=text, strategy="fixed_tokens", chunk_tokens=100, overlap_tokens=20)
+    assert [c["metadata"]["start_pos"] for c in overlapping[:3]] == [0, 80, 160]
+
+    default = chunk(client, text=text, strategy="fixed_tokens")
+    assert default[0]["metadata"]["token_count"] == 200
+
+
+def test_stream_passes_token_sizes(client):
+    response = client.post(
+        "/api/chunk/stream?strategy=fixed_tokens&chunk_tokens=50&overlap_tokens=10",
+        content=("hello world " * 50).encode("utf-8"),
+    )
+    lines = [line for line in response.text.splitlines() if line]
+    assert '"done": true' in lines[-1]
+    assert [l for l in lines[:-1] if '"token_count": 50' in l]
+
+
+def test_chunk_cache_keys_on_the_parameters_a_strategy_uses(client):
+    text = "First paragraph.\n\nSecond paragraph.\n\nThird one."
+
+    chunk(client, text=text, strategy="semantic", chunk_size=100)
+    chunk(client, text=text, strategy="semantic", chunk_size=500, overlap=0)
+    assert len(main.chunk_cache) == 1
+
+    chunk(client, text=text, strategy="fixed_size", chunk_size=10, overlap=0)
+    chunk(client, text=text, strategy="fixed_size", chunk_size=10, overlap=2)
+    assert len(main.chunk_cache) == 3
+
+    chunk(client, text=text, strategy="fixed_tokens", chunk_tokens=4, chunk_size=10)
+    chunk(client, text=text, strategy="fixed_tokens", chunk_tokens=4, chunk_size=999)
+    chunk(client, text=text, strategy="fixed_tokens", chunk_tokens=8)
+    assert len(main.chunk_cache) == 5
+
+
+def test_stream_upload_matches_chunk_endpoint(client):
+    text = "".join(f"line {i} of the uploaded document\n" for i in range(500))
+    expected = chunk(client, text=text, strategy="fixed_size", chunk_size=700, overlap=50)
+
+    response = client.post(
+        "/api/chunk/stream?strategy=fixed_size&chunk_size=700&overlap=50",
+        files={"file": ("doc.txt", text.encode("utf-8"), "text/plain")},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert lines[-1] == {"done": True, "total_chunks": len(expected)}
+    assert [line["text"] for line in lines[:-1]] == [c["text"] for c in expected]
+
+
+def test_file_list_pages_with_cursor(client, store):
+    project_id = store.create_project("Paged", "")
+    file_ids = [store.add_file(project_id, f"report-{i}.pdf", "pdf", i) for i in range(7)]
+    store.add_file(store.create_project("Other", ""), "report-x.pdf", "pdf", 1)
+
+    seen, cursor = [], ""
+    while True:
+        page = client.get(
+            f"/api/projects/{project_id}/files", params={"limit": 3, "cursor": cursor}
+        ).json()
+        assert page["total"] == 7
+        seen += [f["fileId"] for f in page["files"]]
+        if page["nextCursor"] is None:
+            break
+        cursor = page["nextCursor"]
+    assert seen == file_ids
+
+
+def test_project_list_search_and_bad_parameters(client, store):
+    for name in ("Alpha", "Beta", "alphabet soup", "Gamma"):
+        store.create_project(name, "")
+
+    prefix = client.get("/api/projects", params={"search": "alpha", "search_mode": "prefix"}).json()
+    assert sorted(p["name"] for p in prefix["projects"]) == ["Alpha", "alphabet soup"]
+    substring = client.get("/api/projects", params={"search": "bet"}).json()
+    assert sorted(p["name"] for p in substring["projects"]) == ["Beta", "alphabet soup"]
+
+    assert client.get("/api/projects", params={"cursor": "abc"}).status_code == 400
+    assert client.get("/api/projects", params={"search_mode": "regex"}).status_code == 400
+
+
+def test_deleting_a_file_removes_its_chunks(client, store, persist_dir, add_chunks):
+    project_id = store.create_project("Docs", "")
+    file_id = store.add_file(project_id, "a.txt", "txt", 1)
+    other_id = store.add_file(project_id, "b.txt", "txt", 1)
+    collection = get_collection()
+    add_chunks(collection, file_id, project_id, 12)
+    add_chunks(collection, other_id, project_id, 3)
+
+    response = client.delete(f"/api/files/{file_id}").json()
+    assert response == {"status": "deleted", "fileId": file_id, "chunksDeleted": 12}
+    assert collection.count() == 3
+    assert [f["fileId"] for f in store.list_files(project_id)] == [other_id]
+
+
+def test_large_project_deletes_chunks_in_the_background(
+    client, store, persist_dir, add_chunks, monkeypatch
+):
+    monkeypatch.setattr(Config, "VECTOR_DELETE_BACKGROUND_THRESHOLD", 10)
+    small = store.create_project("Small", "")
+    large = store.create_project("Large", "")
+    collection = get_collection()
+    add_chunks(collection, "small-file", small, 4)
+    add_chunks(collection, "large-file", large, 25)
+
+    response = client.delete(f"/api/projects/{small}").json()
+    assert response["chunksDeleted"] == 4 and response["background"] is False
+
+    response = client.delete(f"/api/projects/{large}")
+    assert response.status_code == 202
+    assert response.json()["background"] is True
+    # The test client runs background tasks before returning
+    assert collection.count() == 0
+    assert store.list_projects() == []
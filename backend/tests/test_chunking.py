@@ -0,0 +1,242 @@
+"""
+Unit tests for the chunking strategies in backend/hybrid_chunking.py.
+
+They use the byte-level stub tokenizer and stub bi-encoder from
+backend/benchmarks/stubs.py, so no tokenizer files or models are downloaded.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import pytest
+import tiktoken
+
+from backend.benchmarks.stubs import STUB_PAT_STR, StubBiEncoder
+from backend.hybrid_chunking import (
+    Chunk,
+    ChunkMetadata,
+    ChunkingStrategy,
+    HybridChunker,
+    SourceText,
+    StreamingChunker,
+)
+from backend.services.chunking_service import ChunkingService
+
+
+def tokenizer():
+    """Byte-level tokenizer that, like cl100k_base, has <|endoftext|> as a special token."""
+    return tiktoken.Encoding(
+        name="test_bytes",
+        pat_str=STUB_PAT_STR,
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+
+
+@pytest.fixture
+def chunker():
+    chunker = HybridChunker(encoder=StubBiEncoder(dim=16))
+    chunker._tokenizer = tokenizer()
+    return chunker
+
+
+def test_semantic_similarity_accepts_special_token_text(chunker):
+    text = "Prompts may contain <|endoftext|> markers. They are plain text here."
+    chunks = chunker.semantic_similarity_chunking(text, min_tokens=4, max_tokens=256)
+    assert "".join(c.text for c in chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_semantic_similarity_splits_sentences_over_max_tokens(chunker):
+    long_sentence = "x" * 700
+    text = f"Short one. {long_sentence} end. Last one."
+    chunks = chunker.semantic_similarity_chunking(text, min_tokens=4, max_tokens=256)
+
+    counts = [len(chunker.tokenizer.encode_ordinary(c.text)) for c in chunks]
+    assert max(counts) <= 256
+    # The long sentence is covered by consecutive windows, nothing dropped
+    assert long_sentence in "".join(c.text for c in chunks)
+    for c in chunks:
+        assert c.text == text[c.metadata.start_pos : c.metadata.end_pos]
+
+
+def test_explicit_zero_overlap_is_kept(chunker):
+    text = "abcdefghij" * 30
+    chunks = chunker.fixed_size_chunk(text, chunk_size=100, overlap=0)
+    assert [(c.metadata.start_pos, c.metadata.end_pos) for c in chunks] == [
+        (0, 100), (100, 200), (200, 300)
+    ]
+    # None still means the chunker's default overlap
+    chunker.overlap = 20
+    assert [c.metadata.start_pos for c in chunker.fixed_size_chunk(text, chunk_size=100)][:2] == [0, 80]
+
+
+def test_chunking_service_keeps_zero_overlap():
+    service = ChunkingService(default_chunk_size=100, default_overlap=20)
+    text = "abcdefghij" * 30
+    chunks = service.chunk_text(text, ChunkingStrategy.FIXED_SIZE, overlap=0)
+    assert [c.metadata.start_pos for c in chunks] == [0, 100, 200]
+    chunks = service.chunk_text(text, ChunkingStrategy.FIXED_SIZE)
+    assert [c.metadata.start_pos for c in chunks][:2] == [0, 80]
+
+
+def test_chunking_service_passes_token_sizes():
+    service = ChunkingService()
+    service.chunker._tokenizer = tokenizer()
+    chunks = service.chunk_text(
+        "hello world " * 50, ChunkingStrategy.FIXED_TOKENS, chunk_tokens=60, overlap_tokens=0
+    )
+    assert [c.metadata.token_count for c in chunks] == [60] * 10
+
+
+def test_chunks_share_the_source_text_and_slice_it_lazily(chunker):
+    source = SourceText(text="alpha beta gamma delta " * 20, file_id="f1", project_id="p1")
+    chunks = chunker.fixed_size_chunk(source, chunk_size=50, overlap=10)
+    assert all(c.metadata.source is source for c in chunks)
+    for c in chunks:
+        assert c.text == source.text[c.metadata.start_pos : c.metadata.end_pos]
+        assert c.metadata.to_dict()["file_id"] == "f1"
+
+
+def test_setting_file_fields_on_one_chunk_leaves_the_others(chunker):
+    source = SourceText(text="one two three four " * 10, file_id="f1", project_id="p1")
+    source.extra["file_name"] = "doc.txt"
+    chunks = chunker.fixed_size_chunk(source, chunk_size=40, overlap=0)
+    texts = [c.text for c in chunks]
+
+    chunks[0].metadata.file_id = "f2"
+    chunks[1].metadata.extra = {**chunks[1].metadata.extra, "page": 3}
+
+    assert chunks[0].metadata.file_id == "f2"
+    assert chunks[0].metadata.project_id == "p1"
+    assert [c.metadata.file_id for c in chunks[1:]] == ["f1"] * (len(chunks) - 1)
+    assert chunks[1].metadata.extra == {"file_name": "doc.txt", "page": 3}
+    assert chunks[2].metadata.extra == {"file_name": "doc.txt"}
+    assert source.file_id == "f1" and source.extra == {"file_name": "doc.txt"}
+    # Text still comes from the shared source
+    assert [c.text for c in chunks] == texts
+    with pytest.raises(TypeError):
+        chunks[2].metadata.extra["page"] = 1
+
+
+def test_setting_file_fields_on_a_chunk_without_source():
+    metadata = ChunkMetadata(chunk_index=0, start_pos=0, end_pos=5, total_chunks=1)
+    metadata.file_id = "f1"
+    assert metadata.to_dict()["file_id"] == "f1"
+
+    # Attaching the document later still gives the chunk its text
+    metadata.source = SourceText(text="hello world")
+    assert Chunk(metadata=metadata).text == "hello"
+    assert metadata.file_id == "f1"
+    assert Chunk(metadata=metadata, text="explicit").text == "explicit"
+
+
+def test_fixed_tokens_offsets_map_back_to_the_text(chunker):
+    text = "naïve café — ünïcödé text, " * 20
+    chunks = chunker.fixed_token_chunk(text, chunk_tokens=32, overlap_tokens=8)
+    for c in chunks:
+        assert c.text == text[c.metadata.start_pos : c.metadata.end_pos]
+    assert chunks[0].metadata.start_pos == 0
+    assert chunks[-1].metadata.end_pos == len(text)
+    assert sum(c.metadata.token_count for c in chunks) - 8 * (len(chunks) - 1) == len(
+        chunker.tokenizer.encode_ordinary(text)
+    )
+
+
+def test_chunk_ids_come_from_the_upload_file_id():
+    service = ChunkingService(default_chunk_size=50, default_overlap=0)
+    text = "same document text " * 10
+    ids = []
+    for file_id in ("upload-1", "upload-2"):
+        chunks = service.chunk_text(
+            text, file_metadata={"file_id": file_id, "project_id": "p", "file_name": "doc.txt"}
+        )
+        prepared = service.prepare_chunks_for_embedding(chunks)
+        assert prepared["ids"][0] == f"{file_id}_0"
+        assert prepared["metadatas"][0]["file_name"] == "doc.txt"
+        ids += prepared["ids"]
+    # Re-uploading the same file must not collide with the earlier chunks
+    assert len(set(ids)) == len(ids)
+
+
+def test_sliding_window_offsets_match_decoded_prefixes(chunker):
+    text = "Zürich naïve 東京 emoji 🙂 text. " * 40
+    tokens = chunker.tokenizer.encode(text)
+    chunks = chunker.sliding_window_chunking(text, window_size=64, stride=32)
+
+    # Windows shorter than half the window size are dropped
+    assert len(chunks) == sum(1 for i in range(0, len(tokens), 32) if len(tokens) - i >= 32)
+    for c in chunks:
+        i = c.metadata.chunk_index * 32
+        window = tokens[i : i + 64]
+        assert c.text == chunker.tokenizer.decode(window)
+        assert c.metadata.start_pos == len(chunker.tokenizer.decode(tokens[:i]))
+        assert c.metadata.end_pos == len(chunker.tokenizer.decode(tokens[: i + len(window)]))
+        assert c.metadata.total_chunks == len(chunks)
+
+
+def test_parallel_strategies_match_the_sequential_path():
+    # Paragraphs of varying length, several over the hybrid chunk size
+    text = "\n\n".join(
+        f"Paragraph {i}. " + f"Some sentence about topic {i}. " * (8 * (i % 7 + 1))
+        for i in range(30)
+    )
+    strategies = [ChunkingStrategy.FIXED_SIZE, ChunkingStrategy.SEMANTIC, ChunkingStrategy.HYBRID]
+    params = {"fixed_size": {"chunk_size": 300, "overlap": 30}, "hybrid": {"chunk_size": 400}}
+
+    sequential = HybridChunker(default_chunk_size=500, overlap=50)
+    parallel = HybridChunker(default_chunk_size=500, overlap=50, max_workers=2)
+    try:
+        expected = sequential.hybrid_chunk(text, strategies=strategies, custom_params=params)
+        actual = parallel.hybrid_chunk(text, strategies=strategies, custom_params=params)
+    finally:
+        parallel.close()
+
+    for strategy in strategies:
+        assert actual[strategy] == expected[strategy], strategy
+        for c in actual[strategy]:
+            assert c.text == text[c.metadata.start_pos : c.metadata.end_pos]
+
+
+def stream_chunks(chunker, text, strategy, piece_size, **kwargs):
+    stream = StreamingChunker(chunker, strategy, **kwargs)
+    chunks = []
+    for i in range(0, len(text), piece_size):
+        chunks += stream.feed(text[i : i + piece_size])
+    chunks += stream.finish()
+    return chunks, stream
+
+
+def spans(chunks):
+    return [(c.metadata.start_pos, c.metadata.end_pos, c.text) for c in chunks]
+
+
+def test_streamed_fixed_size_matches_whole_document(chunker):
+    text = "".join(f"word{i} " for i in range(2000))
+    params = {"fixed_size": {"chunk_size": 300, "overlap": 40}}
+    expected = chunker.fixed_size_chunk(text, chunk_size=300, overlap=40)
+    for piece_size in (1, 97, 5000):
+        chunks, stream = stream_chunks(
+            chunker, text, ChunkingStrategy.FIXED_SIZE, piece_size, custom_params=params
+        )
+        assert spans(chunks) == spans(expected)
+        assert stream.total_chunks == len(expected)
+
+
+def test_streamed_semantic_matches_whole_document(chunker):
+    text = "\n\n".join(f"Paragraph {i}. " + "filler text " * (i % 9 + 1) for i in range(400))
+    expected = chunker.semantic_chunk(text)
+    chunks, _ = stream_chunks(
+        chunker, text, ChunkingStrategy.SEMANTIC, 113, segment_size=512
+    )
+    assert spans(chunks) == spans(expected)
+    assert [c.metadata.chunk_index for c in chunks] == list(range(len(chunks)))
+
+
+def test_stream_without_breaks_keeps_its_buffer_bounded(chunker):
+    stream = StreamingChunker(chunker, ChunkingStrategy.SEMANTIC, segment_size=256)
+    largest = 0
+    for _ in range(200):
+        stream.feed("x" * 100)
+        largest = max(largest, len(stream._buffer))
+    stream.finish()
+    assert largest <= 4 * 256 + 100
+    assert stream.total_chunks > 0
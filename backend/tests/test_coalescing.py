@@ -0,0 +1,115 @@
+"""
+Unit tests for in-flight request coalescing: one leader runs the work,
+followers share its result or exception, and nothing outlives the run.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.coalescing import RequestCoalescer, normalize_question
+
+
+def test_normalize_question_folds_case_and_whitespace():
+    assert normalize_question("  What IS\tRAG?\n") == normalize_question("what is rag?")
+    assert normalize_question("ＲＡＧ") == "rag"
+
+
+def test_concurrent_callers_share_one_run():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"answer": 42}
+
+        tasks = [asyncio.ensure_future(coalescer.run("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert coalescer.in_flight == 1
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert calls == 1
+        assert [result for result, _ in results] == [{"answer": 42}] * 5
+        assert [follower for _, follower in results] == [False] + [True] * 4
+        assert coalescer.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_and_later_calls_run_separately():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key
+
+        first = await asyncio.gather(
+            coalescer.run("a", lambda: work("a")), coalescer.run("b", lambda: work("b"))
+        )
+        assert first == [("a", False), ("b", False)]
+        # Not cached once the first run has finished
+        assert await coalescer.run("a", lambda: work("a")) == ("a", False)
+        assert calls == ["a", "b", "a"]
+
+    asyncio.run(scenario())
+
+
+async def _answer():
+    return "ok"
+
+
+def test_followers_get_the_leaders_exception():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            raise ValueError("model unavailable")
+
+        tasks = [asyncio.ensure_future(coalescer.run("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert coalescer.in_flight == 0
+        # A failure is not remembered either
+        assert await coalescer.run("key", _answer) == ("ok", False)
+
+    asyncio.run(scenario())
+
+
+def test_leader_cancellation_does_not_cancel_followers():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        leader = asyncio.ensure_future(coalescer.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(coalescer.run("key", work))
+        await asyncio.sleep(0)
+
+        # The leader's client disconnects
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await follower == ("done", True)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
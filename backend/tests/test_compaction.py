@@ -0,0 +1,99 @@
+"""
+Unit tests for index compaction: the rebuilt collection is swapped in through
+the alias, writes made during the copy are replayed, and a failed compaction
+leaves the original collection in place.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import pytest
+
+from backend.config import Config
+from backend.services import compaction
+from backend.services.vector_store import (
+    get_collection,
+    physical_collection_name,
+    write_gate,
+)
+
+
+def contents(collection):
+    records = collection.get(include=["documents", "metadatas"])
+    return {
+        chunk_id: (document, metadata)
+        for chunk_id, document, metadata in zip(
+            records["ids"], records["documents"], records["metadatas"]
+        )
+    }
+
+
+@pytest.fixture
+def documents(persist_dir, add_chunks):
+    """The documents collection with two files, one partly deleted."""
+    collection = get_collection()
+    add_chunks(collection, "f1", "p1", 30)
+    add_chunks(collection, "f2", "p1", 10)
+    collection.delete(ids=[f"f1_{i}" for i in range(20)])
+    return collection
+
+
+def test_compaction_swaps_in_a_copy_with_the_same_chunks(documents, persist_dir):
+    name = Config.CHROMA_COLLECTION_NAME
+    expected = contents(documents)
+
+    report = compaction.compact_collection(grace_seconds=0)
+
+    new_name = physical_collection_name(name, persist_directory=persist_dir)
+    assert new_name.startswith(name + compaction.COMPACTED_SUFFIX)
+    assert report["after"]["physical_collection"] == new_name
+    assert report["after"]["live_chunks"] == 20
+    # The handle callers already hold follows the alias
+    assert contents(documents) == expected
+    assert documents.query(query_embeddings=[[1.0, 1.0, 0.0]], n_results=3)["ids"][0]
+    assert compaction.list_logical_collections() == [name]
+    physical = {c.name for c in compaction.get_chroma_client(persist_dir).list_collections()}
+    assert physical == {new_name}
+
+
+def test_writes_during_the_copy_are_replayed(documents, monkeypatch):
+    copy_ids = compaction._copy_ids
+
+    def copy_then_write(source, target, ids, batch_size):
+        copy_ids(source, target, ids, batch_size)
+        # Ingestion and deletes keep going against the old collection
+        documents.add(
+            ids=["f3_0"], documents=["new"], embeddings=[[0.0, 0.0, 1.0]],
+            metadatas=[{"file_id": "f3", "project_id": "p1"}],
+        )
+        documents.delete(where={"file_id": "f2"})
+        documents.upsert(
+            ids=["f1_25"], documents=["changed"], embeddings=[[5.0, 1.0, 0.0]],
+            metadatas=[{"file_id": "f1", "project_id": "p1"}],
+        )
+
+    monkeypatch.setattr(compaction, "_copy_ids", copy_then_write)
+    compaction.compact_collection(grace_seconds=0)
+
+    after = contents(documents)
+    assert sorted(after) == sorted([f"f1_{i}" for i in range(20, 30)] + ["f3_0"])
+    assert after["f1_25"][0] == "changed"
+    assert after["f3_0"][0] == "new"
+    assert not write_gate.is_recording(documents._resolve().name)
+
+
+def test_failed_swap_keeps_the_original_collection(documents, persist_dir, monkeypatch):
+    name = Config.CHROMA_COLLECTION_NAME
+    expected = contents(documents)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(compaction, "write_collection_alias", fail)
+    with pytest.raises(OSError):
+        compaction.compact_collection(grace_seconds=0)
+
+    assert physical_collection_name(name, persist_directory=persist_dir) == name
+    physical = {c.name for c in compaction.get_chroma_client(persist_dir).list_collections()}
+    assert physical == {name}
+    assert not write_gate.is_recording(name)
+    assert contents(documents) == expected
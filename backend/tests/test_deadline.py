@@ -0,0 +1,122 @@
+"""
+Unit tests for deadline-aware /api/ask: budgets from the header or config,
+rerank and LLM planning against recent stage costs, and the degraded answers
+the endpoint returns when a stage does not fit.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.benchmarks.stubs import StubBiEncoder, StubCrossEncoder, StubOpenAI
+from backend.config import Config
+from backend.services import deadline as deadlines
+from backend.services import models
+from backend.services.deadline import Deadline, StageEstimates
+
+
+@pytest.fixture
+def estimates(monkeypatch):
+    """Fresh stage cost estimates, shared with main.py."""
+    fresh = StageEstimates(alpha=1.0)
+    monkeypatch.setattr(deadlines, "stage_estimates", fresh)
+    monkeypatch.setattr(main, "stage_estimates", fresh)
+    return fresh
+
+
+def test_request_deadline_from_header_or_config(monkeypatch):
+    monkeypatch.setattr(Config, "ASK_DEADLINE_MS", 0)
+    assert deadlines.request_deadline({}) is None
+    assert deadlines.request_deadline({"x-deadline-ms": "250"}).budget_ms == 250
+    monkeypatch.setattr(Config, "ASK_DEADLINE_MS", 800)
+    assert deadlines.request_deadline({}).budget_ms == 800
+    for bad in ("0", "-5", "soon"):
+        with pytest.raises(ValueError):
+            deadlines.request_deadline({"x-deadline-ms": bad})
+
+
+def test_rerank_budget_leaves_time_for_the_llm(estimates, monkeypatch):
+    monkeypatch.setattr(Config, "ASK_MIN_RERANK_CANDIDATES", 5)
+    budget = Deadline(1000)
+    # Nothing observed yet: no basis for cutting anything
+    assert deadlines.rerank_budget(budget, 20) == 20
+
+    estimates.observe("rerank", 0.02)  # 20 ms per pair
+    estimates.observe("llm", 0.6)
+    assert 10 <= deadlines.rerank_budget(budget, 20) < 20
+    assert deadlines.rerank_budget(Deadline(5000), 20) == 20
+    # Too little for the LLM: keep a minimal rerank while it fits, else skip
+    assert deadlines.rerank_budget(Deadline(300), 20) == 5
+    assert deadlines.rerank_budget(Deadline(50), 20) == 0
+
+
+def test_llm_plan_reduces_then_skips(estimates):
+    estimates.observe("llm", 1.0)
+    assert deadlines.llm_plan(Deadline(2000)) == "full"
+    assert deadlines.llm_plan(Deadline(700)) == "reduced"
+    assert deadlines.llm_plan(Deadline(200)) == "skip"
+    assert deadlines.llm_plan(Deadline(-1)) == "skip"
+
+
+@pytest.fixture
+def ask(persist_dir, add_chunks, estimates, monkeypatch):
+    """POST /api/ask against stub models and a small project."""
+    monkeypatch.setattr(models, "_models", {})
+    models.set_model("bi_encoder", StubBiEncoder(dim=3))
+    models.set_model("cross_encoder", StubCrossEncoder())
+    models.set_model("llm", StubOpenAI())
+    monkeypatch.setattr(Config, "ASK_COALESCE", False)
+    add_chunks(main.get_collection(), "f1", "p1", 12)
+    client = TestClient(main.app)
+
+    def post(deadline_ms=None):
+        headers = {"X-Deadline-Ms": str(deadline_ms)} if deadline_ms else {}
+        response = client.post(
+            "/api/ask", json={"projectId": "p1", "question": "what is it?"}, headers=headers
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    return post
+
+
+def test_ask_rejects_an_invalid_deadline_header():
+    response = TestClient(main.app).post(
+        "/api/ask", json={"projectId": "p1", "question": "q"}, headers={"X-Deadline-Ms": "-1"}
+    )
+    assert response.status_code == 400
+
+
+def test_ask_without_pressure_is_not_degraded(ask):
+    response = ask(deadline_ms=5000)
+    assert response["degradations"] == []
+    assert response["deadline_ms"] == 5000
+    assert response["retrieved_chunks_count"] == Config.ASK_CONTEXT_CHUNKS
+
+
+def test_ask_degrades_when_stages_do_not_fit(ask, estimates):
+    # Recent costs say the LLM alone needs 10 s and reranking 1 s per pair
+    estimates.observe("llm", 10.0)
+    estimates.observe("rerank", 1.0)
+    response = ask(deadline_ms=200)
+    assert response["degradations"] == [deadlines.RERANK_SKIPPED, deadlines.RETRIEVAL_ONLY]
+    assert response["answer"].startswith("No answer could be generated in time")
+    assert response["sources"]
+
+
+def test_ask_answers_from_a_reduced_context(ask, estimates):
+    estimates.observe("llm", 1.0)
+    response = ask(deadline_ms=800)
+    assert deadlines.CONTEXT_REDUCED in response["degradations"]
+    assert response["retrieved_chunks_count"] == Config.ASK_REDUCED_CONTEXT_CHUNKS
+
+
+def test_llm_timeout_falls_back_to_retrieval(ask, estimates):
+    models.set_model("llm", StubOpenAI(seconds=0.5))
+    response = ask(deadline_ms=100)
+    assert response["degradations"] == [deadlines.LLM_TIMEOUT]
+    assert response["answer"].startswith("No answer could be generated in time")
+    # The slow call now counts towards the LLM estimate
+    assert estimates.estimate("llm") >= 0.05
@@ -0,0 +1,102 @@
+"""
+Unit tests for ingestion event broadcasting: project filtering, Last-Event-ID
+replay, bounded subscriber queues and the log shared between workers.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import asyncio
+
+from backend.services.events import EventBroadcaster, SharedEventBroadcaster, format_sse
+
+
+async def settle():
+    """Let call_soon_threadsafe deliveries run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def next_event(subscription, timeout=2.0):
+    return await asyncio.wait_for(subscription.queue.get(), timeout)
+
+
+def test_subscribers_get_their_projects_events():
+    async def scenario():
+        broadcaster = EventBroadcaster()
+        everything = broadcaster.subscribe()
+        project_a = broadcaster.subscribe("a")
+
+        broadcaster.publish("file_status", fileId="f1", projectId="a", status="processing")
+        broadcaster.publish("file_status", fileId="f2", projectId="b", status="processing")
+        await settle()
+
+        assert [e["fileId"] for _, e in [everything.queue.get_nowait() for _ in range(2)]] == ["f1", "f2"]
+        _, event = project_a.queue.get_nowait()
+        assert event["fileId"] == "f1"
+        assert project_a.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_replays_events_after_last_event_id():
+    async def scenario():
+        broadcaster = EventBroadcaster()
+        for i in range(5):
+            broadcaster.publish("file_stage", fileId=f"f{i}", projectId="a", stage="chunking")
+        subscription = broadcaster.subscribe("a", last_event_id=3)
+        ids = [subscription.queue.get_nowait()[0] for _ in range(2)]
+        assert ids == [4, 5]
+        assert subscription.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def scenario():
+        broadcaster = EventBroadcaster(max_queue=2)
+        subscription = broadcaster.subscribe()
+        for i in range(4):
+            broadcaster.publish("file_stage", fileId=f"f{i}", stage="embedding")
+        await settle()
+
+        assert subscription.dropped == 2
+        assert [subscription.queue.get_nowait()[1]["fileId"] for _ in range(2)] == ["f2", "f3"]
+        assert broadcaster.queued_events == 0
+
+    asyncio.run(scenario())
+
+
+def test_format_sse():
+    message = format_sse(7, {"type": "file_status", "fileId": "f1"})
+    assert message.startswith("id: 7\nevent: file_status\ndata: {")
+    assert message.endswith("\n\n")
+
+
+def test_shared_log_reaches_subscribers_in_other_workers(tmp_path):
+    async def scenario():
+        db_path = str(tmp_path / "events.db")
+        # Two broadcasters on one log stand in for two worker processes
+        worker_a = SharedEventBroadcaster(db_path, poll_interval=0.01)
+        worker_b = SharedEventBroadcaster(db_path, poll_interval=0.01)
+        on_a = worker_a.subscribe("p1")
+        on_b = worker_b.subscribe("p1")
+        await asyncio.sleep(0.1)
+
+        worker_a.publish("file_status", fileId="f1", projectId="p1", status="completed")
+        worker_a.publish("file_status", fileId="f2", projectId="p2", status="completed")
+        worker_b.publish("file_status", fileId="f3", projectId="p1", status="failed")
+
+        seen_on_b = [await next_event(on_b), await next_event(on_b)]
+        seen_on_a = [await next_event(on_a), await next_event(on_a)]
+        assert sorted(e["fileId"] for _, e in seen_on_b) == ["f1", "f3"]
+        # Ids come from the log, so both workers agree on them
+        assert [event_id for event_id, _ in seen_on_a] == [event_id for event_id, _ in seen_on_b]
+
+        # A client reconnecting to the other worker catches up from its last id
+        first_id = min(event_id for event_id, _ in seen_on_b)
+        reconnected = worker_a.subscribe("p1", last_event_id=first_id)
+        replayed = await next_event(reconnected)
+        assert replayed[0] > first_id
+        assert replayed[1]["projectId"] == "p1"
+
+    asyncio.run(scenario())
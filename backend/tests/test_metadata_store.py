@@ -0,0 +1,135 @@
+"""
+Unit tests for the SQLite metadata store: the one-time metadata.json import
+and keyset pagination.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+
+def reconnect(store, monkeypatch):
+    """Drop this thread's connection, as a restarted process would."""
+    monkeypatch.setattr(store, "_local", threading.local())
+
+
+def write_legacy_json(path, projects, files):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "projects": {p["projectId"]: p for p in projects},
+                "files": {f["fileId"]: f for f in files},
+            },
+            f,
+        )
+
+
+def test_json_migration_imports_in_order_and_renames_file(store, tmp_path, monkeypatch):
+    projects = [
+        {"projectId": f"p{i}", "name": f"Project {i}", "description": "", "createdAt": "", "status": "active"}
+        for i in range(3)
+    ]
+    files = [
+        {"fileId": f"f{i}", "projectId": "p0", "filename": f"doc{i}.pdf", "type": "pdf",
+         "size": i, "uploadedAt": "", "status": "completed"}
+        for i in range(5)
+    ]
+    write_legacy_json(store.METADATA_FILE, projects, files)
+
+    assert [p["projectId"] for p in store.list_projects()] == ["p0", "p1", "p2"]
+    assert [f["fileId"] for f in store.list_files("p0")] == [f"f{i}" for i in range(5)]
+    assert not (tmp_path / "metadata.json").exists()
+    assert (tmp_path / "metadata.json.migrated").exists()
+
+    # A second start does not import again
+    reconnect(store, monkeypatch)
+    assert len(store.list_projects()) == 3
+
+
+def test_failed_migration_keeps_json_and_retries(store, tmp_path, monkeypatch):
+    write_legacy_json(
+        store.METADATA_FILE,
+        [{"projectId": "p0", "name": "Legacy", "description": "", "createdAt": "", "status": "active"}],
+        [],
+    )
+    migrate = store._migrate_json
+
+    def migrate_then_fail(conn):
+        migrate(conn)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(store, "_migrate_json", migrate_then_fail)
+    with pytest.raises(sqlite3.OperationalError):
+        store.list_projects()
+    # Rolled back, so the file must still be there to retry from
+    assert (tmp_path / "metadata.json").exists()
+
+    monkeypatch.setattr(store, "_migrate_json", migrate)
+    reconnect(store, monkeypatch)
+    assert [p["name"] for p in store.list_projects()] == ["Legacy"]
+    assert (tmp_path / "metadata.json.migrated").exists()
+
+
+def collect_pages(store, limit, **filters):
+    ids, cursor = [], None
+    while True:
+        files, total, cursor = store.query_files(limit=limit, cursor=cursor, **filters)
+        ids.extend(f["fileId"] for f in files)
+        if cursor is None:
+            return ids, total
+
+
+def test_keyset_pages_cover_every_row_once(store):
+    project_id = store.create_project("Paged", "")
+    file_ids = [store.add_file(project_id, f"doc{i}.txt", "txt", i) for i in range(25)]
+
+    ids, total = collect_pages(store, limit=10, project_id=project_id)
+    assert ids == file_ids
+    assert total == 25
+
+    # An exact multiple of the page size ends with an empty page
+    ids, _ = collect_pages(store, limit=5, project_id=project_id)
+    assert ids == file_ids
+
+
+def test_keyset_pagination_is_stable_under_deletes(store):
+    project_id = store.create_project("Paged", "")
+    file_ids = [store.add_file(project_id, f"doc{i}.txt", "txt", i) for i in range(20)]
+
+    first, _, cursor = store.query_files(project_id=project_id, limit=10)
+    assert [f["fileId"] for f in first] == file_ids[:10]
+    # Deleting rows already seen would shift an OFFSET page; the cursor does not
+    for file_id in file_ids[:3]:
+        store.delete_file(file_id)
+    second, total, cursor = store.query_files(project_id=project_id, limit=10, cursor=cursor)
+    assert [f["fileId"] for f in second] == file_ids[10:]
+    assert total == 17
+
+
+def test_cursor_ignores_offset_and_applies_filters(store):
+    project_id = store.create_project("Paged", "")
+    file_ids = []
+    for i in range(12):
+        file_id = store.add_file(project_id, f"doc{i}.txt", "txt", i)
+        store.update_file_status(file_id, "completed" if i % 2 else "failed")
+        file_ids.append(file_id)
+
+    first, total, cursor = store.query_files(project_id=project_id, status="completed", limit=3)
+    assert total == 6
+    second, _, _ = store.query_files(
+        project_id=project_id, status="completed", limit=3, offset=100, cursor=cursor
+    )
+    assert [f["fileId"] for f in first + second] == file_ids[1::2]
+
+
+def test_fresh_database_gets_the_current_schema(store, tmp_path):
+    assert store.list_projects() == []
+    conn = sqlite3.connect(store.METADATA_DB)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == store.SCHEMA_VERSION
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+    assert columns[0] == "seq"
+    assert not (tmp_path / "metadata.json.migrated").exists()
@@ -0,0 +1,104 @@
+"""
+Unit tests for on-demand profiling: slots counted across workers, the
+middleware keeping SQLite off the event loop, and captures saved per request.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.profiling import ProfilingMiddleware, RequestProfiler
+
+
+def test_requests_are_counted_across_workers(tmp_path):
+    # Separate profilers on one directory stand in for worker processes
+    workers = [RequestProfiler(str(tmp_path), check_interval=0) for _ in range(4)]
+    workers[0].arm("/api/ask", 10, "sampling")
+
+    def claim(profiler):
+        return profiler.claim("/api/ask")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        captures = list(pool.map(claim, [workers[i % 4] for i in range(40)]))
+
+    assert sum(capture is not None for capture in captures) == 10
+    assert workers[3].status() == {"armed": {}}
+    assert not workers[2].refresh_armed()
+
+
+def test_arm_status_and_disarm_are_shared(tmp_path):
+    first = RequestProfiler(str(tmp_path))
+    second = RequestProfiler(str(tmp_path))
+    first.arm("/api/ask", 3, "deterministic")
+    first.arm("/api/chunk", 2, "sampling")
+    assert second.status()["armed"]["/api/ask"] == {"remaining": 3, "mode": "deterministic"}
+
+    second.disarm("/api/ask")
+    assert list(first.status()["armed"]) == ["/api/chunk"]
+    second.disarm()
+    assert first.status() == {"armed": {}}
+
+
+def test_only_one_deterministic_capture_at_a_time(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    profiler.arm("/api/ask", 5, "deterministic")
+    capture = profiler.claim("/api/ask")
+    assert capture is not None
+    # cProfile allows one active profiler per thread
+    assert profiler.claim("/api/ask") is None
+
+    profiler.start(capture)
+    profiler.stop(capture, 200)
+    assert profiler.claim("/api/ask") is not None
+    assert profiler.status()["armed"]["/api/ask"]["remaining"] == 3
+
+
+async def echo_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def request(middleware, path):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware({"type": "http", "path": path}, receive, send)
+    return sent
+
+
+def test_middleware_claims_off_the_event_loop_and_saves_captures(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+    loop_threads = []
+    claim = profiler.claim
+
+    def claim_recording_thread(path):
+        loop_threads.append(threading.current_thread())
+        return claim(path)
+
+    profiler.claim = claim_recording_thread
+    middleware = ProfilingMiddleware(echo_app, profiler)
+
+    async def scenario():
+        main = threading.current_thread()
+        # Nothing armed: passed straight through
+        assert (await request(middleware, "/api/ask"))[0]["status"] == 200
+        assert loop_threads == []
+
+        profiler.arm("/api/ask", 2, "sampling")
+        for _ in range(3):
+            assert (await request(middleware, "/api/ask"))[0]["status"] == 200
+        await request(middleware, "/api/other")
+        assert loop_threads and all(thread is not main for thread in loop_threads)
+
+    asyncio.run(scenario())
+    captures = profiler.list_captures()
+    assert len(captures) == 2
+    assert {capture["status_code"] for capture in captures} == {200}
+    assert all(capture["endpoint"] == "/api/ask" for capture in captures)
@@ -0,0 +1,67 @@
+"""
+Unit tests for shared ChromaDB access: one client and one collection object
+per persist directory, even when the first calls arrive concurrently, and
+batched deletes by metadata filter.
+
+Run from the repository root: python -m pytest backend/tests
+"""
+
+import threading
+
+from backend.services import vector_store
+
+
+def test_concurrent_first_use_opens_one_client(persist_dir):
+    threads = 8
+    start = threading.Barrier(threads)
+    collections, errors = [], []
+
+    def open_collection():
+        start.wait()
+        try:
+            collection = vector_store.get_local_collection()
+            collection.upsert(
+                ids=[f"chunk-{threading.get_ident()}"],
+                documents=["text"],
+                embeddings=[[0.1, 0.2, 0.3]],
+            )
+            collections.append(collection)
+        except Exception as e:  # noqa: BLE001 - reported below
+            errors.append(e)
+
+    workers = [threading.Thread(target=open_collection) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert len({id(c) for c in collections}) == 1
+    assert list(vector_store._clients) == [persist_dir]
+    assert collections[0].count() == threads
+
+
+def test_default_and_explicit_directory_share_a_client(persist_dir):
+    assert vector_store.get_chroma_client() is vector_store.get_chroma_client(persist_dir)
+
+
+def test_delete_chunks_removes_every_match_in_batches(persist_dir, add_chunks, monkeypatch):
+    collection = vector_store.get_collection()
+    add_chunks(collection, "f1", "p1", 23)
+    add_chunks(collection, "f2", "p1", 5)
+    add_chunks(collection, "f3", "p2", 4)
+
+    deletes = []
+    delete = collection.delete
+
+    def counting_delete(ids=None, **kwargs):
+        deletes.append(len(ids))
+        return delete(ids=ids, **kwargs)
+
+    monkeypatch.setattr(collection, "delete", counting_delete)
+    assert vector_store.delete_chunks({"file_id": "f1"}, batch_size=10) == 23
+    assert deletes == [10, 10, 3]
+    assert vector_store.delete_chunks({"project_id": "p1"}, batch_size=10) == 5
+    assert vector_store.delete_chunks({"file_id": "missing"}) == 0
+    assert sorted(vector_store.find_chunk_ids({"project_id": "p2"})) == [f"f3_{i}" for i in range(4)]
+    assert collection.count() == 4